@@ -8,6 +8,11 @@ using a ThreadPoolExecutor.
 Concurrency Model:
 - Uses asyncio as the entry point.
 - Uses ThreadPoolExecutor to execute job runs each on its own thread
+- EXECUTOR_MODE=threads (default) serializes each result to JSON on its thread
+- EXECUTOR_MODE=live keeps results as LiveResult objects: rows stay as
+  fetched and are only serialized if they leave the process
+- EXECUTOR_MODE=hybrid keeps driver I/O on those threads but moves row
+  conversion / serialization / compression to a ProcessPoolExecutor
 - Results and errors are logged.
 
 Important Assumptions:
@@ -24,10 +29,81 @@ from jobs.job import Job  # Job abstraction that encapsulates execution logic
 from connection import *  # SnowflakeConnection and related connection utilities
 from concurrent.futures import ThreadPoolExecutor, as_completed  # Thread-based concurrency
 from connection_config import *  # SnowflakeConfig and connection configuration classes
+from ratelimit import AdaptiveLimiter, AdaptivePolicy  # Per-target adaptive concurrency
+from scheduling import CostAwareScheduler  # Orders jobs by expected runtime
+from executor import ProcessOffloader  # CPU-bound result stages for the hybrid mode
+from models import LiveResult  # Unserialized in-process results
+from logconfig import configure_logger  # Non-blocking, redacting log pipeline
+from ingest import JobFileReader, feed_inprocess  # Streaming JSONL job files
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Grows / shrinks in-flight jobs per target based on observed latency and errors
+adaptive_limiter = AdaptiveLimiter()
+
+
+def run_adaptive(job: Job, serializer=None):
+    """
+    Runs a job once the adaptive limiter for its target admits it.
+    Failed executions (timeouts, connection errors) make the limiter back off.
+    serializer moves the CPU-bound result stage off this thread (hybrid mode).
+    """
+    connection = job.job_connection
+    policy = AdaptivePolicy.from_env(connection.connection_type)
+
+    expected = job.expected_runtime() if policy.enabled else None
+
+    with adaptive_limiter.limit(connection.target_key(), policy, expected=expected) as sample:
+        result = job.run(serializer=serializer)
+        sample.failed = connection.last_status == "fail"
+
+    return result
+
+
+def run_jobs_live(jobs: list[Job], max_workers: int | None = None) -> list[LiveResult]:
+    """
+    Embedding API: runs jobs in-process and returns their LiveResults in
+    input order. Rows are handed over as fetched, without a JSON round trip.
+    """
+    if not jobs:
+        return []
+
+    with ThreadPoolExecutor(max_workers=max_workers or len(jobs)) as executor:
+        futures = {
+            id(job): executor.submit(run_adaptive, job, LiveResult.serializer)
+            for job in CostAwareScheduler.from_env().order(jobs)
+        }
+        return [futures[id(job)].result() for job in jobs]
+
+
+def _serializer_for_mode(mode: str):
+    """Returns (serializer, offloader) for an EXECUTOR_MODE value."""
+    if mode == "hybrid":
+        offloader = ProcessOffloader.from_env()
+        return offloader.serialize, offloader
+    if mode == "live":
+        return LiveResult.serializer, None
+    if mode != "threads":
+        logger.warning("Unknown EXECUTOR_MODE %r, using threads", mode)
+    return None, None
+
+
+def run_job_file(path: str, serializer=None, max_in_flight: int | None = None) -> int:
+    """
+    Streams a JSONL job file through the in-process engine with bounded
+    in-flight jobs (INGEST_MAX_IN_FLIGHT). Returns the number of jobs run.
+    """
+    reader = JobFileReader(path, batch_size=int(os.getenv("INGEST_BATCH_SIZE", "1000")))
+    count = feed_inprocess(
+        reader,
+        run=lambda job: run_adaptive(job, serializer),
+        max_in_flight=max_in_flight or int(os.getenv("INGEST_MAX_IN_FLIGHT", "32")),
+    )
+    logger.info("Ran %d job(s) from %s: %s", count, path, reader.stats)
+    return count
+
+
 async def main():
     """
     Main asynchronous entry point.
@@ -73,15 +149,29 @@ async def main():
     # List to store Future objects returned by the executor
     futures = []
 
+    # threads (default) returns JSON as before; live skips serialization, as
+    # results are only logged here; hybrid sends CPU-bound stages to a process pool
+    serializer, offloader = _serializer_for_mode(os.getenv("EXECUTOR_MODE", "threads").strip().lower())
+
+    # JOBS_FILE streams jobs from a JSONL file instead of the list above
+    if jobs_file := os.getenv("JOBS_FILE"):
+        try:
+            run_job_file(jobs_file, serializer)
+        finally:
+            if offloader:
+                offloader.shutdown()
+        return
+
     # Create a thread pool sized to the number of jobs.
     # Each job is submitted as a separate thread.
-    # This allows concurrent execution of blocking Snowflake calls.
+    # This allows concurrent execution of blocking Snowflake calls,
+    # while the adaptive limiter caps how many hit each target at once.
     with ThreadPoolExecutor(max_workers=len(jobs)) as executor:
 
-        # Submit each job to the thread pool
-        for job in jobs:
-            # Submit the job's run() method for execution
-            future = executor.submit(job.run)
+        # Submit each job to the thread pool, shortest expected runtime first
+        for job in CostAwareScheduler.from_env().order(jobs):
+            # Submit the job's run() method for execution, gated per target
+            future = executor.submit(run_adaptive, job, serializer)
 
             # Attach a callback to be executed when the future completes.
             # NOTE: job.job_callback() is invoked immediately here and its
@@ -100,7 +190,7 @@ async def main():
 
                 # Log successful job completion
                 if result:
-                    logger.info(f"Job Finished with result - {result}")
+                    logger.info("Job Finished with result - %s", result)
                 else:
                     logger.info("No result returned from function callback")
 
@@ -108,7 +198,10 @@ async def main():
                 # Log exception if job execution failed.
                 # logger.exception logs full stack trace.
                 # NOTE: 'result' may not be defined if exception occurred before assignment.
-                logger.exception(f"Error executing job - {e}")
+                logger.exception("Error executing job - %s", e)
+
+    if offloader:
+        offloader.shutdown()
 
 
 def setup_logger(
@@ -128,40 +221,12 @@ def setup_logger(
 
     Behavior:
     - Prevents duplicate handlers if logger already exists
-    - Configures console logging
-    - Optionally configures file logging
+    - Records are queued and written by a background thread (see logconfig),
+      so console / file I/O never blocks job threads
+    - Credentials are redacted; LOG_FORMAT=json emits structured records
+      carrying job / task ids; LOG_SAMPLE_RATES samples chatty modules
     """
-
-    # Get or create a named logger
-    logger = logging.getLogger(name)
-
-    # Set logging level
-    logger.setLevel(level)
-
-    # Prevent duplicate handlers (important in larger applications
-    # where setup_logger might be called multiple times).
-    if logger.handlers:
-        logger.propagate = False  # Prevent propagation to root logger
-        return logger
-
-    # Define log message format
-    formatter = logging.Formatter(
-        "%(asctime)s | %(levelname)s | %(name)s | %(funcName)s | %(message)s"
-    )
-
-    # Console handler for stdout logging
-    console_handler = logging.StreamHandler()
-    console_handler.setLevel(logging.INFO)
-    console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
-
-    # Optional file handler for persistent logging
-    if log_to_file and file_path:
-        file_handler = logging.FileHandler(file_path)
-        file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
-
-    return logger
+    return configure_logger(name, level=level, log_to_file=log_to_file, file_path=file_path)
 
 
 # Initialize application-level logger
@@ -1,6 +1,8 @@
 import os
 from celery import Celery
 from kombu import Queue
+from transport import CompressionSettings, register_compressed_json
+from stats import RedisRuntimeStatsStore, configure_runtime_stats
 
 # ------------------------------------------------------------------------------
 # Environment configuration (12-factor style)
@@ -9,8 +11,48 @@ from kombu import Queue
 BROKER_URL = os.getenv("CELERY_BROKER_URL", "redis://localhost:6379/0")
 RESULT_BACKEND = os.getenv("CELERY_RESULT_BACKEND", "redis://localhost:6379/1")
 
+# Redis used for fleet-wide rate / concurrency limits (defaults to the broker)
+RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL", BROKER_URL)
+
+# Workers record job runtimes where the runner's CostAwareScheduler reads them.
+# RUNTIME_STATS_BACKEND=sqlite keeps them in the local file instead, which
+# only works if every worker and the runner share one RUNTIME_STATS_PATH.
+RUNTIME_STATS_REDIS_URL = os.getenv("RUNTIME_STATS_REDIS_URL", BROKER_URL)
+RUNTIME_STATS_BACKEND = os.getenv("RUNTIME_STATS_BACKEND", "redis").strip().lower()
+if RUNTIME_STATS_BACKEND == "redis":
+    configure_runtime_stats(RedisRuntimeStatsStore.from_url(RUNTIME_STATS_REDIS_URL))
+
 DEFAULT_QUEUE = os.getenv("CELERY_DEFAULT_QUEUE", "default")
+# Jobs predicted to run long (see scheduling.CostAwareScheduler) are routed here
+HEAVY_QUEUE = os.getenv("CELERY_HEAVY_QUEUE", "heavy")
 TIMEZONE = os.getenv("CELERY_TIMEZONE", "UTC")
+# Each worker host also consumes <prefix>.<hostname>, so pages of results
+# spilled to its local disk are served by that host (see tasks.request_result_page)
+RESULTS_QUEUE_PREFIX = os.getenv("CELERY_RESULTS_QUEUE_PREFIX", "results")
+
+
+def host_queue(host: str) -> str:
+    """Queue consumed only by the workers on `host`."""
+    return f"{RESULTS_QUEUE_PREFIX}.{host}"
+
+
+# Soft limit raises inside the task so active queries can be cancelled server side;
+# the hard limit is a backstop that kills the child process.
+TASK_SOFT_TIME_LIMIT = int(os.getenv("CELERY_TASK_SOFT_TIME_LIMIT", "0")) or None
+TASK_TIME_LIMIT = int(os.getenv("CELERY_TASK_TIME_LIMIT", "0")) or None
+
+# worker_process_init (incl. warm-up logins / warehouse resume) must finish
+# within this many seconds or the pool process is killed (Celery default: 4)
+WORKER_PROC_ALIVE_TIMEOUT = float(os.getenv("CELERY_WORKER_PROC_ALIVE_TIMEOUT", "30"))
+
+# Task messages and results above the threshold are compressed
+# (TRANSPORT_COMPRESSION=zlib|lzma|bz2|zstd|lz4|none, TRANSPORT_COMPRESSION_THRESHOLD)
+# The compressed serializer is always registered and accepted, so workers and
+# clients with different settings can read each other's messages; only what
+# this process sends depends on the setting.
+COMPRESSION = CompressionSettings.from_env()
+COMPRESSED_SERIALIZER = register_compressed_json(COMPRESSION)
+SERIALIZER = COMPRESSED_SERIALIZER if COMPRESSION.codec else "json"
 
 # ------------------------------------------------------------------------------
 # Create Celery app
@@ -29,9 +71,10 @@ celery_app = Celery(
 
 celery_app.conf.update(
     # Serialization
-    task_serializer="json",
-    result_serializer="json",
-    accept_content=["json"],
+    task_serializer=SERIALIZER,
+    result_serializer=SERIALIZER,
+    accept_content=["json", COMPRESSED_SERIALIZER],
+    result_accept_content=["json", COMPRESSED_SERIALIZER],
 
     # Time / reliability
     timezone=TIMEZONE,
@@ -41,10 +84,13 @@ celery_app.conf.update(
     task_acks_late=True,
     task_reject_on_worker_lost=True,
     task_track_started=True,
+    task_soft_time_limit=TASK_SOFT_TIME_LIMIT,
+    task_time_limit=TASK_TIME_LIMIT,
 
     # Worker behavior
     worker_prefetch_multiplier=1,
     worker_max_tasks_per_child = 250,  # Recycle workers periodically to prevent memory leaks from accumulating
+    worker_proc_alive_timeout=WORKER_PROC_ALIVE_TIMEOUT,
 
     # Result backend behavior
     result_expires=3600,
@@ -53,6 +99,7 @@ celery_app.conf.update(
     task_default_queue=DEFAULT_QUEUE,
     task_queues=(
         Queue(DEFAULT_QUEUE),
+        Queue(HEAVY_QUEUE),
     ),
 )
 
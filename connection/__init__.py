@@ -1,7 +1,9 @@
 from .anyconnection import AnyConnection
 from .connection import Connection
+from .pool import ConnectionPool, PoolSettings, get_connection_pool
 from .shellconnection import ShellConnection
 from .snowflakeconnection import SnowflakeConnection
 from .sqlconnection import SqlConnection
 
-__all__ = ['AnyConnection', 'ShellConnection', 'SnowflakeConnection', 'SqlConnection', 'Connection']
\ No newline at end of file
+__all__ = ['AnyConnection', 'ShellConnection', 'SnowflakeConnection', 'SqlConnection', 'Connection',
+           'ConnectionPool', 'PoolSettings', 'get_connection_pool']
\ No newline at end of file
@@ -1,19 +1,146 @@
 from pydantic import BaseModel, PrivateAttr
 from typing import Literal, ClassVar, Dict, Type
 from abc import ABC, abstractmethod
-from models import ResponseModel
+from models import ResponseModel, render_response
+from tracing import tracer
 from inspect import iscoroutinefunction, unwrap
 import logging
 import json
+import re
 from concurrent.futures import Future
 
 logger = logging.getLogger(f"app.{__name__}")
 
+# Watermark columns are interpolated into SQL, so only plain identifiers are allowed
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_$]*$")
+
+# Comments, string literals and quoted identifiers, skipped when reading a script's shape
+_SQL_TOKENS = re.compile(r"--[^\n]*|/\*.*?\*/|'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|\[(?:[^\]]|\]\])*\]", re.DOTALL)
+_NAME = r"[A-Za-z_@#][\w@#$]*"
+# Select list items and the output column name they produce
+_ALIASED = re.compile(rf"^.+?\s(?:AS\s+)?({_NAME})$", re.IGNORECASE | re.DOTALL)
+_ASSIGNED = re.compile(rf"^({_NAME})\s*=(?!=)", re.IGNORECASE)
+_COLUMN = re.compile(rf"^(?:{_NAME}\.)*({_NAME})$")
+# Words that end an expression rather than alias it
+_NOT_ALIASES = {"end", "null", "distinct", "all"}
+
+
+def _top_level_sql(script: str) -> str:
+    """
+    The script with comments removed, string literals emptied, quoted
+    identifiers turned into plain names (q<n>_ unless already plain) and
+    everything inside parentheses dropped, leaving the top-level shape.
+    """
+    quoted: dict[str, str] = {}
+
+    def plain(match):
+        token = match.group(0)
+        if token.startswith(("--", "/*")):
+            return " "
+        if token.startswith("'"):
+            return "''"
+        name = token[1:-1].lower()
+        if _IDENTIFIER.match(name):
+            return name
+        return quoted.setdefault(name, f"q{len(quoted)}_")
+
+    text = _SQL_TOKENS.sub(plain, script)
+    top, depth = [], 0
+    for char in text:
+        if char == "(":
+            depth += 1
+            if depth == 1:
+                top.append("(")
+        elif char == ")":
+            depth = max(depth - 1, 0)
+            if depth == 0:
+                top.append(")")
+        elif depth == 0:
+            top.append(char)
+    return "".join(top).strip().rstrip(";").strip()
+
+
+def _select_list(top: str) -> list[str]:
+    """Items of the first select list of a top-level script (see _top_level_sql)."""
+    match = re.search(
+        r"\bSELECT\s+(?:(?:DISTINCT|ALL)\s+)?(?:TOP\s*(?:\(\)|\d+)(?:\s+PERCENT)?(?:\s+WITH\s+TIES)?\s+)?"
+        r"(.*?)(?:\bINTO\b|\bFROM\b|\bWHERE\b|\bGROUP\b|\bORDER\b|\bUNION\b|$)",
+        top, re.IGNORECASE | re.DOTALL,
+    )
+    if not match:
+        return []
+    return [item.strip() for item in match.group(1).split(",") if item.strip()]
+
+
+def _column_name(item: str) -> str | None:
+    """Output column name of a select list item; "*" for star items, None when unnamed."""
+    if item == "*" or item.endswith(".*"):
+        return "*"
+    for pattern in (_ASSIGNED, _COLUMN, _ALIASED):
+        match = pattern.match(item)
+        if match and match.group(1).lower() not in _NOT_ALIASES:
+            return match.group(1).lower()
+    return None
+
+
+class HighWaterMark:
+    """
+    Tracks the watermark column over every row a connector streams, inline
+    and spilled alike. Once rows were cut off (row caps), rows sharing the
+    top value may be missing, so the mark stops strictly below the top and
+    those rows are read again next run (at-least-once rather than lost).
+    When every row ties, no mark is produced.
+    """
+
+    def __init__(self, column: str):
+        self.column = column
+        self.top = None
+        # Largest value strictly below top
+        self.below_top = None
+        self.truncated = False
+
+
+    def observe(self, columns: list, rows):
+        names = [str(col).lower() for col in columns or []]
+        if self.column.lower() not in names:
+            return
+
+        index = names.index(self.column.lower())
+        name = columns[index]
+        for row in rows:
+            value = row[name] if isinstance(row, dict) else row[index]
+            if value is None:
+                continue
+            if self.top is None or value > self.top:
+                if self.top is not None:
+                    self.below_top = self.top
+                self.top = value
+            elif value < self.top and (self.below_top is None or value > self.below_top):
+                self.below_top = value
+
+
+    def value(self):
+        return self.below_top if self.truncated else self.top
+
 
 class Connection(BaseModel, ABC):
-    connection_type: Literal["sql_server", "snowflake", "lambda"]
+    connection_type: Literal["sql_server", "snowflake", "lambda", "shell"]
     connection_config: object
+    # Per-job query timeout in seconds; overrides the connection config default
+    query_timeout: int | None = None
     _registry: ClassVar[Dict[str, Type['Connection']]] = {}
+    # Placeholder for bound query parameters in this driver's paramstyle
+    PARAM_MARKER: ClassVar[str] = "?"
+    # Whether result rows are serialized as {column: value} records instead of lists.
+    # _execute returns plain tuples either way; the conversion is part of the
+    # CPU-bound serialize stage so it can run off the I/O thread.
+    ROWS_AS_RECORDS: ClassVar[bool] = False
+    # Status of the most recent execute() call ("pass" / "fail")
+    _last_status: str | None = PrivateAttr(default=None)
+    # High-water mark seen by the most recent incremental execute
+    _last_watermark: object = PrivateAttr(default=None)
+    # Watermark tracker of the incremental execute in progress
+    _watermark: HighWaterMark | None = PrivateAttr(default=None)
 
 
     def __init_subclass__(cls, **kwargs):
@@ -34,7 +161,8 @@ class Connection(BaseModel, ABC):
             raise ValueError(f"Unsupported connection_type: {connection_type}")
 
         # get the subclass and let it build itself
-        return cls._registry[connection_type]._from_payload(job_payload)
+        with tracer.start_span("connection.create", {"db.system": connection_type}):
+            return cls._registry[connection_type]._from_payload(job_payload)
     
 
     @classmethod
@@ -48,65 +176,217 @@ class Connection(BaseModel, ABC):
         raise NotImplementedError
 
 
-    def execute(self, script: str) -> str:
+    def resolve_query_timeout(self) -> int | None:
         """
-        Wrapper method:
-        - Calls internal _execute()
-        - Serializes ResponseModel using model_dump()
-        - Handles unexpected exceptions
-        - Returns JSON string
+        Effective query timeout for this connection:
+        the per-job value if set, else the connection config default.
         """
-        try:
-            response: ResponseModel = self._execute(script)
+        if self.query_timeout:
+            return self.query_timeout
+        return getattr(self.connection_config, "query_timeout", None) or None
 
-            # Serialize ResponseModel to JSON
-            return response.model_dump_json()
 
-        except Exception as e:
-            logger.exception(
-                f"Unhandled exception in {self.__class__.__name__}.execute: {str(e)}"
-            )
+    def target_key(self) -> str:
+        """
+        Identifies the backend this connection dials out to
+        (warehouse, instance, function). Used to key shared limits.
+        """
+        return self.connection_type
 
-            fallback_response = ResponseModel(
-                status="fail",
-                error_text=str(e)
-            )
 
-            return fallback_response.model_dump_json()
-        
+    @property
+    def last_status(self) -> str | None:
+        return self._last_status
+
+
+    @last_status.setter
+    def last_status(self, status: str | None):
+        # Set by serialize stages running outside the connection (e.g. executor.ProcessOffloader)
+        self._last_status = status
+
 
+    @property
+    def last_watermark(self):
+        return self._last_watermark
 
-    def execute(self, script: str) -> str:
+
+    @staticmethod
+    def _count_rows(data) -> int:
+        """Counts rows across the result sets of a ResponseModel payload."""
+        if not isinstance(data, list):
+            return 0
+        return sum(
+            len(result_set.get("rows") or [])
+            for result_set in data
+            if isinstance(result_set, dict)
+        )
+
+
+    def check_incremental(self, script: str, watermark_column: str):
         """
-        Wrapper method:
+        Raises ValueError when script can't run as an incremental extract on
+        this connection (see incremental_script), so the job is rejected when
+        it's built rather than failing on the server. The script must be one
+        SELECT statement whose output columns all have distinct names.
+        Connectors add their own dialect's restrictions.
+        """
+        if not _IDENTIFIER.match(watermark_column):
+            raise ValueError(f"Invalid watermark column: {watermark_column!r}")
+
+        top = _top_level_sql(script)
+        if ";" in top:
+            raise ValueError("Incremental scripts must be a single statement")
+        if not re.match(r"^(?:SELECT|WITH)\b", top, re.IGNORECASE):
+            raise ValueError("Incremental scripts must be a SELECT query")
+        if re.search(r"\bINTO\b", top, re.IGNORECASE):
+            raise ValueError("Incremental scripts can't use SELECT ... INTO")
+
+        names = [name for name in map(_column_name, _select_list(top)) if name not in (None, "*")]
+        duplicates = sorted({name for name in names if names.count(name) > 1})
+        if duplicates:
+            raise ValueError(f"Incremental scripts need distinct column names, duplicated: {', '.join(duplicates)}")
+
+
+    def incremental_script(self, script: str, watermark_column: str, last_watermark) -> tuple[str, tuple | None]:
+        """
+        Wraps a single SELECT so it only returns rows above the last
+        high-water mark, ordered by the watermark column:
+        SELECT * FROM (<script>) AS src WHERE src.<column> > ? ORDER BY src.<column>
+        Returns the rewritten SQL and its bound parameters.
+        """
+        if not _IDENTIFIER.match(watermark_column):
+            raise ValueError(f"Invalid watermark column: {watermark_column!r}")
+
+        body = script.strip().rstrip(";")
+        if last_watermark is None:
+            return f"SELECT * FROM ({body}) AS src ORDER BY src.{watermark_column}", None
+
+        return (
+            f"SELECT * FROM ({body}) AS src "
+            f"WHERE src.{watermark_column} > {self.PARAM_MARKER} "
+            f"ORDER BY src.{watermark_column}",
+            (last_watermark,),
+        )
+
+
+    def _watermark_column(self, columns: list) -> str | None:
+        """The result set's own name for the watermark column being tracked, if any."""
+        if self._watermark is None:
+            return None
+        return next((col for col in columns or [] if str(col).lower() == self._watermark.column.lower()), None)
+
+
+    def _track_rows(self, columns: list, rows):
+        """
+        Connectors call this for rows they stream past the inline ones
+        (e.g. into a result spill), or with the maximum of rows left for
+        paging, so the high-water mark covers them.
+        """
+        if self._watermark is not None:
+            self._watermark.observe(columns, rows)
+
+
+    def _track_truncated(self):
+        """Connectors call this when rows of a result set were never read (row caps)."""
+        if self._watermark is not None:
+            self._watermark.truncated = True
+
+
+    def _high_water_mark(self, data):
+        """High-water mark over the inline rows plus anything tracked while streaming."""
+        if isinstance(data, list):
+            for result_set in data:
+                if isinstance(result_set, dict):
+                    self._watermark.observe(result_set.get("columns"), result_set.get("rows") or [])
+        return self._watermark.value()
+
+
+    def fetch(self, script: str, params: tuple | None = None, watermark_column: str | None = None) -> ResponseModel:
+        """
+        I/O stage:
         - Calls internal _execute()
-        - Serializes ResponseModel using model_dump()
-        - Handles unexpected exceptions
-        - Returns JSON string
+        - Records the high-water mark when watermark_column is given
+        - Turns unexpected exceptions into a "fail" ResponseModel
         """
-        try:
-            response: ResponseModel = self._execute(script)
+        self._last_watermark = None
+        self._watermark = HighWaterMark(watermark_column) if watermark_column else None
+        with tracer.start_span("connection.execute", {
+            "db.system": self.connection_type, "db.target": self.target_key(),
+        }, kind="client") as span:
+            try:
+                response: ResponseModel = self._execute(script, params)
+
+                if self._watermark is not None and response.status == "pass":
+                    self._last_watermark = self._high_water_mark(response.data)
+
+            except Exception as e:
+                logger.exception(
+                    "Unhandled exception in %s.execute: %s", self.__class__.__name__, e
+                )
+                span.record_exception(e)
 
-            # Serialize ResponseModel to JSON
-            return response.model_dump_json()
+                response = ResponseModel(
+                    status="fail",
+                    error_text=str(e)
+                )
+
+            if span.recording:
+                span.set_attribute("db.rows", self._count_rows(response.data))
+            if response.status == "fail":
+                span.set_status("error", response.error_text or "")
+
+        self._watermark = None
+        self._last_status = response.status
+        return response
+
+
+    def serialize(self, response: ResponseModel) -> str:
+        """
+        CPU stage: shapes rows and serializes the ResponseModel to JSON.
+        """
+        try:
+            return render_response(response, self.ROWS_AS_RECORDS)
 
         except Exception as e:
             logger.exception(
-                f"Unhandled exception in {self.__class__.__name__}.execute: {str(e)}"
+                "Unhandled exception in %s.serialize: %s", self.__class__.__name__, e
             )
+            self._last_status = "fail"
+            return ResponseModel(status="fail", error_text=str(e)).model_dump_json()
 
-            fallback_response = ResponseModel(
-                status="fail",
-                error_text=str(e)
-            )
 
-            return fallback_response.model_dump_json()
+    def execute(self, script: str, params: tuple | None = None, watermark_column: str | None = None) -> str:
+        """
+        Wrapper method:
+        - fetch() the result
+        - serialize() it
+        - Returns JSON string
+        """
+        return self.serialize(self.fetch(script, params, watermark_column))
+
+
+    def fetch_incremental(self, script: str, watermark_column: str, last_watermark) -> ResponseModel:
+        """
+        Runs script as an incremental extract from last_watermark.
+        The new high-water mark is available as last_watermark afterwards.
+        """
+        sql, params = self.incremental_script(script, watermark_column, last_watermark)
+        return self.fetch(sql, params, watermark_column=watermark_column)
         
 
+    def warm_up(self, count: int) -> int:
+        """
+        Opens up to count pooled driver connections ahead of the first job.
+        Returns how many were opened; connectors without a pool open none.
+        """
+        return 0
+
+
     @abstractmethod
-    def _execute(self, script: str) -> ResponseModel:
+    def _execute(self, script: str, params: tuple | None = None) -> ResponseModel:
         """
         Subclasses must implement execution logic.
+        params are bound to the driver's PARAM_MARKER placeholders.
         """
         pass
     
@@ -1,6 +1,7 @@
 from typing import Literal
 from .connection import Connection
 from models import ResponseModel
+from tracing import get_current_span
 from utils import *
 from connection_config import *
 from dataclasses import asdict
@@ -27,6 +28,10 @@ class LambdaConnection(Connection):
         )
 
 
+    def target_key(self) -> str:
+        return f"lambda:{self.connection_config.function_name}"
+
+
     def test_connection(self):
         """
         Tests Lambda connectivity by invoking the function
@@ -51,15 +56,15 @@ class LambdaConnection(Connection):
 
             payload = json.loads(response["Payload"].read())
 
-            logger.info(f"Lambda test response: {payload}")
+            logger.info("Lambda test response: %s", payload)
             logger.info("Lambda connection test successful")
 
         except Exception as e:
-            logger.error(f"Error during lambda connection test - {e}")
+            logger.error("Error during lambda connection test - %s", e)
             raise e
 
 
-    def _execute(self, payload: dict) -> ResponseModel:
+    def _execute(self, payload: dict, params: tuple | None = None) -> ResponseModel:
         """
         Internal execution logic for Lambda invocation.
         Returns a ResponseModel (not serialized).
@@ -80,9 +85,13 @@ class LambdaConnection(Connection):
                 Payload=json.dumps(payload)
             )
 
-            response_payload = json.loads(
-                response["Payload"].read()
-            )
+            raw_payload = response["Payload"].read()
+            response_payload = json.loads(raw_payload)
+
+            get_current_span().set_attributes({
+                "faas.invocation_id": response.get("ResponseMetadata", {}).get("RequestId"),
+                "result.bytes": len(raw_payload),
+            })
 
             logger.info("Lambda executed successfully")
 
@@ -102,5 +111,5 @@ class LambdaConnection(Connection):
         Callback method intended for async execution.
         Retrieves and returns the result from a Future object.
         """
-        logger.info(f"Inside callback for {self.__class__.__name__}")
+        logger.debug("Inside callback for %s", self.__class__.__name__)
         return future.result()
\ No newline at end of file
@@ -0,0 +1,172 @@
+from contextlib import contextmanager
+from pydantic import BaseModel
+from typing import Callable
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(f"app.{__name__}")
+
+
+class PoolSettings(BaseModel):
+    # Idle driver connections kept per key; 0 disables pooling
+    # (every job opens and closes its own connection, as before)
+    size: int = 0
+    # Idle connections older than this are closed instead of reused
+    max_idle_seconds: float = 300.0
+    # Idle connections older than this are pinged before reuse
+    validate_after_seconds: float = 30.0
+
+    @classmethod
+    def from_env(cls):
+        values = {
+            "size": os.getenv("CONNECTION_POOL_SIZE"),
+            "max_idle_seconds": os.getenv("CONNECTION_POOL_MAX_IDLE_SECONDS"),
+            "validate_after_seconds": os.getenv("CONNECTION_POOL_VALIDATE_AFTER_SECONDS"),
+        }
+        return cls(**{k: v for k, v in values.items() if v is not None})
+
+
+def _close_quietly(conn):
+    try:
+        conn.close()
+    except Exception:
+        logger.debug("Failed to close pooled connection", exc_info=True)
+
+
+class ConnectionPool:
+    """
+    Per-process pool of idle driver connections (pyodbc connections,
+    Snowflake sessions), keyed by everything that makes two connections
+    interchangeable: target, credentials and session parameters.
+
+    A connection is handed to one job at a time. It goes back to the pool
+    only if the job's block exits cleanly and `reset` succeeds; any error
+    discards it, so a cancelled or broken session is never reused.
+    """
+
+    def __init__(self, settings: PoolSettings | None = None):
+        self.settings = settings or PoolSettings.from_env()
+        self._lock = threading.Lock()
+        # key -> [(connection, returned_at)], most recently returned last
+        self._idle: dict[str, list] = {}
+
+
+    @property
+    def enabled(self) -> bool:
+        return self.settings.size > 0
+
+
+    def _take_idle(self, key: str, validate: Callable | None):
+        now = time.monotonic()
+        while True:
+            with self._lock:
+                idle = self._idle.get(key)
+                if not idle:
+                    return None
+                conn, returned_at = idle.pop()
+
+            age = now - returned_at
+            if age > self.settings.max_idle_seconds:
+                _close_quietly(conn)
+                continue
+
+            if validate is not None and age > self.settings.validate_after_seconds:
+                try:
+                    validate(conn)
+                except Exception as e:
+                    logger.info("Discarding stale pooled connection for %s: %s", key, e)
+                    _close_quietly(conn)
+                    continue
+
+            return conn
+
+
+    def _give_back(self, key: str, conn):
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.settings.size:
+                idle.append((conn, time.monotonic()))
+                return
+        _close_quietly(conn)
+
+
+    @contextmanager
+    def connection(self, key: str, factory: Callable, reset: Callable | None = None,
+                   validate: Callable | None = None):
+        """
+        Yields a pooled connection for key, or a new one from factory().
+        reset(conn) runs before the connection goes back (e.g. rollback);
+        validate(conn) pings connections that sat idle for a while.
+        """
+        conn = self._take_idle(key, validate) if self.enabled else None
+        if conn is None:
+            conn = factory()
+
+        try:
+            yield conn
+        except BaseException:
+            _close_quietly(conn)
+            raise
+
+        if not self.enabled:
+            _close_quietly(conn)
+            return
+
+        try:
+            if reset is not None:
+                reset(conn)
+        except Exception as e:
+            logger.info("Not returning connection for %s to the pool: %s", key, e)
+            _close_quietly(conn)
+            return
+
+        self._give_back(key, conn)
+
+
+    def prewarm(self, key: str, factory: Callable, count: int) -> int:
+        """Opens connections until key has `count` idle ones. Returns how many were opened."""
+        count = min(count, self.settings.size)
+        with self._lock:
+            missing = count - len(self._idle.get(key, []))
+
+        opened = 0
+        for _ in range(max(missing, 0)):
+            self._give_back(key, factory())
+            opened += 1
+        return opened
+
+
+    def idle_count(self, key: str | None = None) -> int:
+        with self._lock:
+            if key is not None:
+                return len(self._idle.get(key, []))
+            return sum(len(idle) for idle in self._idle.values())
+
+
+    def close_all(self):
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for entries in idle.values():
+            for conn, _ in entries:
+                _close_quietly(conn)
+
+
+_pool: ConnectionPool | None = None
+_pool_pid: int | None = None
+_pool_lock = threading.Lock()
+
+
+def get_connection_pool() -> ConnectionPool:
+    """
+    Process-wide pool, created lazily. A forked child starts with an empty
+    pool: the parent's sockets are left alone rather than closed or shared.
+    """
+    global _pool, _pool_pid
+
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = ConnectionPool()
+            _pool_pid = os.getpid()
+        return _pool
@@ -1,8 +1,16 @@
+from pydantic import Field
 from typing import Literal
 from .connection import Connection
+from .subprocesspool import get_subprocess_pool
 from models import ResponseModel
+from tracing import get_current_span
 from utils import *
+from connection_config import *
 import logging
+import os
+import shutil
+import socket
+import threading
 from concurrent.futures import Future
 
 logger = logging.getLogger(f"app.{__name__}")
@@ -10,17 +18,115 @@ logger = logging.getLogger(f"app.{__name__}")
 
 class ShellConnection(Connection):
     connection_type: Literal["shell"] = "shell"
-    server_name: str
+    server_name: str = Field(default_factory=socket.gethostname)
+
+
+    @classmethod
+    def _from_payload(cls, job_payload):
+        cfg = ShellConfig.from_env()
+
+        return ShellConnection(
+            connection_config = cfg,
+            query_timeout = job_payload.get("query_timeout")
+        )
+
+
+    def target_key(self) -> str:
+        return f"shell:{self.server_name}"
+
+
+    def check_incremental(self, script: str, watermark_column: str):
+        raise ValueError("Shell jobs can't run as incremental extracts")
+
+
+    def test_connection(self):
+        """
+        Checks the configured shell exists and is executable.
+        """
+        cfg: ShellConfig = self.connection_config
+        shell = shutil.which(cfg.shell)
+        if not shell or not os.access(shell, os.X_OK):
+            raise RuntimeError(f"Shell connection test failed: {cfg.shell} is not executable")
+
+        if cfg.working_dir and not os.path.isdir(cfg.working_dir):
+            raise RuntimeError(f"Shell connection test failed: {cfg.working_dir} is not a directory")
+
+
+    def _execute(self, script: str, params: tuple | None = None) -> ResponseModel:
+        """
+        Runs the script through the configured shell on the bounded subprocess pool.
+        Exit code 0 maps to "pass", anything else (including timeouts) to "fail".
+        """
+        if params:
+            raise ValueError("Shell scripts don't take bound parameters")
+
+        cfg: ShellConfig = self.connection_config
+        logger.info("Executing shell script on %s", self.server_name)
+
+        pool = get_subprocess_pool(cfg.max_concurrency)
+
+        # The pool hands back a cancel callable once the process is spawned;
+        # register it so revoke / time limits kill the process group. A cancel
+        # that arrives before then sets the flag and the pool never spawns it.
+        cancel_handle = {}
+        cancel_requested = threading.Event()
+
+        def cancel():
+            cancel_requested.set()
+            if "cancel" in cancel_handle:
+                cancel_handle["cancel"]()
+
+        with active_queries.track(cancel):
+            result = pool.run(
+                [cfg.shell, "-c", script],
+                timeout=self.resolve_query_timeout(),
+                max_output_bytes=cfg.max_output_bytes,
+                chunk_size=cfg.chunk_size,
+                kill_grace_seconds=cfg.kill_grace_seconds,
+                cwd=cfg.working_dir,
+                on_start=lambda c: cancel_handle.__setitem__("cancel", c),
+                cancelled=cancel_requested,
+            )
+
+        data = result.model_dump()
+        get_current_span().set_attributes({
+            "process.exit_code": result.exit_code,
+            "process.stdout_bytes": len(result.stdout),
+            "process.timed_out": result.timed_out,
+        })
+
+        if result.timed_out:
+            return ResponseModel(
+                status="fail",
+                error_text=f"Shell script timed out after {self.resolve_query_timeout()}s",
+                data=data
+            )
+
+        if result.cancelled:
+            return ResponseModel(status="fail", error_text="Shell script was cancelled", data=data)
+
+        if result.exit_code != 0:
+            # Negative exit codes mean the process was killed by that signal
+            return ResponseModel(
+                status="fail",
+                error_text=f"Shell script exited with code {result.exit_code}: {result.stderr[-1000:]}",
+                data=data
+            )
+
+        logger.info("Shell script executed successfully")
+
+        return ResponseModel(
+            status="pass",
+            success_text="Shell script executed successfully",
+            error_text="",
+            data=data
+        )
+
 
-    def execute(self, script: str) -> ResponseModel:
-        logger.info(f"Executing shell script on {self.server_name}: {script}")
-        return ResponseModel(status="pass", success_text="Hello Shell Is Done", error_text="")
-    
     def callback(self, future: Future) -> ResponseModel:
-        logger.info(f"Inside callback for {self.__class__.__name__}")
+        logger.debug("Inside callback for %s", self.__class__.__name__)
         try:
             res = future.result()
             return res
         except Exception as exc:
-            logger.error(f"Exception raised in callback {self.__class__.__name__}")
-            
+            logger.error("Exception raised in callback %s", self.__class__.__name__)
@@ -1,17 +1,37 @@
-from typing import Literal
-from .connection import Connection
+from typing import Literal, ClassVar
+from .connection import Connection, _IDENTIFIER
+from .pool import get_connection_pool
 from models import ResponseModel
 from utils import *
 from connection_config import *
+from results import ResultHandle
+from tracing import get_current_span
 from snowflake import connector
 from dataclasses import asdict
 import logging
 from concurrent.futures import Future
+import hashlib
 import json
+import re
 
 # Create a module-level logger using the app namespace
 logger = logging.getLogger(f"app.{__name__}")
 
+# Session state a script can leave behind that _reset can't compare:
+# session variables, temporary tables / stages, USE of another role,
+# warehouse, database or schema (and secondary roles), ALTER SESSION.
+# Scripts mentioning any of these never hand their session back.
+# SET / UNSET / USE only count at the start of a statement (not UPDATE ... SET).
+_SESSION_CHANGES = re.compile(
+    r"\bALTER\s+SESSION\b|\b(?:TEMP|TEMPORARY|VOLATILE)\b|(?:\A|;)\s*(?:SET|UNSET|USE)\b",
+    re.IGNORECASE,
+)
+_COMMENTS = re.compile(r"(?:--|//)[^\n]*|/\*.*?\*/", re.DOTALL)
+
+
+# Pool key -> session parameters of a fresh session
+_session_defaults: dict[str, tuple] = {}
+
 
 class SnowflakeConnection(Connection):
     # Define the connection type as a literal for validation/type safety
@@ -20,82 +40,258 @@ class SnowflakeConnection(Connection):
     # Maximum number of rows to fetch per result set (None means no limit)
     MAX_ROW_SIZE: int | None = 100
 
+    # Client-side binding uses pyformat placeholders
+    PARAM_MARKER: ClassVar[str] = "%s"
+
 
     @classmethod
     def _from_payload(cls, job_payload):
         cfg = SnowflakeConfig.from_env()
 
         return SnowflakeConnection(
-            connection_config = cfg
+            connection_config = cfg,
+            query_timeout = job_payload.get("query_timeout")
         )
 
 
+    def target_key(self) -> str:
+        cfg: SnowflakeConfig = self.connection_config
+        return f"snowflake:{cfg.account}:{cfg.warehouse}"
+
+
     def test_connection(self):
         """
         Tests the Snowflake connection by:
-        1. Creating a connection
+        1. Taking a pooled session, or creating a connection
         2. Executing a simple test query (SELECT 1)
         3. Logging the results
-        4. Closing the connection
+        4. Returning the session to the pool (or closing it)
         """
-        conn = None
         try:
             logger.info("Starting Snowflake connection test")
-            
-            # Create a Snowflake connection using configuration
-            conn = connector.connect(**self.connection_config.model_dump())
-            logger.info("Snowflake connection created")
 
-            # Execute a simple validation query
-            results = conn.execute_string('SELECT 1 as T')
+            with self.pooled_connection() as conn:
+                # Execute a simple validation query
+                results = conn.execute_string('SELECT 1 as T')
 
-            # Iterate through result cursors and log output
-            for res in results:
-                logger.info(res)
+                # Iterate through result cursors and log output
+                for res in results:
+                    logger.debug("%s", res)
 
             logger.info("Snowflake connection test successful")
 
         except Exception as e:
             # Log and re-raise any exception encountered
-            logger.error(f'Error during snowflake connection test - {e}')
+            logger.error('Error during snowflake connection test - %s', e)
             raise e
+
+
+    def _connect(self):
+        conn = connector.connect(
+            **self.connection_config.model_dump(),
+            session_parameters=self._session_parameters()
+        )
+        logger.info("Snowflake connection created")
+
+        # Every fresh session for a pool key starts with the same parameters;
+        # remember them so _reset can tell whether a job changed them.
+        # Without them the session still runs its job, it just isn't pooled.
+        key = self._pool_key()
+        if get_connection_pool().enabled and key not in _session_defaults:
+            try:
+                _session_defaults[key] = self._session_fingerprint(conn)
+            except Exception as e:
+                logger.warning("Can't read session parameters for %s, not pooling its sessions: %s", key, e)
+        return conn
+
+
+    def _pool_key(self) -> str:
+        # Sessions are interchangeable only with the same login and session parameters
+        identity = json.dumps(
+            [self.connection_config.model_dump(), self._session_parameters()], sort_keys=True, default=str
+        )
+        return f"{self.target_key()}:{hashlib.sha256(identity.encode('utf-8')).hexdigest()[:16]}"
+
+
+    @staticmethod
+    def _ping(conn):
+        conn.cursor().execute("SELECT 1").fetchall()
+
+
+    @staticmethod
+    def _session_fingerprint(conn) -> tuple:
+        """Every session parameter and its value (STATEMENT_TIMEOUT_IN_SECONDS, TIMEZONE, ...)."""
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SHOW PARAMETERS IN SESSION")
+            return tuple(sorted((row[0], row[1]) for row in cursor.fetchall()))
         finally:
-            # Ensure connection is closed even if an error occurs
-            if conn:
-                try:
-                    conn.close()
-                    logger.info("Snowflake connection closed")
-                except Exception:
-                    logger.warning("Failed to close Snowflake connection")
+            cursor.close()
+
+
+    def _reset(self, conn, script: str | None = None):
+        """
+        Runs before a session goes back to the pool. Open transactions are
+        rolled back. A session is discarded rather than handed to the next
+        job when its script may have left state behind (_SESSION_CHANGES),
+        its role / warehouse / database / schema was switched, or its
+        session parameters no longer match a fresh session's.
+        Unquoted names are compared upper-case.
+        """
+        if script and _SESSION_CHANGES.search(_COMMENTS.sub(" ", script)):
+            raise RuntimeError("script may have changed session state")
 
+        conn.rollback()
+        cfg: SnowflakeConfig = self.connection_config
+        expected = {"role": cfg.role, "warehouse": cfg.warehouse,
+                    "database": cfg.database, "schema": cfg.schema_name}
+        for attr, value in expected.items():
+            current = getattr(conn, attr, None)
+            if value and (current or "").upper() != value.upper():
+                raise RuntimeError(f"script switched {attr} to {current}")
 
-    def _execute(self, script: str) -> ResponseModel:
+        defaults = _session_defaults.get(self._pool_key())
+        if defaults is None:
+            raise RuntimeError("no session parameters of a fresh session to compare with")
+        changed = dict(set(self._session_fingerprint(conn)) - set(defaults))
+        if changed:
+            raise RuntimeError(f"session parameters changed: {changed!r}")
+
+
+    def pooled_connection(self, script: str | None = None):
+        """
+        Session from the process-wide pool (see connection.pool).
+        script is what the job will run on it, checked before reuse.
+        """
+        return get_connection_pool().connection(
+            self._pool_key(), self._connect, reset=lambda conn: self._reset(conn, script), validate=self._ping
+        )
+
+
+    def warm_up(self, count: int) -> int:
+        """Opens up to count pooled sessions ahead of the first job."""
+        return get_connection_pool().prewarm(self._pool_key(), self._connect, count)
+
+
+    def resume_warehouse(self):
+        """
+        ALTER WAREHOUSE ... RESUME IF SUSPENDED, so the first job doesn't wait
+        for the warehouse to spin up. Quoted / unusual names are skipped.
+        """
+        warehouse = self.connection_config.warehouse
+        if not warehouse or not _IDENTIFIER.match(warehouse):
+            logger.warning("Not resuming warehouse %r: not a plain identifier", warehouse)
+            return
+
+        with self.pooled_connection() as conn:
+            conn.cursor().execute(f"ALTER WAREHOUSE {warehouse} RESUME IF SUSPENDED")
+        logger.info("Warehouse %s resumed", warehouse)
+
+
+    def _session_parameters(self) -> dict:
+        """
+        Session parameters applied on connect.
+        Detached queries are aborted so a killed worker doesn't leave work running.
+        """
+        params = {"ABORT_DETACHED_QUERY": True}
+
+        query_timeout = self.resolve_query_timeout()
+        if query_timeout:
+            params["STATEMENT_TIMEOUT_IN_SECONDS"] = query_timeout
+
+        return params
+
+
+    @staticmethod
+    def _cancel_session(conn):
+        """
+        Cancels every running query of the session on the server.
+        Called from a different thread than the one blocked in execute_string().
+        """
+        logger.info("Cancelling Snowflake queries for session %s", conn.session_id)
+        conn.cursor().execute(f"SELECT SYSTEM$CANCEL_ALL_QUERIES({int(conn.session_id)})")
+
+
+    def _track_result_scan(self, conn, query_id: str, columns: list):
+        """
+        Feeds the watermark column's maximum over a cached result into the
+        high-water mark, for rows left to be paged rather than read here.
+        One aggregate over the result cache; nothing when no mark is tracked.
+        """
+        column = self._watermark_column(columns)
+        if column is None:
+            return
+
+        quoted = '"' + str(column).replace('"', '""') + '"'
+        cursor = conn.cursor()
+        try:
+            cursor.execute(f"SELECT MAX({quoted}) FROM TABLE(RESULT_SCAN(%s))", (query_id,))
+            self._track_rows([column], [cursor.fetchone()])
+        finally:
+            cursor.close()
+
+
+    def _execute(self, script: str, params: tuple | None = None) -> ResponseModel:
         """
         Internal execution logic for Snowflake SQL script.
         Returns a ResponseModel (not serialized).
         """
         logger.info("Starting Snowflake script")
 
-        conn = None
         try:
-            # Create connection
-            conn = connector.connect(**self.connection_config.model_dump())
-            logger.info("Snowflake connection established")
+            # Reuse a pooled session when there is one
+            with self.pooled_connection(script=script) as conn:
+                logger.info("Snowflake connection established")
+
+                results_payload = []
 
-            results_payload = []
+                # Execute multi-statement script.
+                # The session is registered so revoke / time limits can cancel it server side.
+                with active_queries.track(lambda: self._cancel_session(conn)):
+                    # Bound parameters need a single statement; scripts may hold several
+                    if params:
+                        cursors = [conn.cursor().execute(script, params)]
+                    else:
+                        cursors = conn.execute_string(script)
 
-            # Execute multi-statement script
-            for cur in conn.execute_string(script):
+                    query_ids = []
+                    for cur in cursors:
+                        query_ids.append(cur.sfqid)
 
-                if cur.description:
-                    columns = [col[0] for col in cur.description]
-                    rows = cur.fetchmany(self.MAX_ROW_SIZE)
+                        if cur.description:
+                            columns = [col[0] for col in cur.description]
+                            if self.MAX_ROW_SIZE is None:
+                                rows = cur.fetchall()
+                                cut_off = False
+                            else:
+                                # One row past the cap tells a full result from a cut off one
+                                rows = cur.fetchmany(self.MAX_ROW_SIZE + 1)
+                                cut_off = len(rows) > self.MAX_ROW_SIZE
+                                rows = rows[:self.MAX_ROW_SIZE]
+                            result_set = {
+                                "columns": columns,
+                                "rows": rows
+                            }
 
-                    results_payload.append({
-                        "columns": columns,
-                        "rows": rows
-                    })
+                            # More rows than fit inline: the result stays cached in
+                            # Snowflake and can be paged from its result batches (ResultPager),
+                            # so the high-water mark covers the whole result
+                            if cut_off and cur.rowcount is not None and cur.sfqid:
+                                result_set["result_handle"] = ResultHandle(
+                                    kind="snowflake_query",
+                                    columns=columns,
+                                    total_rows=cur.rowcount,
+                                    query_id=cur.sfqid,
+                                ).model_dump()
+                                self._track_result_scan(conn, cur.sfqid, columns)
+                            elif cut_off:
+                                # Rows past the inline ones can't be reached at all
+                                self._track_truncated()
 
+                            results_payload.append(result_set)
+
+            # Query ids let a slow span be matched to QUERY_HISTORY on the server
+            get_current_span().set_attributes({"db.query_ids": query_ids, "db.session_id": conn.session_id})
             logger.info("Snowflake script executed successfully")
 
             return ResponseModel(
@@ -111,18 +307,13 @@ class SnowflakeConnection(Connection):
             """
             raise e
 
-        finally:
-            if conn:
-                conn.close()
-                logger.info("Snowflake connection closed")
-
     
     def callback(self, future: Future) -> ResponseModel:
         """
         Callback method intended for async execution.
         Retrieves and returns the result from a Future object.
         """
-        logger.info(f"Inside callback for {self.__class__.__name__}")
+        logger.debug("Inside callback for %s", self.__class__.__name__)
         
         # Return the result of the asynchronous execution
         return future.result()
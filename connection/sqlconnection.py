@@ -1,63 +1,221 @@
-from typing import Literal
-from .connection import Connection
+from typing import Literal, ClassVar
+from .connection import Connection, _column_name, _select_list, _top_level_sql
+from .pool import get_connection_pool
 from models import ResponseModel
 from utils import *
 from connection_config import *
+from logconfig import redact
+from results import ResultHandle, open_result_writer, spill_enabled, spill_max_rows
 import pyodbc
+import hashlib
 import logging
+import re
 from concurrent.futures import Future
 
 logger = logging.getLogger(f"app.{__name__}")
 
+# Session state the fingerprint below can't see: temp tables, impersonation,
+# application roles, session context and SET options outside @@OPTIONS.
+# Scripts mentioning any of these never hand their connection back.
+_SESSION_CHANGES = re.compile(
+    r"#|\bEXEC(?:UTE)?\s+AS\b|\bsp_setapprole\b|\bsp_set_session_context\b"
+    r"|\bSET\s+(?:ROWCOUNT|IDENTITY_INSERT|CONTEXT_INFO|STATISTICS|SHOWPLAN_\w+|FMTONLY|NOEXEC|PARSEONLY|OFFSETS)\b",
+    re.IGNORECASE,
+)
+
+# Session settings a script can change and a fresh connection wouldn't have:
+# isolation level, language / date settings, lock and deadlock settings,
+# the SET options in @@OPTIONS, current database and login (EXECUTE AS).
+_SESSION_FINGERPRINT = """
+SELECT s.transaction_isolation_level, s.language, s.date_format, s.date_first, s.lock_timeout,
+       s.deadlock_priority, s.text_size, @@OPTIONS, DB_NAME(), SUSER_SNAME(), CONTEXT_INFO()
+FROM sys.dm_exec_sessions AS s
+WHERE s.session_id = @@SPID
+"""
+
+
+# Pool key -> session fingerprint of a fresh connection
+_session_defaults: dict[str, tuple] = {}
+
 
 class SqlConnection(Connection):
     connection_type: Literal["sql_server"] = "sql_server"
    # Maximum number of rows to fetch per result set (None means no limit)
     MAX_ROW_SIZE: int | None = 100
+    # Rows are serialized as {column: value} records
+    ROWS_AS_RECORDS: ClassVar[bool] = True
 
     @classmethod
     def _from_payload(cls, job_payload):
         cfg = SqlServerConfig.from_env()
 
         return SqlConnection(
-            connection_config = cfg
+            connection_config = cfg,
+            query_timeout = job_payload.get("query_timeout")
         )
 
-    def test_connection(self):
-        try:
-            cfg: SqlServerConfig = self.connection_config
-            if cfg.trusted_connection:
-                conn_str = (
-                    f"DRIVER={{{cfg.driver}}};"
-                    f"SERVER={cfg.server};"
-                    # f"PORT={cfg.port};"
-                    f"DATABASE={cfg.database};"
-                    "Trusted_Connection=yes;"
-                )
-            else:
-                conn_str = (
-                    f"DRIVER={{{cfg.driver}}};"
-                    f"SERVER={cfg.server};"
-                    # f"PORT={cfg.port};"
-                    f"DATABASE={cfg.database};"
-                    f"UID={cfg.user};"
-                    f"PWD={cfg.password};"
-                )
-            logger.info(f"Connection string - {conn_str}")
-            conn = pyodbc.connect(conn_str, timeout=5)
-            cursor = conn.cursor()
-
-            cursor.execute("SELECT 1 AS T")
-            for row in cursor.fetchall():
-                print(row)
+    def target_key(self) -> str:
+        cfg: SqlServerConfig = self.connection_config
+        return f"sql_server:{cfg.server}"
+
+    def check_incremental(self, script: str, watermark_column: str):
+        """
+        T-SQL can't nest a CTE, or an ORDER BY without TOP / OFFSET, in the
+        derived table the script is wrapped in, and every column needs a
+        name. With spilling off, rows past MAX_ROW_SIZE would be dropped and
+        every run would stop there, so incremental jobs need the spill.
+        """
+        super().check_incremental(script, watermark_column)
+
+        top = _top_level_sql(script)
+        if re.match(r"^WITH\b", top, re.IGNORECASE):
+            raise ValueError("Incremental SQL Server scripts can't start with a CTE; use a view or a subquery")
+        if re.search(r"\bORDER\s+BY\b", top, re.IGNORECASE) and not re.search(r"\b(?:TOP|OFFSET)\b", top, re.IGNORECASE):
+            raise ValueError("Incremental SQL Server scripts can't ORDER BY without TOP or OFFSET; "
+                             "rows are ordered by the watermark column")
+        if any(_column_name(item) is None for item in _select_list(top)):
+            raise ValueError("Incremental SQL Server scripts need a name (alias) for every column")
+        if self.MAX_ROW_SIZE is not None and not spill_enabled():
+            raise ValueError("Incremental SQL Server jobs need RESULT_SPILL_ENABLED: rows past "
+                             f"MAX_ROW_SIZE={self.MAX_ROW_SIZE} would be dropped")
+
+    def _connection_string(self) -> str:
+        cfg: SqlServerConfig = self.connection_config
+        if cfg.trusted_connection:
+            return (
+                f"DRIVER={{{cfg.driver}}};"
+                f"SERVER={cfg.server};"
+                # f"PORT={cfg.port};"
+                f"DATABASE={cfg.database};"
+                "Trusted_Connection=yes;"
+            )
+        return (
+            f"DRIVER={{{cfg.driver}}};"
+            f"SERVER={cfg.server};"
+            # f"PORT={cfg.port};"
+            f"DATABASE={cfg.database};"
+            f"UID={cfg.user};"
+            f"PWD={cfg.password};"
+        )
+
+    def _pool_key(self) -> str:
+        # Connections are only interchangeable with identical connection strings;
+        # hashed so credentials never end up in logs
+        digest = hashlib.sha256(self._connection_string().encode("utf-8")).hexdigest()[:16]
+        return f"{self.target_key()}:{digest}"
+
+    def _connect(self, timeout: int = 10):
+        conn_str = self._connection_string()
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Connection string - %s", redact(conn_str))
+        conn = pyodbc.connect(conn_str, timeout=timeout)
+
+        # Every fresh connection for a pool key starts in the same state;
+        # remember it so _reset can tell whether a job changed it.
+        # Without a fingerprint the connection still runs its job, it just
+        # isn't pooled (_reset has nothing to compare against).
+        key = self._pool_key()
+        if get_connection_pool().enabled and key not in _session_defaults:
+            try:
+                _session_defaults[key] = self._session_fingerprint(conn)
+            except Exception as e:
+                logger.warning("Can't read session settings for %s, not pooling its connections: %s", key, e)
+        return conn
 
+    @staticmethod
+    def _ping(conn):
+        cursor = conn.cursor()
+        cursor.execute("SELECT 1 AS T")
+        rows = cursor.fetchall()
+        cursor.close()
+        return rows
+
+    @staticmethod
+    def _session_fingerprint(conn) -> tuple:
+        cursor = conn.cursor()
+        try:
+            cursor.execute(_SESSION_FINGERPRINT)
+            return tuple(cursor.fetchone())
+        finally:
             cursor.close()
-            conn.close()
+            # Don't leave the implicit transaction of the query open
+            conn.rollback()
+
+    def _reset(self, conn, script: str | None = None):
+        """
+        Runs before a connection goes back to the pool. Uncommitted work is
+        rolled back (what closing did). Clients can't call sp_reset_connection,
+        so instead a connection is discarded rather than handed to the next
+        job when its script may have left state behind (_SESSION_CHANGES) or
+        its session settings no longer match a fresh connection's.
+        """
+        if script and _SESSION_CHANGES.search(script):
+            raise RuntimeError("script may have changed session state")
+
+        conn.rollback()
+        expected = _session_defaults.get(self._pool_key())
+        if expected is None:
+            raise RuntimeError("no session fingerprint of a fresh connection to compare with")
+        current = self._session_fingerprint(conn)
+        if current != expected:
+            raise RuntimeError(f"session settings changed: {current!r}")
+
+    def pooled_connection(self, timeout: int = 10, script: str | None = None):
+        """
+        Driver connection from the process-wide pool (see connection.pool).
+        script is what the job will run on it, checked before reuse.
+        """
+        return get_connection_pool().connection(
+            self._pool_key(), lambda: self._connect(timeout),
+            reset=lambda conn: self._reset(conn, script), validate=self._ping,
+        )
+
+    def warm_up(self, count: int) -> int:
+        """Opens up to count pooled connections ahead of the first job."""
+        return get_connection_pool().prewarm(self._pool_key(), self._connect, count)
+
+    def test_connection(self):
+        try:
+            with self.pooled_connection(timeout=5) as conn:
+                for row in self._ping(conn):
+                    logger.debug("%s", row)
 
         except Exception as e:
             raise RuntimeError(f"SQL Server connection test failed: {e}") from e
 
-    def _execute(self, script: str) -> ResponseModel:
+    def _spill_result(self, cursor, columns: list, first_rows: list[tuple]) -> ResultHandle:
+        """
+        Streams the rest of the cursor into the result writer (up to
+        RESULT_SPILL_MAX_ROWS) batch by batch, so only one batch and the
+        writer's bounded buffer are in memory, and returns a handle the
+        result pager can read from. Streamed rows feed the high-water mark.
+        """
+        max_rows = spill_max_rows()
+        writer = open_result_writer(columns, records=self.ROWS_AS_RECORDS)
+        try:
+            self._track_rows(columns, first_rows)
+            writer.write_rows(first_rows)
+            written = len(first_rows)
+
+            while written < max_rows:
+                batch = cursor.fetchmany(min(writer.chunk_rows, max_rows - written))
+                if not batch:
+                    break
+                batch = [tuple(row) for row in batch]
+                self._track_rows(columns, batch)
+                writer.write_rows(batch)
+                written += len(batch)
+            else:
+                logger.warning("Result spill stopped at RESULT_SPILL_MAX_ROWS=%d rows", max_rows)
+                self._track_truncated()
+
+            return writer.close()
+
+        except Exception:
+            writer.abort()
+            raise
+
+    def _execute(self, script: str, params: tuple | None = None) -> ResponseModel:
         """
         Executes a SQL Server script (supports multiple statements).
 
@@ -67,62 +225,65 @@ class SqlConnection(Connection):
         """
         logger.info("Starting SQL Server script execution")
 
-        conn = None
         try:
-            cfg: SqlServerConfig = self.connection_config
-
-            # Build connection string
-            if cfg.trusted_connection:
-                conn_str = (
-                    f"DRIVER={{{cfg.driver}}};"
-                    f"SERVER={cfg.server};"
-                    f"DATABASE={cfg.database};"
-                    "Trusted_Connection=yes;"
-                )
-            else:
-                conn_str = (
-                    f"DRIVER={{{cfg.driver}}};"
-                    f"SERVER={cfg.server};"
-                    f"DATABASE={cfg.database};"
-                    f"UID={cfg.user};"
-                    f"PWD={cfg.password};"
-                )
-
-            # Connect to SQL Server
-            logger.info(f"Connection string - {conn_str}")
-            conn = pyodbc.connect(conn_str, timeout=10)
-            cursor = conn.cursor()
-            logger.info("SQL Server connection established")
-
-            results_payload = []
-
-            # Execute the script and collect the results
-            cursor.execute(script)
-
-            # Only fetch results if the statement returns rows
-            if cursor.description:
-                columns = [col[0] for col in cursor.description]
-                raw_rows = cursor.fetchmany(self.MAX_ROW_SIZE)
-                # Convert pyodbc.Row -> dict for JSON serialization
-                rows = [
-                    dict(zip(columns, row))
-                    for row in raw_rows
-                ]
-                results_payload.append({
-                    "columns": columns,
-                    "rows": rows
-                })
-                # Case 2: Statement does NOT return rows (INSERT/UPDATE/DDL)
-            else:
-                results_payload.append({
-                    "columns": [],
-                    "rows": [],
-                    "rowcount": cursor.rowcount  # useful metadata
-                })
+            # Connect to SQL Server, reusing a pooled connection when there is one
+            with self.pooled_connection(script=script) as conn:
+                # Per-query timeout enforced by the driver (0 means no timeout);
+                # always set, pooled connections keep the previous job's value
+                conn.timeout = self.resolve_query_timeout() or 0
 
-            logger.info("SQL Server script executed successfully")
+                cursor = conn.cursor()
+                logger.info("SQL Server connection established")
 
-            cursor.close()
+                results_payload = []
+
+                # Execute the script and collect the results.
+                # The cursor is registered so revoke / time limits can cancel it server side.
+                with active_queries.track(cursor.cancel):
+                    if params:
+                        cursor.execute(script, params)
+                    else:
+                        cursor.execute(script)
+
+                # Only fetch results if the statement returns rows
+                if cursor.description:
+                    columns = [col[0] for col in cursor.description]
+                    if self.MAX_ROW_SIZE is None:
+                        raw_rows = cursor.fetchall()
+                    else:
+                        # One row past the cap tells a full result from a cut off one
+                        raw_rows = cursor.fetchmany(self.MAX_ROW_SIZE + 1)
+                    # pyodbc.Row -> tuple; the dict conversion for JSON happens in serialize()
+                    fetched = [tuple(row) for row in raw_rows]
+                    rows = fetched[:self.MAX_ROW_SIZE] if self.MAX_ROW_SIZE is not None else fetched
+                    result_set = {
+                        "columns": columns,
+                        "rows": rows
+                    }
+
+                    # More rows than fit inline: spill the full result so callers can page it
+                    if len(fetched) > len(rows):
+                        if spill_enabled():
+                            with active_queries.track(cursor.cancel):
+                                handle = self._spill_result(cursor, columns, fetched)
+                            result_set["result_handle"] = handle.model_dump()
+                        else:
+                            self._track_truncated()
+
+                    results_payload.append(result_set)
+                    # Case 2: Statement does NOT return rows (INSERT/UPDATE/DDL)
+                else:
+                    results_payload.append({
+                        "columns": [],
+                        "rows": [],
+                        "rowcount": cursor.rowcount  # useful metadata
+                    })
+
+                logger.info("SQL Server script executed successfully")
+
+                cursor.close()
+
+            logger.info("SQL Server connection released")
             return ResponseModel(
                 status="pass",
                 success_text="SQL Server script executed successfully",
@@ -136,18 +297,13 @@ class SqlConnection(Connection):
             """
             raise e
 
-        finally:
-            if conn:
-                conn.close()
-                logger.info("SQL Server connection closed")
-
     
     def callback(self, future: Future) -> ResponseModel:
         """
         Callback method intended for async execution.
         Retrieves and returns the result from a Future object.
         """
-        logger.info(f"Inside callback for {self.__class__.__name__}")
+        logger.debug("Inside callback for %s", self.__class__.__name__)
         
         # Return the result of the asynchronous execution
         return future.result()
\ No newline at end of file
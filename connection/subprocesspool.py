@@ -0,0 +1,183 @@
+from pydantic import BaseModel
+import asyncio
+import logging
+import os
+import signal
+import threading
+
+logger = logging.getLogger(f"app.{__name__}")
+
+
+class ProcessResult(BaseModel):
+    exit_code: int | None
+    stdout: str
+    stderr: str
+    stdout_truncated: bool = False
+    stderr_truncated: bool = False
+    timed_out: bool = False
+    cancelled: bool = False
+
+
+class SubprocessPool:
+    """
+    Runs shell commands as asyncio subprocesses on one background event loop.
+
+    A concurrency limit bounds how many commands run at once, so many shell
+    jobs share one thread instead of each blocking a thread of its own.
+    Output is streamed in chunks and capped per stream; commands run in their
+    own process group so a timeout or cancel kills the whole tree.
+    """
+
+    def __init__(self, max_concurrency: int):
+        self.max_concurrency = max_concurrency
+        self._running = 0
+        self._loop = asyncio.new_event_loop()
+        self._slots = asyncio.Condition()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="subprocess-pool", daemon=True)
+        self._thread.start()
+
+
+    def resize(self, max_concurrency: int):
+        """Changes the concurrency limit; commands already running are left alone."""
+        if max_concurrency == self.max_concurrency:
+            return
+        logger.info("Subprocess pool limit changed from %d to %d", self.max_concurrency, max_concurrency)
+        self.max_concurrency = max_concurrency
+        asyncio.run_coroutine_threadsafe(self._notify_slots(), self._loop)
+
+
+    async def _notify_slots(self):
+        async with self._slots:
+            self._slots.notify_all()
+
+
+    def run(self, command: list[str], timeout: float | None, max_output_bytes: int, chunk_size: int,
+            kill_grace_seconds: float, cwd: str | None = None, on_start=None,
+            cancelled: threading.Event | None = None) -> ProcessResult:
+        """
+        Blocking entry point for worker threads.
+        on_start(cancel) is called with a thread-safe cancel callable once the process is spawned.
+        A `cancelled` event set before then stops the command from being spawned at all.
+        """
+        future = asyncio.run_coroutine_threadsafe(
+            self._run(command, timeout, max_output_bytes, chunk_size, kill_grace_seconds, cwd, on_start, cancelled),
+            self._loop,
+        )
+        return future.result()
+
+
+    async def _run(self, command, timeout, max_output_bytes, chunk_size, kill_grace_seconds, cwd, on_start,
+                   cancel_requested):
+        async with self._slots:
+            await self._slots.wait_for(lambda: self._running < self.max_concurrency)
+            self._running += 1
+        try:
+            return await self._spawn(command, timeout, max_output_bytes, chunk_size, kill_grace_seconds, cwd,
+                                     on_start, cancel_requested)
+        finally:
+            async with self._slots:
+                self._running -= 1
+                self._slots.notify()
+
+
+    async def _spawn(self, command, timeout, max_output_bytes, chunk_size, kill_grace_seconds, cwd, on_start,
+                     cancel_requested):
+        if cancel_requested is not None and cancel_requested.is_set():
+            logger.debug("Subprocess cancelled before it was spawned")
+            return ProcessResult(exit_code=None, stdout="", stderr="", cancelled=True)
+
+        proc = await asyncio.create_subprocess_exec(
+            *command,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            cwd=cwd,
+            start_new_session=True,  # own process group for killpg
+        )
+        logger.debug("Spawned subprocess %s", proc.pid)
+
+        cancel_event = asyncio.Event()
+        if on_start is not None:
+            on_start(lambda: self._loop.call_soon_threadsafe(cancel_event.set))
+        # A cancel that landed between the check above and on_start
+        if cancel_requested is not None and cancel_requested.is_set():
+            cancel_event.set()
+
+        stdout = self._drain(proc.stdout, max_output_bytes, chunk_size)
+        stderr = self._drain(proc.stderr, max_output_bytes, chunk_size)
+        streams = asyncio.gather(stdout, stderr, proc.wait())
+        cancelled = asyncio.ensure_future(cancel_event.wait())
+
+        done, _ = await asyncio.wait({streams, cancelled}, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+        timed_out = not done
+        was_cancelled = cancelled in done and streams not in done
+        cancelled.cancel()
+
+        if streams not in done:
+            await self._kill(proc, kill_grace_seconds)
+
+        (out, out_truncated), (err, err_truncated), _ = await streams
+
+        return ProcessResult(
+            exit_code=proc.returncode,
+            stdout=out.decode("utf-8", errors="replace"),
+            stderr=err.decode("utf-8", errors="replace"),
+            stdout_truncated=out_truncated,
+            stderr_truncated=err_truncated,
+            timed_out=timed_out,
+            cancelled=was_cancelled,
+        )
+
+
+    @staticmethod
+    async def _drain(stream: asyncio.StreamReader, max_output_bytes: int, chunk_size: int) -> tuple[bytes, bool]:
+        """Reads a stream to EOF, keeping at most max_output_bytes."""
+        kept = bytearray()
+        truncated = False
+
+        while chunk := await stream.read(chunk_size):
+            room = max_output_bytes - len(kept)
+            if room > 0:
+                kept += chunk[:room]
+            if len(chunk) > room:
+                truncated = True
+
+        return bytes(kept), truncated
+
+
+    @staticmethod
+    async def _kill(proc, kill_grace_seconds: float):
+        """SIGTERM the process group, then SIGKILL it if it's still alive after the grace period."""
+        for sig in (signal.SIGTERM, signal.SIGKILL):
+            try:
+                os.killpg(proc.pid, sig)
+            except ProcessLookupError:
+                return
+
+            try:
+                await asyncio.wait_for(proc.wait(), timeout=kill_grace_seconds)
+                return
+            except asyncio.TimeoutError:
+                logger.warning("Subprocess %s ignored %s", proc.pid, sig.name)
+
+
+_pool: SubprocessPool | None = None
+_pool_pid: int | None = None
+_pool_lock = threading.Lock()
+
+
+def get_subprocess_pool(max_concurrency: int) -> SubprocessPool:
+    """
+    Process-wide pool, created lazily. Recreated after fork because the
+    event loop thread doesn't survive into the child. A different
+    max_concurrency resizes the existing pool (the latest setting wins).
+    """
+    global _pool, _pool_pid
+
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = SubprocessPool(max_concurrency)
+            _pool_pid = os.getpid()
+        else:
+            _pool.resize(max_concurrency)
+        return _pool
@@ -1,4 +1,5 @@
 from .snowflakeconfig import SnowflakeConfig
 from .sqlserverconfig import SqlServerConfig
+from .shellconfig import ShellConfig
 
-__all__ = ['SnowflakeConfig', 'SqlServerConfig']
\ No newline at end of file
+__all__ = ['SnowflakeConfig', 'SqlServerConfig', 'ShellConfig']
\ No newline at end of file
@@ -0,0 +1,32 @@
+from pydantic import BaseModel
+import logging
+import os
+
+logger = logging.getLogger(f"app.{__name__}")
+
+
+class ShellConfig(BaseModel):
+    shell: str = "/bin/sh"
+    working_dir: str | None = None
+    # Subprocesses allowed to run at once in this process
+    max_concurrency: int = 8
+    # Bytes kept per stream; the rest is drained and discarded
+    max_output_bytes: int = 1024 * 1024
+    # Read size when streaming stdout / stderr
+    chunk_size: int = 64 * 1024
+    # Default command timeout in seconds (None means no timeout)
+    query_timeout: int | None = None
+    # Seconds between SIGTERM and SIGKILL of the process group
+    kill_grace_seconds: float = 5.0
+
+    @classmethod
+    def from_env(cls):
+        values = {
+            "shell": os.getenv("SHELL_EXECUTABLE"),
+            "working_dir": os.getenv("SHELL_WORKING_DIR"),
+            "max_concurrency": os.getenv("SHELL_MAX_CONCURRENCY"),
+            "max_output_bytes": os.getenv("SHELL_MAX_OUTPUT_BYTES"),
+            "query_timeout": os.getenv("SHELL_TIMEOUT"),
+            "kill_grace_seconds": os.getenv("SHELL_KILL_GRACE_SECONDS"),
+        }
+        return cls(**{k: v for k, v in values.items() if v})
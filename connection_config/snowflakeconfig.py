@@ -12,6 +12,8 @@ class SnowflakeConfig(BaseModel):
     database: str | None = None
     schema_name: str | None = Field(None, alias="schema")
     role: str | None = None
+    # Default STATEMENT_TIMEOUT_IN_SECONDS for the session (None means account default)
+    query_timeout: int | None = Field(None, exclude=True)
 
     @classmethod
     def from_env(cls):
@@ -21,5 +23,6 @@ class SnowflakeConfig(BaseModel):
             account=os.getenv("SNOWFLAKE_ACCOUNT"),
             database=os.getenv("SNOWFLAKE_DATABASE"),
             schema_name=os.getenv("SNOWFLAKE_SCHEMA"),
-            warehouse=os.getenv("SNOWFLAKE_WAREHOUSE")
+            warehouse=os.getenv("SNOWFLAKE_WAREHOUSE"),
+            query_timeout=os.getenv("SNOWFLAKE_STATEMENT_TIMEOUT") or None
         )
\ No newline at end of file
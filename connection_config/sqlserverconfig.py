@@ -12,6 +12,8 @@ class SqlServerConfig(BaseModel):
     port: int | None = 1433
     driver: str | None = "ODBC Driver 17 for SQL Server"
     trusted_connection: bool = False
+    # Default per-query timeout in seconds (None / 0 means no timeout)
+    query_timeout: int | None = None
 
     @classmethod
     def from_env(cls):
@@ -23,7 +25,8 @@ class SqlServerConfig(BaseModel):
             port=os.getenv('SQL_SERVER_PORT'),
             driver=os.getenv('SQL_SERVER_DRIVER'),
             trusted_connection=os.getenv('SQL_SERVER_TRUSTED_CONNECTION').strip().lower() \
-                in ['1','yes', 'true']
+                in ['1','yes', 'true'],
+            query_timeout=os.getenv('SQL_SERVER_QUERY_TIMEOUT') or None
         )
 
     @model_validator(mode="after")
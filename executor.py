@@ -1,3 +1,108 @@
+"""
+Hybrid execution support.
+
+Driver I/O stays on threads (the drivers block but release the GIL), while
+the CPU-bound stages of a job - row conversion, JSON serialization and
+optional compression - run in a ProcessPoolExecutor. Only the plain result
+payload (status texts and row tuples) crosses to the pool.
+
+The rows are still pickled in this process, on the executor's feeder thread,
+and that holds the GIL like rendering would. Pickling Decimal / datetime
+values costs more than rendering them to JSON, so offloading only pays off
+when the child's work (records, compression) outweighs the pickling. A
+shared-memory hand-off doesn't avoid this: the rows have to be pickled into
+the segment all the same. Inline rows are bounded by MAX_ROW_SIZE; larger
+results are spilled or stay cached in Snowflake, and only their handle
+crosses to the pool.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from models import ResponseModel, render_response
+from transport import CompressionSettings, compress_payload
+import logging
+import os
+
+logger = logging.getLogger(f"app.{__name__}")
+
+
 async def sqlexecutor() -> str:
     print('Running sql executor')
-    return 'return from sqlexecutor'
\ No newline at end of file
+    return 'return from sqlexecutor'
+
+
+def _render_in_process(status: str, success_text: str | None, error_text: str | None, data,
+                       as_records: bool, compression: CompressionSettings | None) -> bytes:
+    """
+    Runs in a pool process: rebuilds the ResponseModel from its plain fields
+    (no validation, the parent already built it), renders it and returns
+    the encoded output.
+    """
+    response = ResponseModel.model_construct(
+        status=status, success_text=success_text, error_text=error_text, data=data,
+    )
+
+    payload = render_response(response, as_records).encode("utf-8")
+    if compression is not None:
+        payload = compress_payload(payload, compression)
+    return payload
+
+
+class ProcessOffloader:
+    """
+    CPU side of the hybrid executor mode.
+
+    Pass `offloader.serialize` to Job.run(serializer=...) from an I/O thread:
+    the thread hands the fetched result over and waits while a pool process
+    does the conversion work (see the module docstring for what the hand-off
+    itself costs).
+    """
+
+    def __init__(self, max_workers: int | None = None, compression: CompressionSettings | None = None):
+        self._pool = ProcessPoolExecutor(max_workers=max_workers)
+        self.compression = compression
+
+
+    @classmethod
+    def from_env(cls):
+        """
+        HYBRID_CPU_WORKERS sizes the pool (default: CPU count);
+        HYBRID_COMPRESS_RESULTS=true returns transport-compressed bytes.
+        """
+        compress = os.getenv("HYBRID_COMPRESS_RESULTS", "").strip().lower() in ['1', 'yes', 'true']
+        return cls(
+            max_workers=int(os.getenv("HYBRID_CPU_WORKERS", "0")) or None,
+            compression=CompressionSettings.from_env() if compress else None,
+        )
+
+
+    def serialize(self, connection, response: ResponseModel) -> str | bytes:
+        """
+        Drop-in replacement for Connection.serialize that runs in the pool.
+        Returns a JSON string, or compressed bytes when compression is enabled.
+        """
+        try:
+            payload = self._pool.submit(
+                _render_in_process,
+                response.status, response.success_text, response.error_text, response.data,
+                connection.ROWS_AS_RECORDS, self.compression,
+            ).result()
+
+        except Exception as e:
+            # Same contract as Connection.serialize: a failed render is a "fail" response
+            logger.exception("Unhandled exception while serializing in the process pool: %s", e)
+            connection.last_status = "fail"
+            return ResponseModel(status="fail", error_text=str(e)).model_dump_json()
+
+        return payload if self.compression is not None else payload.decode("utf-8")
+
+
+    def shutdown(self):
+        self._pool.shutdown()
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *exc):
+        self.shutdown()
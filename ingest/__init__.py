@@ -0,0 +1,5 @@
+from .payload import JobPayload
+from .jsonl import JobFileReader, MalformedLine, IngestStats
+from .feed import feed_inprocess, feed_dispatcher
+
+__all__ = ['JobPayload', 'JobFileReader', 'MalformedLine', 'IngestStats', 'feed_inprocess', 'feed_dispatcher']
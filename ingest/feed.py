@@ -0,0 +1,87 @@
+from jobs.job import Job
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Iterable
+import contextvars
+import logging
+import threading
+import time
+
+logger = logging.getLogger(f"app.{__name__}")
+
+
+def _log_result(job_payload: dict, future: Future):
+    try:
+        logger.info("Job %s finished with result - %s", job_payload["job_name"], future.result())
+    except Exception as e:
+        logger.error("Job %s failed - %s", job_payload["job_name"], e)
+
+
+def feed_inprocess(payloads: Iterable[dict], run: Callable[[Job], object] = Job.run_live,
+                   max_in_flight: int = 32,
+                   on_result: Callable[[dict, Future], None] | None = None) -> int:
+    """
+    Runs a stream of job payloads on a thread pool in this process.
+
+    At most max_in_flight jobs are built or running at once; reading the
+    stream blocks until a slot frees up, so a huge file is never
+    materialised as Job objects. on_result(payload, future) is called as
+    each job completes. Returns the number of jobs run.
+    """
+    on_result = on_result or _log_result
+    slots = threading.BoundedSemaphore(max_in_flight)
+    submitted = 0
+
+    def build_and_run(job_payload: dict):
+        return run(Job.from_payload(job_payload))
+
+    def done(job_payload: dict, future: Future):
+        try:
+            on_result(job_payload, future)
+        finally:
+            slots.release()
+
+    with ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="ingest") as executor:
+        for job_payload in payloads:
+            slots.acquire()
+            future = executor.submit(contextvars.copy_context().run, build_and_run, job_payload)
+            future.add_done_callback(lambda f, p=job_payload: done(p, f))
+            submitted += 1
+
+    return submitted
+
+
+def feed_dispatcher(batches: Iterable[list[dict]], dispatcher, scheduler=None, max_pending: int = 10000,
+                    on_sent: Callable[[object], None] | None = None) -> int:
+    """
+    Feeds batches of job payloads into a FairShareDispatcher.
+
+    Each batch is planned by the (optional) CostAwareScheduler and queued;
+    once more than max_pending jobs wait in the dispatcher, reading stops
+    and dispatch rounds run until the backlog drops, so memory is bounded
+    by max_pending rather than the file size. on_sent(handle) is called for
+    every job handed to the broker. Returns the number of jobs sent.
+    """
+    sent = 0
+
+    def pump():
+        nonlocal sent
+        handles = dispatcher.dispatch()
+        for handle in handles:
+            if on_sent is not None:
+                on_sent(handle)
+        sent += len(handles)
+        if not handles:
+            time.sleep(dispatcher.poll_interval)
+
+    for batch in batches:
+        plan = scheduler.plan(batch) if scheduler is not None else [(job, None) for job in batch]
+        for job_payload, queue in plan:
+            dispatcher.submit(job_payload, queue=queue)
+
+        while dispatcher.pending >= max_pending:
+            pump()
+
+    while dispatcher.pending:
+        pump()
+
+    return sent
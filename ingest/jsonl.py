@@ -0,0 +1,138 @@
+from .payload import JobPayload, PAYLOAD_ADAPTER, BATCH_ADAPTER
+from pydantic import BaseModel, ValidationError
+from stats import JobSignature
+from collections import deque
+from typing import Callable, Iterator
+import hashlib
+import logging
+import os
+
+logger = logging.getLogger(f"app.{__name__}")
+
+
+class MalformedLine(BaseModel):
+    line_number: int
+    error: str
+    # First bytes of the offending line, for the report
+    preview: str
+
+
+class IngestStats(BaseModel):
+    lines: int = 0
+    valid: int = 0
+    duplicates: int = 0
+    malformed: int = 0
+
+
+class JobFileReader:
+    """
+    Streams a JSONL job file as batches of validated job payloads.
+
+    Only one batch of raw lines is held at a time. Each batch is validated
+    with one call to a precompiled TypeAdapter; if that fails, the batch is
+    re-validated line by line so good lines still go through and bad ones
+    are reported to on_malformed instead of aborting the run.
+
+    Duplicates (same JobSignature as an earlier line) are dropped. A 12 byte
+    digest is kept per distinct job, roughly 100 bytes each once Python
+    object and set overhead are counted (~100 MB per million jobs). At most
+    max_tracked digests are kept (INGEST_DEDUPE_MAX_JOBS); past that the
+    oldest are forgotten, so duplicates further apart than that get through.
+    """
+
+    def __init__(self, path: str, batch_size: int = 1000, dedupe: bool = True,
+                 on_malformed: Callable[[MalformedLine], None] | None = None,
+                 max_tracked: int | None = None):
+        self.path = path
+        self.batch_size = batch_size
+        self.dedupe = dedupe
+        self.on_malformed = on_malformed or self._log_malformed
+        self.max_tracked = max_tracked or int(os.getenv("INGEST_DEDUPE_MAX_JOBS", "1000000"))
+        self.stats = IngestStats()
+        self._seen: set[bytes] = set()
+        # Insertion order of _seen, oldest first
+        self._seen_order: deque[bytes] = deque()
+
+
+    @staticmethod
+    def _log_malformed(line: MalformedLine):
+        logger.warning("Skipping malformed job on line %d: %s", line.line_number, line.error)
+
+
+    def __iter__(self) -> Iterator[dict]:
+        for batch in self.batches():
+            yield from batch
+
+
+    def batches(self) -> Iterator[list[dict]]:
+        """Yields lists of at most batch_size job payloads, in file order."""
+        numbers, lines = [], []
+
+        with open(self.path, "rb") as f:
+            for number, line in enumerate(f, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                self.stats.lines += 1
+                numbers.append(number)
+                lines.append(line)
+
+                if len(lines) >= self.batch_size:
+                    if batch := self._validate(numbers, lines):
+                        yield batch
+                    numbers, lines = [], []
+
+        if lines and (batch := self._validate(numbers, lines)):
+            yield batch
+
+        logger.info("Finished reading %s: %s", self.path, self.stats)
+
+
+    def _validate(self, numbers: list[int], lines: list[bytes]) -> list[dict]:
+        try:
+            jobs = BATCH_ADAPTER.validate_json(b"[" + b",".join(lines) + b"]")
+            # A line holding several comma separated objects would shift the rest
+            if len(jobs) != len(lines):
+                raise ValueError("batch item count doesn't match line count")
+        except (ValidationError, ValueError):
+            jobs = [self._validate_line(number, line) for number, line in zip(numbers, lines)]
+
+        payloads = []
+        for job in jobs:
+            if job is None:
+                continue
+            if self.dedupe and self._is_duplicate(job):
+                self.stats.duplicates += 1
+                continue
+            self.stats.valid += 1
+            payloads.append(job.to_payload())
+        return payloads
+
+
+    def _validate_line(self, number: int, line: bytes) -> JobPayload | None:
+        try:
+            return PAYLOAD_ADAPTER.validate_json(line)
+        except ValidationError as e:
+            self.stats.malformed += 1
+            errors = "; ".join(
+                f"{'.'.join(str(part) for part in err['loc']) or 'line'}: {err['msg']}" for err in e.errors()
+            )
+            self.on_malformed(MalformedLine(
+                line_number=number,
+                error=errors,
+                preview=line[:200].decode("utf-8", errors="replace"),
+            ))
+            return None
+
+
+    def _is_duplicate(self, job: JobPayload) -> bool:
+        signature = JobSignature.from_values(job.job_name, job.connection_type, job.execution_script)
+        key = f"{signature.connection_type}:{signature.job_name}:{signature.script_hash}"
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=12).digest()
+        if digest in self._seen:
+            return True
+        self._seen.add(digest)
+        self._seen_order.append(digest)
+        if len(self._seen_order) > self.max_tracked:
+            self._seen.discard(self._seen_order.popleft())
+        return False
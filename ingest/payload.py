@@ -0,0 +1,27 @@
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
+from typing import Literal
+
+
+class JobPayload(BaseModel):
+    """
+    One line of a JSONL job file: the same dict runner.py sends to run_job.
+    Connector specific keys are kept, so they reach Connection.create.
+    """
+    model_config = ConfigDict(extra="allow")
+
+    job_name: str = Field(min_length=1)
+    # Connection types Job can build (connection.AnyConnection)
+    connection_type: Literal["sql_server", "snowflake", "shell"]
+    execution_script: str = Field(min_length=1)
+    created_by: str
+    watermark_column: str | None = None
+    query_timeout: int | None = None
+
+    def to_payload(self) -> dict:
+        return self.model_dump(exclude_none=True)
+
+
+# Built once: the validators are compiled when the adapter is created,
+# not per line. Batches are validated as one JSON array in a single call.
+PAYLOAD_ADAPTER = TypeAdapter(JobPayload)
+BATCH_ADAPTER = TypeAdapter(list[JobPayload])
@@ -1,19 +1,151 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, model_validator
 from connection import *
+from utils import current_task_id, current_job_name
+from stats import JobSignature, get_runtime_stats
+from state import WatermarkConflict, watermark_store
+from models import ResponseModel, LiveResult
+from tracing import tracer
+from typing import Callable
+from uuid import uuid4
 import logging
+import time
 
 logger = logging.getLogger(f"app.{__name__}")
 
 class Job(BaseModel):
-    task_id: str
+    # Celery task id when run from a worker; generated for in-process runs
+    task_id: str = Field(default_factory=lambda: str(uuid4()))
     job_name: str
     job_connection: AnyConnection
     execution_script: str
     created_by: str
+    # Incremental extract mode: only rows above the last committed value of this column.
+    # The script must be a single SELECT with distinctly named columns, plus the
+    # connector's own limits (see Connection.check_incremental)
+    watermark_column: str | None = None
+
+    @model_validator(mode="after")
+    def _check_incremental(self):
+        # Rejected here rather than when the wrapped script fails on the server
+        if self.watermark_column:
+            self.job_connection.check_incremental(self.execution_script, self.watermark_column)
+        return self
+
+    @classmethod
+    def from_payload(cls, job_payload: dict, task_id: str | None = None):
+        """Builds a Job (and its connection) from a dispatch payload."""
+        extra = {"task_id": task_id} if task_id else {}
+        return cls(
+            job_name=job_payload["job_name"],
+            job_connection=Connection.create(job_payload=job_payload),
+            execution_script=job_payload["execution_script"],
+            created_by=job_payload["created_by"],
+            watermark_column=job_payload.get("watermark_column"),
+            **extra,
+        )
+
+    def signature(self) -> JobSignature:
+        return JobSignature.from_job(self)
+
+    def expected_runtime(self) -> float | None:
+        """Mean runtime of previous runs of this job shape, in seconds."""
+        return get_runtime_stats().expected_runtime(self.signature())
+
+    def watermark_key(self) -> str:
+        return f"{self.job_connection.connection_type}:{self.job_name}:{self.watermark_column}"
+
+    def _fetch_incremental(self) -> tuple[ResponseModel, Callable[[], None]]:
+        """
+        Fetches only the delta since the last committed high-water mark.
+        Returns the response and a callable that commits the new mark; run()
+        calls it once the result has been serialized and is about to be
+        handed back, so a failure before then re-reads the delta next run.
+        """
+        key = self.watermark_key()
+        last_watermark = watermark_store.get(key)
+
+        response = self.job_connection.fetch_incremental(
+            self.execution_script, self.watermark_column, last_watermark
+        )
+        new_watermark = self.job_connection.last_watermark
+
+        def commit():
+            if self.job_connection.last_status != "pass" or new_watermark is None:
+                return
+            if last_watermark is not None and not new_watermark > last_watermark:
+                return
+            try:
+                watermark_store.commit(key, last_watermark, new_watermark)
+            except WatermarkConflict as e:
+                # An overlapping run moved the mark; its rows overlap ours, so
+                # the result is still delivered and the other run's mark stands
+                logger.warning("Watermark not committed for %s: %s", self.job_name, e)
+
+        return response, commit
+
+    def run(self, serializer: Callable[[Connection, ResponseModel], str | bytes | LiveResult] | None = None):
+        """
+        Runs the job: driver I/O on the calling thread, then the serialize
+        stage, by default inline (Connection.serialize). Pass a serializer
+        to run that stage elsewhere, e.g. executor.ProcessOffloader.serialize,
+        or LiveResult.serializer to skip it (see run_live).
+        """
+        # Tag the context so active queries are registered against this job
+        token = current_task_id.set(self.task_id)
+        name_token = current_job_name.set(self.job_name)
+        started = time.monotonic()
+        try:
+            with tracer.start_span("job.run", {
+                "job.name": self.job_name, "job.task_id": self.task_id,
+                "db.system": self.job_connection.connection_type,
+            }) as span:
+                with tracer.start_span("connection.test"):
+                    self.job_connection.test_connection()
+
+                commit_watermark = None
+                if self.watermark_column:
+                    response, commit_watermark = self._fetch_incremental()
+                else:
+                    response = self.job_connection.fetch(self.execution_script)
+
+                rows = self.job_connection._count_rows(response.data)
+                with tracer.start_span("result.serialize"):
+                    if serializer is None:
+                        result = self.job_connection.serialize(response)
+                    else:
+                        result = serializer(self.job_connection, response)
+
+                # Only once the result is ready to hand back (and serialized fine)
+                if commit_watermark is not None:
+                    commit_watermark()
+
+                # Live results aren't serialized, so there's no size to record
+                nbytes = len(result) if isinstance(result, (str, bytes)) else 0
+                status = self.job_connection.last_status
+                span.set_attributes({"result.rows": rows, "result.bytes": nbytes, "job.status": status})
+                if status == "fail":
+                    span.set_status("error", response.error_text or "")
+
+                # Feed the runtime statistics used for cost-aware scheduling
+                get_runtime_stats().record(
+                    self.signature(),
+                    runtime=time.monotonic() - started,
+                    rows=rows,
+                    nbytes=nbytes,
+                    status=status,
+                )
+                return result
+        finally:
+            current_task_id.reset(token)
+            current_job_name.reset(name_token)
+
+    def run_live(self) -> LiveResult:
+        """
+        In-process variant of run(): returns the fetched rows as a LiveResult
+        instead of a JSON string. Nothing is serialized unless the result is
+        pickled or to_json() is called.
+        """
+        return self.run(serializer=LiveResult.serializer)
 
-    def run(self):
-        self.job_connection.test_connection()
-        return self.job_connection.execute(self.execution_script)
-    
     def job_callback(self):
         return self.job_connection.callback
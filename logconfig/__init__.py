@@ -0,0 +1,10 @@
+from .redaction import redact
+from .filters import ContextFilter, SamplingFilter
+from .formatters import JsonFormatter, RedactingFormatter
+from .handlers import BackgroundLogWriter, NonBlockingQueueHandler
+from .setup import configure_logger
+
+__all__ = [
+    'redact', 'ContextFilter', 'SamplingFilter', 'JsonFormatter', 'RedactingFormatter',
+    'BackgroundLogWriter', 'NonBlockingQueueHandler', 'configure_logger',
+]
\ No newline at end of file
@@ -0,0 +1,53 @@
+from utils import current_task_id, current_job_name, current_span
+import itertools
+import logging
+import threading
+
+
+class ContextFilter(logging.Filter):
+    """
+    Stamps records with the job / task ids and the trace / span ids of the calling context.
+    Must run in the calling thread (on the QueueHandler), because the
+    context variables aren't visible from the background writer thread.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.task_id = current_task_id.get()
+        record.job_name = current_job_name.get()
+        span = current_span.get()
+        record.trace_id = span.context.trace_id if span is not None else None
+        record.span_id = span.context.span_id if span is not None else None
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps 1 in N records below WARNING for the configured logger prefixes,
+    e.g. {"app.connection": 10}. Warnings and errors are never sampled.
+    """
+
+    def __init__(self, rates: dict[str, int]):
+        super().__init__()
+        # Longest prefix first so the most specific rule wins
+        self.rates = sorted(rates.items(), key=lambda item: -len(item[0]))
+        self._counters: dict[str, itertools.count] = {}
+        self._lock = threading.Lock()
+
+    def _rate_for(self, name: str) -> tuple[str, int] | None:
+        for prefix, rate in self.rates:
+            if name == prefix or name.startswith(prefix + "."):
+                return prefix, rate
+        return None
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+
+        rule = self._rate_for(record.name)
+        if rule is None or rule[1] <= 1:
+            return True
+
+        prefix, rate = rule
+        with self._lock:
+            counter = self._counters.setdefault(prefix, itertools.count())
+            return next(counter) % rate == 0
@@ -0,0 +1,38 @@
+from .redaction import redact
+import json
+import logging
+
+
+class RedactingFormatter(logging.Formatter):
+    """Plain text formatter that masks credentials in the final line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        return redact(super().format(record))
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per line, carrying the job / task / trace ids stamped
+    by ContextFilter. Message and traceback are redacted.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "func": record.funcName,
+            "message": redact(record.getMessage()),
+            "task_id": getattr(record, "task_id", None),
+            "job_name": getattr(record, "job_name", None),
+            "trace_id": getattr(record, "trace_id", None),
+            "span_id": getattr(record, "span_id", None),
+            "thread": record.threadName,
+        }
+        # Tracebacks arrive pre-rendered in exc_text from the queue handler
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc_info"] = redact(record.exc_text)
+
+        return json.dumps(entry, default=str)
@@ -0,0 +1,100 @@
+from logging.handlers import QueueHandler, QueueListener
+import atexit
+import copy
+import logging
+import os
+import queue
+import threading
+
+# Renders tracebacks in the calling thread; layout is left to the writer's formatter
+_exc_formatter = logging.Formatter()
+
+# Every listener started in this process; restarted in forked children
+_listeners: list["BackgroundLogWriter"] = []
+_listeners_lock = threading.Lock()
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    Hands records to a bounded in-memory queue.
+
+    Like the stdlib QueueHandler, msg % args and the traceback are rendered
+    in the calling thread, so the writer never touches objects the caller
+    may mutate or tracebacks pinning its frames. Layout and redaction are
+    left to the background writer. When the queue is full the record is
+    dropped and counted rather than stalling the worker thread.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _exc_formatter.formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class BackgroundLogWriter:
+    """
+    Owns the queue, the queue handler and the background thread that
+    writes records to the real (blocking) handlers.
+    """
+
+    def __init__(self, handlers: list[logging.Handler], max_queue_size: int = 10000):
+        self.handlers = handlers
+        self.queue: queue.Queue = queue.Queue(maxsize=max_queue_size)
+        self.queue_handler = NonBlockingQueueHandler(self.queue)
+        self._listener: QueueListener | None = None
+
+    def start(self):
+        self._listener = QueueListener(self.queue, *self.handlers, respect_handler_level=True)
+        self._listener.start()
+
+        with _listeners_lock:
+            if self not in _listeners:
+                _listeners.append(self)
+
+    def stop(self):
+        """Flushes queued records and stops the writer thread."""
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+
+    def _restart_after_fork(self):
+        # The writer thread doesn't survive fork(); without a new one the
+        # child would fill the queue and silently drop everything.
+        self.queue = queue.Queue(maxsize=self.queue.maxsize)
+        self.queue_handler.queue = self.queue
+        self._listener = None
+        self.start()
+
+
+def _stop_all():
+    with _listeners_lock:
+        writers = list(_listeners)
+    for writer in writers:
+        writer.stop()
+
+
+def _restart_all_after_fork():
+    global _listeners_lock
+    _listeners_lock = threading.Lock()
+    for writer in list(_listeners):
+        if writer._listener is not None:
+            writer._restart_after_fork()
+
+
+atexit.register(_stop_all)
+os.register_at_fork(after_in_child=_restart_all_after_fork)
@@ -0,0 +1,25 @@
+import re
+
+# Credentials that show up in connection strings, configs and driver errors
+_PATTERNS = [
+    # ODBC style: PWD=secret; Password=secret; PWD={se;cr}}et}; (braced values
+    # may hold ; and spaces, with } escaped as }})
+    (re.compile(r"(?i)\b(pwd|password|passwd)\s*=\s*(?:\{(?:[^}]|\}\})*\}?|[^;\s]*)"), r"\1=***"),
+    # key: value / "key": "value" style (configs, reprs, JSON)
+    (
+        re.compile(
+            r"(?i)([\"']?\b(?:password|passwd|pwd|secret|token|aws_secret_access_key|aws_session_token)"
+            r"[\"']?\s*[:=]\s*)([\"'])(.*?)\2"
+        ),
+        r"\1\2***\2",
+    ),
+    # AWS access key ids
+    (re.compile(r"\b(AKIA|ASIA)[0-9A-Z]{16}\b"), r"\1****************"),
+]
+
+
+def redact(text: str) -> str:
+    """Masks credentials in a log message or connection string."""
+    for pattern, replacement in _PATTERNS:
+        text = pattern.sub(replacement, text)
+    return text
@@ -0,0 +1,86 @@
+from .filters import ContextFilter, SamplingFilter
+from .formatters import JsonFormatter, RedactingFormatter
+from .handlers import BackgroundLogWriter
+import logging
+import os
+
+logger = logging.getLogger(f"app.{__name__}")
+
+TEXT_FORMAT = "%(asctime)s | %(levelname)s | %(name)s | %(funcName)s | %(task_id)s | %(message)s"
+
+
+def _positive_int(name: str, value: str, default: int | None) -> int | None:
+    """Parses a positive int setting; falls back to default with a warning."""
+    try:
+        parsed = int(value)
+        if parsed > 0:
+            return parsed
+    except (TypeError, ValueError):
+        pass
+    if default is None:
+        logger.warning("Ignoring invalid %s value %r", name, value)
+    else:
+        logger.warning("Ignoring invalid %s value %r, using %s", name, value, default)
+    return default
+
+
+def _sample_rates_from_env() -> dict[str, int]:
+    """LOG_SAMPLE_RATES="app.connection=10,app.jobs=5" keeps 1 in N records per prefix."""
+    rates = {}
+    for item in (os.getenv("LOG_SAMPLE_RATES") or "").split(","):
+        if "=" in item:
+            prefix, rate = item.split("=", 1)
+            rate = _positive_int(f"LOG_SAMPLE_RATES[{prefix.strip()}]", rate.strip(), None)
+            if rate is not None:
+                rates[prefix.strip()] = rate
+    return rates
+
+
+def configure_logger(
+    name: str,
+    level: int = logging.INFO,
+    log_to_file: bool = False,
+    file_path: str | None = None,
+) -> logging.Logger:
+    """
+    Attaches the non-blocking pipeline to a logger:
+    calling thread -> context / sampling filters -> bounded queue ->
+    background writer -> redacting text or JSON formatter -> console / file.
+
+    LOG_FORMAT=json switches to structured records.
+    """
+    logger = logging.getLogger(name)
+    logger.setLevel(level)
+    logger.propagate = False  # Prevent propagation to root logger
+
+    # Prevent duplicate handlers when called more than once
+    if logger.handlers:
+        return logger
+
+    if os.getenv("LOG_FORMAT", "text").lower() == "json":
+        formatter = JsonFormatter()
+    else:
+        formatter = RedactingFormatter(TEXT_FORMAT)
+
+    console_handler = logging.StreamHandler()
+    console_handler.setLevel(level)
+    console_handler.setFormatter(formatter)
+    handlers = [console_handler]
+
+    if log_to_file and file_path:
+        file_handler = logging.FileHandler(file_path)
+        file_handler.setFormatter(formatter)
+        handlers.append(file_handler)
+
+    max_queue_size = _positive_int("LOG_QUEUE_SIZE", os.getenv("LOG_QUEUE_SIZE", "10000"), 10000)
+    writer = BackgroundLogWriter(handlers, max_queue_size=max_queue_size)
+
+    # Sampling first so dropped records cost as little as possible
+    sample_rates = _sample_rates_from_env()
+    if sample_rates:
+        writer.queue_handler.addFilter(SamplingFilter(sample_rates))
+    writer.queue_handler.addFilter(ContextFilter())
+
+    writer.start()
+    logger.addHandler(writer.queue_handler)
+    return logger
@@ -1,3 +1,4 @@
-from .response import ResponseModel
+from .response import ResponseModel, rows_as_records, render_response
+from .liveresult import LiveResult, LiveResultSet
 
-__all__ = ['ResponseModel']
\ No newline at end of file
+__all__ = ['ResponseModel', 'rows_as_records', 'render_response', 'LiveResult', 'LiveResultSet']
@@ -0,0 +1,151 @@
+from .response import ResponseModel, render_response
+from array import array
+from functools import cached_property
+from typing import Any, Iterator
+
+
+class LiveResultSet:
+    """
+    One result set held exactly as the driver returned it (a list of row
+    tuples). Records and typed column buffers are built on demand.
+    """
+
+    def __init__(self, columns: list[str], rows: list, extra: dict, keys: list[str] | None = None):
+        self.columns = columns
+        self.rows = rows
+        # Everything else the connector attached (rowcount, result_handle, ...)
+        self.extra = extra
+        # Original key order, so to_json() matches Connection.execute byte for byte
+        self._keys = keys or ["columns", "rows", *extra]
+        self._buffers: dict[str, memoryview | tuple] = {}
+
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+
+    def __iter__(self) -> Iterator:
+        return iter(self.rows)
+
+
+    def records(self) -> Iterator[dict]:
+        """Rows as {column: value} dicts, generated lazily."""
+        for row in self.rows:
+            yield row if isinstance(row, dict) else dict(zip(self.columns, row))
+
+
+    def column(self, name: str) -> memoryview | tuple:
+        """
+        Values of one column. All-int or all-float columns are copied once
+        into a packed array and come back as a memoryview over it (compact,
+        usable with numpy.frombuffer / struct); anything else as a tuple.
+        Cached, so later calls don't copy again.
+        """
+        if name not in self._buffers:
+            index = self.columns.index(name)
+            values = tuple(row[name] if isinstance(row, dict) else row[index] for row in self.rows)
+            self._buffers[name] = self._pack(values)
+        return self._buffers[name]
+
+
+    @staticmethod
+    def _pack(values: tuple) -> memoryview | tuple:
+        kinds = {type(value) for value in values}
+        typecode = {frozenset({int}): "q", frozenset({float}): "d"}.get(frozenset(kinds))
+        if typecode is None:
+            return values
+        try:
+            return memoryview(array(typecode, values))
+        except OverflowError:
+            return values
+
+
+    def to_payload(self, as_records: bool) -> dict:
+        values = {
+            **self.extra,
+            "columns": self.columns,
+            "rows": list(self.records()) if as_records else self.rows,
+        }
+        return {key: values[key] for key in self._keys}
+
+
+class LiveResult:
+    """
+    In-process result of a job. Holds the fetched rows without serializing
+    them; JSON is produced lazily (and cached) only when the result crosses
+    a process or network boundary - to_json(), or pickling.
+    """
+
+    def __init__(self, response: ResponseModel, as_records: bool = False):
+        self.status = response.status
+        self.success_text = response.success_text
+        self.error_text = response.error_text
+        self.as_records = as_records
+        self.result_sets: list[LiveResultSet] = []
+        # Non tabular payloads (Lambda, shell) are kept as is
+        self.data: Any = None
+        # Whether data was a list of result sets (possibly empty)
+        self._tabular = isinstance(response.data, list) and all(
+            isinstance(result_set, dict) and "columns" in result_set for result_set in response.data
+        )
+
+        if self._tabular:
+            for result_set in response.data:
+                extra = {k: v for k, v in result_set.items() if k not in ("columns", "rows")}
+                self.result_sets.append(
+                    LiveResultSet(result_set["columns"], result_set.get("rows") or [], extra, list(result_set))
+                )
+        else:
+            self.data = response.data
+
+
+    @classmethod
+    def serializer(cls, connection, response: ResponseModel) -> "LiveResult":
+        """Job.run(serializer=LiveResult.serializer) returns live results."""
+        return cls(response, connection.ROWS_AS_RECORDS)
+
+
+    @property
+    def ok(self) -> bool:
+        return self.status == "pass"
+
+
+    @property
+    def row_count(self) -> int:
+        return sum(len(result_set) for result_set in self.result_sets)
+
+
+    def to_response(self) -> ResponseModel:
+        data = self.data
+        if self._tabular:
+            data = [result_set.to_payload(self.as_records) for result_set in self.result_sets]
+        return ResponseModel(
+            status=self.status, success_text=self.success_text, error_text=self.error_text, data=data
+        )
+
+
+    @cached_property
+    def _json(self) -> str:
+        # Records were already built by to_response, without touching self.rows
+        return render_response(self.to_response(), as_records=False)
+
+
+    def to_json(self) -> str:
+        """Same JSON Connection.execute would have returned."""
+        return self._json
+
+
+    def __reduce__(self):
+        # Serialize only when actually crossing a process boundary
+        return (_live_result_from_json, (self.to_json(), self.as_records))
+
+
+    def __repr__(self) -> str:
+        return (
+            f"LiveResult(status={self.status!r}, result_sets={len(self.result_sets)}, "
+            f"rows={self.row_count})"
+        )
+
+
+def _live_result_from_json(payload: str, as_records: bool) -> LiveResult:
+    return LiveResult(ResponseModel.model_validate_json(payload), as_records)
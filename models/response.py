@@ -21,4 +21,28 @@ class ResponseModel(BaseModel):
     #         if len(self.error_text) == 0:
     #             raise ValueError("When status is 'fail', error_text must be provided.")
 
-    #     return self
\ No newline at end of file
+    #     return self
+
+
+def rows_as_records(data) -> None:
+    """
+    Converts the row tuples of each result set in a ResponseModel payload
+    into {column: value} dicts, in place.
+    """
+    if not isinstance(data, list):
+        return
+
+    for result_set in data:
+        if not isinstance(result_set, dict):
+            continue
+        columns = result_set.get("columns")
+        rows = result_set.get("rows")
+        if columns and rows and not isinstance(rows[0], dict):
+            result_set["rows"] = [dict(zip(columns, row)) for row in rows]
+
+
+def render_response(response: ResponseModel, as_records: bool) -> str:
+    """CPU-bound serialization stage shared by the thread and process paths."""
+    if as_records:
+        rows_as_records(response.data)
+    return response.model_dump_json()
@@ -0,0 +1,8 @@
+from .policy import RateLimitPolicy
+from .ratelimiter import DistributedRateLimiter, RateLimitTimeout
+from .adaptive import AdaptivePolicy, AdaptiveLimiter, DistributedAdaptiveLimiter
+
+__all__ = [
+    'RateLimitPolicy', 'DistributedRateLimiter', 'RateLimitTimeout',
+    'AdaptivePolicy', 'AdaptiveLimiter', 'DistributedAdaptiveLimiter',
+]
\ No newline at end of file
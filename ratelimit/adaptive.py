@@ -0,0 +1,244 @@
+from contextlib import contextmanager
+from functools import lru_cache
+from pydantic import BaseModel
+from .ratelimiter import DistributedRateLimiter, RateLimitTimeout
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(f"app.{__name__}")
+
+
+class AdaptivePolicy(BaseModel):
+    enabled: bool = False
+    min_limit: int = 1
+    max_limit: int = 64
+    initial_limit: int = 4
+    # Additive increase per limit's worth of successful samples (AIMD)
+    increase: float = 1.0
+    # Multiplicative decrease on errors / rising latency
+    backoff: float = 0.7
+    # Back off when smoothed relative latency exceeds baseline * tolerance
+    latency_tolerance: float = 2.0
+    # EWMA weight of the newest latency sample
+    smoothing: float = 0.2
+    # Per-sample upward drift of the baseline so it follows a permanently slower backend
+    baseline_drift: float = 0.01
+    # Seconds to wait for an in-flight slot before giving up
+    max_wait: float = 600.0
+
+    @classmethod
+    def from_env(cls, connection_type: str):
+        """
+        Reads ADAPTIVE_<CONNECTION_TYPE>_{ENABLED,MIN,MAX,INITIAL,BACKOFF,TOLERANCE},
+        e.g. ADAPTIVE_SQL_SERVER_ENABLED=true.
+        """
+        return _adaptive_policy_from_env(connection_type)
+
+
+@lru_cache(maxsize=None)
+def _adaptive_policy_from_env(connection_type: str) -> AdaptivePolicy:
+    prefix = f"ADAPTIVE_{connection_type.upper()}_"
+
+    values = {
+        "enabled": (os.getenv(prefix + "ENABLED") or "").strip().lower() in ['1', 'yes', 'true'],
+        "min_limit": os.getenv(prefix + "MIN"),
+        "max_limit": os.getenv(prefix + "MAX"),
+        "initial_limit": os.getenv(prefix + "INITIAL"),
+        "backoff": os.getenv(prefix + "BACKOFF"),
+        "latency_tolerance": os.getenv(prefix + "TOLERANCE"),
+    }
+    return AdaptivePolicy(**{k: v for k, v in values.items() if v is not None})
+
+
+class AdaptiveState(BaseModel):
+    """
+    AIMD limit for one target, driven by observed latency and errors.
+    Shared by the in-process and the Redis-backed limiters.
+
+    Jobs against one target range from sub-second lookups to long exports,
+    so latency is tracked relative to each job's own expected runtime
+    (latency / expected, ~1.0 when the target is healthy) rather than in
+    seconds. Samples without an estimate only feed the error and
+    saturation signals.
+    """
+    limit: float
+    # Best relative latency seen, drifting slowly upwards
+    baseline: float | None = None
+    # Smoothed recent relative latency
+    latency: float | None = None
+
+
+    @classmethod
+    def initial(cls, policy: AdaptivePolicy):
+        return cls(limit=policy.initial_limit)
+
+
+    def observe(self, latency: float | None, failed: bool, saturated: bool, policy: AdaptivePolicy):
+        """
+        Applies one sample (latency is relative, or None when unknown):
+        - errors / timeouts and latency above baseline * tolerance shrink the limit
+        - flat latency grows it, but only while the current limit is actually used
+        """
+        if latency is not None:
+            self.latency = latency if self.latency is None else (
+                policy.smoothing * latency + (1 - policy.smoothing) * self.latency
+            )
+            self.baseline = latency if self.baseline is None else min(
+                self.baseline * (1 + policy.baseline_drift), latency
+            )
+
+        slow = self.latency is not None and self.latency > self.baseline * policy.latency_tolerance
+        if failed or slow:
+            self.limit = max(policy.min_limit, self.limit * policy.backoff)
+        elif saturated:
+            self.limit = min(policy.max_limit, self.limit + policy.increase / self.limit)
+
+
+class Sample:
+    """Yielded by the limiters; the caller marks failed outcomes."""
+
+    def __init__(self, expected: float | None = None):
+        self.failed = False
+        # Expected runtime of this job in seconds (RuntimeStatsStore), if known
+        self.expected = expected
+
+
+    def relative_latency(self, elapsed: float) -> float | None:
+        """Elapsed time as a multiple of the job's expected runtime."""
+        if not self.expected or self.expected <= 0:
+            return None
+        return elapsed / self.expected
+
+
+class AdaptiveLimiter:
+    """
+    In-process adaptive concurrency limiter keyed by target.
+    Used by the thread pool in app.main.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._states: dict[str, AdaptiveState] = {}
+        self._in_flight: dict[str, int] = {}
+
+
+    @contextmanager
+    def limit(self, target: str, policy: AdaptivePolicy, expected: float | None = None):
+        """expected: the job's expected runtime in seconds, used to normalize its latency."""
+        if not policy.enabled:
+            yield Sample(expected)
+            return
+
+        deadline = time.monotonic() + policy.max_wait
+
+        with self._cond:
+            state = self._states.setdefault(target, AdaptiveState.initial(policy))
+
+            while self._in_flight.get(target, 0) >= int(state.limit):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise RateLimitTimeout(f"Timed out waiting for an adaptive slot on {target}")
+                self._cond.wait(remaining)
+
+            in_flight = self._in_flight[target] = self._in_flight.get(target, 0) + 1
+
+        sample = Sample(expected)
+        started = time.monotonic()
+        try:
+            yield sample
+        except Exception:
+            sample.failed = True
+            raise
+        finally:
+            latency = sample.relative_latency(time.monotonic() - started)
+
+            with self._cond:
+                self._in_flight[target] -= 1
+                state.observe(latency, sample.failed, in_flight >= int(state.limit), policy)
+                logger.debug("Adaptive limit for %s is now %.2f", target, state.limit)
+                self._cond.notify_all()
+
+
+class DistributedAdaptiveLimiter:
+    """
+    Adaptive concurrency limiter shared by all Celery workers.
+
+    The AIMD state for each target lives in Redis and is updated with an
+    optimistic WATCH/MULTI transaction; in-flight slots reuse the lease-based
+    concurrency script of DistributedRateLimiter with the current adaptive limit.
+    """
+
+    MIN_POLL_SECONDS = 0.05
+    MAX_POLL_SECONDS = 2.0
+
+    def __init__(self, rate_limiter: DistributedRateLimiter, key_prefix: str = "lazypatch:adaptive"):
+        self.rate_limiter = rate_limiter
+        self.redis = rate_limiter.redis
+        self.key_prefix = key_prefix
+
+
+    def _state_key(self, target: str) -> str:
+        return f"{self.key_prefix}:state:{target}"
+
+
+    def _load_state(self, client, target: str, policy: AdaptivePolicy) -> AdaptiveState:
+        raw = client.get(self._state_key(target))
+        if raw is None:
+            return AdaptiveState.initial(policy)
+        return AdaptiveState.model_validate_json(raw)
+
+
+    def _observe(self, target: str, latency: float | None, failed: bool, saturated: bool, policy: AdaptivePolicy):
+        key = self._state_key(target)
+
+        def update(pipe):
+            state = self._load_state(pipe, target, policy)
+            state.observe(latency, failed, saturated, policy)
+            pipe.multi()
+            pipe.set(key, state.model_dump_json())
+
+        try:
+            self.redis.transaction(update, key)
+        except Exception:
+            logger.warning("Failed to update adaptive limit for %s", target, exc_info=True)
+
+
+    @contextmanager
+    def limit(self, target: str, policy: AdaptivePolicy, lease_ttl: int = 3600, expected: float | None = None):
+        """expected: the job's expected runtime in seconds, used to normalize its latency."""
+        if not policy.enabled:
+            yield Sample(expected)
+            return
+
+        deadline = time.monotonic() + policy.max_wait
+        slots_key = f"{self.key_prefix}:slots:{target}"
+        poll = self.MIN_POLL_SECONDS
+
+        while True:
+            limit = int(self._load_state(self.redis, target, policy).limit)
+            lease, in_flight = self.rate_limiter.try_acquire_slot(slots_key, limit, lease_ttl)
+            if lease:
+                break
+
+            if time.monotonic() + poll > deadline:
+                raise RateLimitTimeout(f"Timed out waiting for an adaptive slot on {target}")
+            time.sleep(poll)
+            poll = min(poll * 2, self.MAX_POLL_SECONDS)
+
+        sample = Sample(expected)
+        started = time.monotonic()
+        try:
+            yield sample
+        except Exception:
+            sample.failed = True
+            raise
+        finally:
+            latency = sample.relative_latency(time.monotonic() - started)
+            try:
+                self.redis.zrem(slots_key, lease)
+            except Exception:
+                # The lease expires on its own after lease_ttl
+                logger.warning("Failed to release adaptive slot on %s", target, exc_info=True)
+            self._observe(target, latency, sample.failed, in_flight >= limit, policy)
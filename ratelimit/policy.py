@@ -0,0 +1,49 @@
+from pydantic import BaseModel
+from functools import lru_cache
+import logging
+import os
+
+logger = logging.getLogger(f"app.{__name__}")
+
+
+class RateLimitPolicy(BaseModel):
+    # Sustained dial-outs per second across the whole fleet (None means unlimited)
+    rate: float | None = None
+    # Bucket size, i.e. how many dial-outs may happen back to back
+    burst: int = 1
+    # Concurrent in-flight jobs per target across the whole fleet (None means unlimited)
+    max_concurrency: int | None = None
+    # Seconds to wait for a token / slot before giving up
+    max_wait: float = 300.0
+    # Seconds after which a concurrency slot held by a dead worker is reclaimed
+    lease_ttl: int = 3600
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.rate) or bool(self.max_concurrency)
+
+    @classmethod
+    def from_env(cls, connection_type: str):
+        """
+        Reads RATE_LIMIT_<CONNECTION_TYPE>_{RATE,BURST,CONCURRENCY,MAX_WAIT,LEASE_TTL},
+        e.g. RATE_LIMIT_SNOWFLAKE_CONCURRENCY=8.
+        """
+        return _policy_from_env(connection_type)
+
+
+@lru_cache(maxsize=None)
+def _policy_from_env(connection_type: str) -> RateLimitPolicy:
+    prefix = f"RATE_LIMIT_{connection_type.upper()}_"
+
+    values = {
+        "rate": os.getenv(prefix + "RATE"),
+        "burst": os.getenv(prefix + "BURST"),
+        "max_concurrency": os.getenv(prefix + "CONCURRENCY"),
+        "max_wait": os.getenv(prefix + "MAX_WAIT"),
+        "lease_ttl": os.getenv(prefix + "LEASE_TTL"),
+    }
+    policy = RateLimitPolicy(**{k: v for k, v in values.items() if v})
+
+    if policy.enabled:
+        logger.info("Rate limit policy for %s: %s", connection_type, policy)
+    return policy
@@ -0,0 +1,168 @@
+from contextlib import contextmanager
+from .policy import RateLimitPolicy
+from uuid import uuid4
+import logging
+import random
+import time
+
+logger = logging.getLogger(f"app.{__name__}")
+
+
+# Token bucket refilled continuously at `rate` tokens/s up to `burst` tokens.
+# Uses the Redis server clock so workers with skewed clocks share one bucket.
+# Returns {allowed, wait_ms}.
+TOKEN_BUCKET_LUA = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate / 1000)
+
+local allowed = 0
+local wait_ms = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+else
+    wait_ms = math.ceil((1 - tokens) * 1000 / rate)
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst * 1000 / rate) + 1000)
+return {allowed, wait_ms}
+"""
+
+# Concurrency slots as leases in a sorted set scored by expiry time.
+# Expired leases (crashed workers) are reclaimed before counting.
+# Returns {granted, in_flight} where in_flight counts the new lease if granted.
+CONCURRENCY_ACQUIRE_LUA = """
+local limit = tonumber(ARGV[1])
+local ttl_ms = tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now)
+local in_flight = redis.call('ZCARD', KEYS[1])
+if in_flight < limit then
+    redis.call('ZADD', KEYS[1], now + ttl_ms, ARGV[3])
+    redis.call('PEXPIRE', KEYS[1], ttl_ms)
+    return {1, in_flight + 1}
+end
+return {0, in_flight}
+"""
+
+
+class RateLimitTimeout(TimeoutError):
+    """Raised when a token or concurrency slot could not be acquired in time."""
+
+
+class DistributedRateLimiter:
+    """
+    Fleet-wide token-bucket rate limiter and concurrency limiter keyed by target
+    (warehouse, SQL Server instance, Lambda function).
+
+    State lives in Redis and every check-and-update runs as an atomic Lua script,
+    so all Celery worker processes share the same budget. Any redis-py compatible
+    client can be passed in, including a local stand-in such as fakeredis.
+    """
+
+    # Poll interval bounds while waiting for a concurrency slot
+    MIN_POLL_SECONDS = 0.05
+    MAX_POLL_SECONDS = 2.0
+
+    def __init__(self, redis_client, key_prefix: str = "lazypatch:ratelimit"):
+        self.redis = redis_client
+        self.key_prefix = key_prefix
+        self._token_bucket = redis_client.register_script(TOKEN_BUCKET_LUA)
+        self._concurrency_acquire = redis_client.register_script(CONCURRENCY_ACQUIRE_LUA)
+
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs):
+        import redis
+
+        return cls(redis.Redis.from_url(url), **kwargs)
+
+
+    def acquire_token(self, target: str, policy: RateLimitPolicy, deadline: float):
+        """Blocks until a token is available for target or the deadline passes."""
+        key = f"{self.key_prefix}:bucket:{target}"
+
+        while True:
+            allowed, wait_ms = self._token_bucket(keys=[key], args=[policy.rate, policy.burst])
+            if int(allowed):
+                return
+
+            # Jitter spreads retries so waiting workers don't stampede together
+            wait = int(wait_ms) / 1000 * (1 + random.random() * 0.1)
+            if time.monotonic() + wait > deadline:
+                raise RateLimitTimeout(f"Timed out waiting for rate limit token on {target}")
+            time.sleep(wait)
+
+
+    def try_acquire_slot(self, key: str, limit: int, lease_ttl: int) -> tuple[str | None, int]:
+        """
+        Single non-blocking attempt to take one of `limit` slots under key.
+        Returns (lease id or None, in-flight count).
+        """
+        lease = uuid4().hex
+        granted, in_flight = self._concurrency_acquire(keys=[key], args=[limit, lease_ttl * 1000, lease])
+        return (lease if int(granted) else None), int(in_flight)
+
+
+    def acquire_slot(self, target: str, policy: RateLimitPolicy, deadline: float) -> str:
+        """
+        Blocks until a concurrency slot is granted for target.
+        Returns the lease id to pass to release_slot().
+        """
+        key = f"{self.key_prefix}:slots:{target}"
+        poll = self.MIN_POLL_SECONDS
+
+        while True:
+            lease, _ = self.try_acquire_slot(key, policy.max_concurrency, policy.lease_ttl)
+            if lease:
+                return lease
+
+            if time.monotonic() + poll > deadline:
+                raise RateLimitTimeout(f"Timed out waiting for a concurrency slot on {target}")
+            time.sleep(poll * (1 + random.random() * 0.1))
+            poll = min(poll * 2, self.MAX_POLL_SECONDS)
+
+
+    def release_slot(self, target: str, lease: str):
+        try:
+            self.redis.zrem(f"{self.key_prefix}:slots:{target}", lease)
+        except Exception:
+            # The lease expires on its own after lease_ttl
+            logger.warning("Failed to release concurrency slot on %s", target, exc_info=True)
+
+
+    @contextmanager
+    def limit(self, target: str, policy: RateLimitPolicy):
+        """
+        Wraps a dial-out to target: waits for a rate token, then holds a
+        concurrency slot for the duration of the block.
+        """
+        if not policy.enabled:
+            yield
+            return
+
+        deadline = time.monotonic() + policy.max_wait
+
+        if policy.rate:
+            self.acquire_token(target, policy, deadline)
+
+        if not policy.max_concurrency:
+            yield
+            return
+
+        lease = self.acquire_slot(target, policy, deadline)
+        try:
+            yield
+        finally:
+            self.release_slot(target, lease)
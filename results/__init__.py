@@ -0,0 +1,10 @@
+from .handle import ResultHandle, PageCursor, Page
+from .chunkstore import ChunkWriter, ChunkReader, spill_enabled, spill_max_rows, spill_shared, \
+    sweep_expired
+from .spool import SpoolWriter, SpoolReader, open_result_writer
+from .pager import ResultPager
+
+__all__ = [
+    'ResultHandle', 'PageCursor', 'Page', 'ChunkWriter', 'ChunkReader', 'spill_enabled', 'spill_max_rows',
+    'spill_shared', 'sweep_expired', 'SpoolWriter', 'SpoolReader', 'open_result_writer', 'ResultPager',
+]
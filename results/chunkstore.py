@@ -0,0 +1,286 @@
+from .handle import ResultHandle
+from transport import CompressionSettings, compress_payload, decompress_payload
+import json
+import logging
+import os
+import re
+import shutil
+import socket
+import tempfile
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(f"app.{__name__}")
+
+MANIFEST = "manifest.json"
+# Present while a writer is still filling the directory; touched as it goes
+WRITER_MARKER = "writing"
+# Seconds between touches of the writer marker
+_MARKER_TOUCH_SECONDS = 30.0
+# Chunks are JSON lines in a transport frame (compressed when worth it, see
+# transport.compress_payload); recorded in the manifest
+CHUNK_ENCODING = "lpz"
+# Row-binary spool files (see spool.SpoolWriter)
+ROWS_FILE = "rows.bin"
+OFFSETS_FILE = "offsets.bin"
+
+# What a writer here leaves in spill_root(): uuid4 hex directories holding
+# at least one of these files. Anything else under the root isn't ours.
+_SPILL_DIR_NAME = re.compile(r"^[0-9a-f]{32}$")
+_SPILL_FILE_NAME = re.compile(
+    rf"^(?:{re.escape(MANIFEST)}|{WRITER_MARKER}|{re.escape(ROWS_FILE)}|{re.escape(OFFSETS_FILE)}"
+    r"|chunk-\d{6}\.jsonl(?:\.\w+)?)$"
+)
+
+
+def _chunk_path(location: str, index: int, encoding: str | None) -> str:
+    # Chunks spilled before the encoding was recorded are named .jsonl
+    suffix = f".jsonl.{encoding}" if encoding else ".jsonl"
+    return os.path.join(location, f"chunk-{index:06d}{suffix}")
+
+
+def spill_enabled() -> bool:
+    return os.getenv("RESULT_SPILL_ENABLED", "true").strip().lower() in ['1', 'yes', 'true']
+
+
+def spill_max_rows() -> int:
+    """Upper bound on rows spilled per result set."""
+    return int(os.getenv("RESULT_SPILL_MAX_ROWS", "1000000"))
+
+
+def spill_root() -> str:
+    """
+    Directory result chunks are spilled to. Worker-local by default, in which
+    case pages are served by the spilling host; point RESULT_SPILL_DIR at
+    shared storage (and set RESULT_SPILL_SHARED) to page from any host.
+    """
+    return os.getenv("RESULT_SPILL_DIR", os.path.join(tempfile.gettempdir(), "lazy-patch-results"))
+
+
+def spill_shared() -> bool:
+    """RESULT_SPILL_SHARED=true: spill_root() is visible to every worker host."""
+    return os.getenv("RESULT_SPILL_SHARED", "false").strip().lower() in ['1', 'yes', 'true']
+
+
+def spill_ttl() -> int:
+    """Seconds a spilled result is kept; defaults to Celery's result_expires."""
+    return int(os.getenv("RESULT_SPILL_TTL_SECONDS", "3600"))
+
+
+class WriterMarker:
+    """
+    Marks a spill directory as in progress. Writers touch it while they
+    stream rows, so sweep_expired() leaves live writers alone and only
+    reclaims directories whose writer stopped touching it (crashed).
+    """
+
+    def __init__(self, location: str):
+        self.path = os.path.join(location, WRITER_MARKER)
+        self._touched = 0.0
+        self.touch(force=True)
+
+
+    def touch(self, force: bool = False):
+        now = time.monotonic()
+        if force or now - self._touched >= _MARKER_TOUCH_SECONDS:
+            with open(self.path, "a"):
+                os.utime(self.path)
+            self._touched = now
+
+
+    def remove(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def _is_spill_dir(entry: os.DirEntry) -> bool:
+    """Whether a spill_root() entry is a result directory a writer here created."""
+    if not _SPILL_DIR_NAME.match(entry.name) or not entry.is_dir(follow_symlinks=False):
+        return False
+    try:
+        with os.scandir(entry.path) as files:
+            return any(_SPILL_FILE_NAME.match(f.name) for f in files)
+    except OSError:
+        return False
+
+
+def sweep_expired(root: str | None = None, now: float | None = None) -> int:
+    """
+    Deletes spilled results past their expiry. Directories without a
+    manifest expire spill_ttl() after their writer last touched its marker
+    (or, without one, after the directory was last modified), so only
+    writers that died mid-way are reclaimed. Only directories a writer
+    created are considered (_is_spill_dir), so pointing RESULT_SPILL_DIR at
+    a shared path never deletes anything else. Returns the number removed.
+    """
+    root = root or spill_root()
+    now = now or time.time()
+    removed = 0
+
+    try:
+        entries = list(os.scandir(root))
+    except FileNotFoundError:
+        return 0
+
+    for entry in entries:
+        if not _is_spill_dir(entry):
+            continue
+        try:
+            with open(os.path.join(entry.path, MANIFEST), encoding="utf-8") as f:
+                expires_at = json.load(f).get("expires_at")
+        except (OSError, ValueError):
+            expires_at = None
+
+        if expires_at is None:
+            try:
+                marker = os.path.join(entry.path, WRITER_MARKER)
+                modified = os.stat(marker).st_mtime if os.path.exists(marker) else entry.stat().st_mtime
+                expires_at = modified + spill_ttl()
+            except FileNotFoundError:
+                continue
+
+        if expires_at <= now:
+            shutil.rmtree(entry.path, ignore_errors=True)
+            removed += 1
+
+    if removed:
+        logger.info("Removed %d expired spilled result(s) from %s", removed, root)
+    return removed
+
+
+_last_sweep = 0.0
+_sweep_lock = threading.Lock()
+
+
+def maybe_sweep_expired(root: str | None = None):
+    """Runs sweep_expired at most once per RESULT_SPILL_SWEEP_INTERVAL seconds per process."""
+    global _last_sweep
+
+    interval = float(os.getenv("RESULT_SPILL_SWEEP_INTERVAL", "60"))
+    with _sweep_lock:
+        if time.monotonic() - _last_sweep < interval:
+            return
+        _last_sweep = time.monotonic()
+
+    try:
+        sweep_expired(root)
+    except Exception:
+        logger.warning("Sweeping expired spilled results failed", exc_info=True)
+
+
+class ChunkWriter:
+    """
+    Writes a result set as fixed-size JSON-lines chunk files plus a manifest.
+    Fixed chunk sizes let readers seek to any row range by arithmetic; each
+    chunk is compressed with the transport codec when above the threshold.
+    """
+
+    def __init__(self, columns: list[str], chunk_rows: int | None = None, root: str | None = None):
+        self.columns = columns
+        self.chunk_rows = chunk_rows or int(os.getenv("RESULT_CHUNK_ROWS", "10000"))
+        self.location = os.path.join(root or spill_root(), uuid.uuid4().hex)
+        self.total_rows = 0
+        self._buffer: list = []
+        self._chunk_index = 0
+        self._compression = CompressionSettings.from_env()
+        maybe_sweep_expired(root)
+        os.makedirs(self.location, exist_ok=True)
+        self._marker = WriterMarker(self.location)
+
+
+    def write_rows(self, rows):
+        self._marker.touch()
+        for row in rows:
+            # Chunks store {column: value} records
+            self._buffer.append(row if isinstance(row, dict) else dict(zip(self.columns, row)))
+            if len(self._buffer) >= self.chunk_rows:
+                self._flush()
+
+
+    def _flush(self):
+        if not self._buffer:
+            return
+
+        path = _chunk_path(self.location, self._chunk_index, CHUNK_ENCODING)
+        body = "".join(json.dumps(row, default=str) + "\n" for row in self._buffer)
+
+        # Chunks are compressed as a whole with the transport codec
+        with open(path, "wb") as f:
+            f.write(compress_payload(body.encode("utf-8"), self._compression))
+
+        self.total_rows += len(self._buffer)
+        self._chunk_index += 1
+        self._buffer = []
+
+
+    def close(self) -> ResultHandle:
+        """Flushes the last chunk, writes the manifest and returns the handle."""
+        self._flush()
+
+        now = time.time()
+        manifest = {
+            "columns": self.columns,
+            "total_rows": self.total_rows,
+            "chunk_rows": self.chunk_rows,
+            "encoding": CHUNK_ENCODING,
+            "created_at": now,
+            "expires_at": now + spill_ttl(),
+        }
+        with open(os.path.join(self.location, MANIFEST), "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        self._marker.remove()
+
+        logger.info("Spilled %d rows to %s", self.total_rows, self.location)
+        return ResultHandle(
+            kind="chunks",
+            columns=self.columns,
+            total_rows=self.total_rows,
+            location=self.location,
+            host=socket.gethostname(),
+        )
+
+
+    def abort(self):
+        shutil.rmtree(self.location, ignore_errors=True)
+
+
+class ChunkReader:
+    """Reads row ranges from a ChunkWriter directory, touching only the chunks it needs."""
+
+    def __init__(self, location: str):
+        manifest_path = os.path.join(location, MANIFEST)
+        if not os.path.exists(manifest_path):
+            raise FileNotFoundError(
+                f"Result chunks not found at {location} (expired, or spilled on another host)"
+            )
+
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+
+        self.location = location
+        self.chunk_rows = manifest["chunk_rows"]
+        self.total_rows = manifest["total_rows"]
+        self.encoding = manifest.get("encoding")
+
+
+    def read_range(self, start: int, stop: int) -> list:
+        stop = min(stop, self.total_rows)
+        rows = []
+
+        position = start
+        while position < stop:
+            chunk_index, skip = divmod(position, self.chunk_rows)
+            take = min(self.chunk_rows - skip, stop - position)
+
+            path = _chunk_path(self.location, chunk_index, self.encoding)
+            with open(path, "rb") as f:
+                lines = decompress_payload(f.read()).splitlines()
+
+            rows.extend(json.loads(line) for line in lines[skip:skip + take])
+
+            position += take
+
+        return rows
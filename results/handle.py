@@ -0,0 +1,64 @@
+from pydantic import BaseModel
+from typing import Literal
+import base64
+import json
+
+
+class ResultHandle(BaseModel):
+    """
+    Points at the full output of one result set of a completed job, so callers
+    can page through it instead of receiving it as one ResponseModel blob.
+
+    - "snowflake_query": re-read from the result batches of query_id while the result is cached
+    - "chunks": row chunk files spilled by the worker (see ChunkWriter)
+    - "spool": row-binary files spooled by the worker (see SpoolWriter)
+    """
+    kind: Literal["snowflake_query", "chunks", "spool"]
+    columns: list[str]
+    total_rows: int
+    query_id: str | None = None
+    location: str | None = None
+    host: str | None = None
+    # Spooled rows are stored as values; pages turn them into {column: value} records
+    records: bool = False
+
+    @property
+    def host_local(self) -> bool:
+        """Whether only the worker on `host` can read this result."""
+        return self.kind in ("chunks", "spool") and self.host is not None
+
+
+class PageCursor(BaseModel):
+    """
+    Position in a result. Self-contained, so a client can resume with just
+    the token after a disconnect, and ranges can be read in parallel.
+    """
+    handle: ResultHandle
+    offset: int = 0
+    # Exclusive end of the range this cursor walks (None means the end of the result)
+    end: int | None = None
+    # Snowflake results: result batch holding `offset`, and the row within it,
+    # so the next page reads from there instead of locating it again
+    batch: int | None = None
+    batch_offset: int | None = None
+
+    def encode(self) -> str:
+        raw = json.dumps(self.model_dump(exclude_none=True), separators=(",", ":"))
+        return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+    @classmethod
+    def decode(cls, token: str):
+        return cls.model_validate_json(base64.urlsafe_b64decode(token.encode("ascii")))
+
+    @property
+    def stop(self) -> int:
+        return self.handle.total_rows if self.end is None else min(self.end, self.handle.total_rows)
+
+
+class Page(BaseModel):
+    columns: list[str]
+    rows: list
+    offset: int
+    total_rows: int
+    # None once the cursor's range is exhausted
+    next_cursor: str | None = None
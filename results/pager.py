@@ -0,0 +1,132 @@
+from .chunkstore import ChunkReader
+from .spool import SpoolReader
+from .handle import Page, PageCursor, ResultHandle
+import itertools
+import logging
+
+logger = logging.getLogger(f"app.{__name__}")
+
+
+class ResultPager:
+    """
+    Serves pages of a completed job's result by cursor token.
+
+    Cursors are self-contained, so clients pull at their own pace, resume
+    after a disconnect from the last token, and split a result into ranges
+    (split()) that are read in parallel.
+    """
+
+    DEFAULT_PAGE_SIZE = 1000
+
+    def start(self, handle: ResultHandle | dict) -> str:
+        """Cursor token for the beginning of a result."""
+        return PageCursor(handle=ResultHandle.model_validate(handle)).encode()
+
+
+    def split(self, handle: ResultHandle | dict, parts: int) -> list[str]:
+        """Cursor tokens for `parts` disjoint ranges covering the whole result."""
+        handle = ResultHandle.model_validate(handle)
+        parts = max(1, min(parts, handle.total_rows or 1))
+        step = -(-handle.total_rows // parts)
+
+        return [
+            PageCursor(handle=handle, offset=start, end=min(start + step, handle.total_rows)).encode()
+            for start in range(0, max(handle.total_rows, 1), step or 1)
+        ]
+
+
+    def fetch_page(self, token: str, page_size: int | None = None) -> Page:
+        cursor = PageCursor.decode(token)
+        page_size = page_size or self.DEFAULT_PAGE_SIZE
+
+        stop = min(cursor.offset + page_size, cursor.stop)
+        position = {}
+        if cursor.handle.kind == "snowflake_query" and cursor.offset < stop:
+            rows, batch, batch_offset = self._read_result_batches(
+                cursor.handle, cursor.offset, stop, cursor.batch, cursor.batch_offset or 0
+            )
+            position = {"batch": batch, "batch_offset": batch_offset}
+        else:
+            rows = self.read_range(cursor.handle, cursor.offset, stop)
+
+        next_cursor = None
+        if stop < cursor.stop:
+            next_cursor = PageCursor(handle=cursor.handle, offset=stop, end=cursor.end, **position).encode()
+
+        return Page(
+            columns=cursor.handle.columns,
+            rows=rows,
+            offset=cursor.offset,
+            total_rows=cursor.handle.total_rows,
+            next_cursor=next_cursor,
+        )
+
+
+    def read_range(self, handle: ResultHandle, start: int, stop: int) -> list:
+        if start >= stop:
+            return []
+
+        if handle.kind == "chunks":
+            return ChunkReader(handle.location).read_range(start, stop)
+
+        if handle.kind == "spool":
+            with SpoolReader(handle.location) as reader:
+                rows = reader.read_range(start, stop)
+            if handle.records:
+                return [dict(zip(handle.columns, row)) for row in rows]
+            return rows
+
+        if handle.kind == "snowflake_query":
+            return self._read_result_batches(handle, start, stop)[0]
+
+        raise ValueError(f"Unsupported result handle kind: {handle.kind}")
+
+
+    @staticmethod
+    def _locate(batches: list, offset: int) -> tuple[int, int]:
+        """(batch index, row within it) of a result row, from the batches' row counts."""
+        for index, batch in enumerate(batches):
+            if offset < batch.rowcount:
+                return index, offset
+            offset -= batch.rowcount
+        return len(batches), 0
+
+
+    def _read_result_batches(self, handle: ResultHandle, start: int, stop: int, batch: int | None = None,
+                             batch_offset: int = 0) -> tuple[list, int, int]:
+        """
+        Reads rows [start, stop) of a cached Snowflake result from its result
+        batches, the files Snowflake stored the result in, in the query's
+        order. Nothing is re-run or sorted: a page costs the download of the
+        one or two batches it spans. (batch, batch_offset) is where start
+        lies when the previous page left it in the cursor; otherwise it's
+        found from the batches' row counts.
+        Returns the rows and the (batch, batch_offset) position of stop.
+        """
+        # Imported here: the connection package itself writes result handles
+        from connection import SnowflakeConnection
+        from connection_config import SnowflakeConfig
+
+        connection = SnowflakeConnection(connection_config=SnowflakeConfig.from_env())
+        rows = []
+
+        with connection.pooled_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.get_results_from_sfqid(handle.query_id)
+                batches = cursor.get_result_batches() or []
+
+                if batch is None:
+                    batch, batch_offset = self._locate(batches, start)
+
+                while len(rows) < stop - start and batch < len(batches):
+                    wanted = stop - start - len(rows)
+                    taken = list(itertools.islice(iter(batches[batch]), batch_offset, batch_offset + wanted))
+                    rows.extend(taken)
+                    batch_offset += len(taken)
+                    if batch_offset >= batches[batch].rowcount or not taken:
+                        batch, batch_offset = batch + 1, 0
+            finally:
+                cursor.close()
+
+        return rows, batch, batch_offset
@@ -0,0 +1,103 @@
+"""
+Compact row-binary encoding for spooled results.
+
+Every value is a one byte type tag followed by its payload (little endian):
+fixed 8 bytes for ints and floats, a uint32 length plus bytes for text and
+binary. Temporal and decimal values keep their type through ISO / str text,
+so rows read back as the same Python values the driver returned.
+"""
+
+from datetime import date, datetime, time as dtime
+from decimal import Decimal
+import struct
+
+_NONE, _FALSE, _TRUE, _INT, _FLOAT, _STR, _BYTES, _BIGINT, _DECIMAL, _DATETIME, _DATE, _TIME = range(12)
+
+_I64 = struct.Struct("<q")
+_F64 = struct.Struct("<d")
+_U32 = struct.Struct("<I")
+
+_INT_MIN, _INT_MAX = -2 ** 63, 2 ** 63 - 1
+
+_TEXT_DECODERS = {
+    _STR: str,
+    _BIGINT: int,
+    _DECIMAL: Decimal,
+    _DATETIME: datetime.fromisoformat,
+    _DATE: date.fromisoformat,
+    _TIME: dtime.fromisoformat,
+}
+
+
+def _put_text(out: bytearray, tag: int, data: bytes):
+    out.append(tag)
+    out += _U32.pack(len(data))
+    out += data
+
+
+def encode_row(row, out: bytearray):
+    """Appends one encoded row to out."""
+    for value in row:
+        if value is None:
+            out.append(_NONE)
+        elif value is True:
+            out.append(_TRUE)
+        elif value is False:
+            out.append(_FALSE)
+        elif isinstance(value, int):
+            if _INT_MIN <= value <= _INT_MAX:
+                out.append(_INT)
+                out += _I64.pack(value)
+            else:
+                _put_text(out, _BIGINT, str(value).encode("ascii"))
+        elif isinstance(value, float):
+            out.append(_FLOAT)
+            out += _F64.pack(value)
+        elif isinstance(value, str):
+            _put_text(out, _STR, value.encode("utf-8"))
+        elif isinstance(value, (bytes, bytearray, memoryview)):
+            _put_text(out, _BYTES, bytes(value))
+        elif isinstance(value, Decimal):
+            _put_text(out, _DECIMAL, str(value).encode("ascii"))
+        # datetime before date: datetime is a date subclass
+        elif isinstance(value, datetime):
+            _put_text(out, _DATETIME, value.isoformat().encode("ascii"))
+        elif isinstance(value, date):
+            _put_text(out, _DATE, value.isoformat().encode("ascii"))
+        elif isinstance(value, dtime):
+            _put_text(out, _TIME, value.isoformat().encode("ascii"))
+        else:
+            # Anything else (UUID, driver specific types) is kept as text, like json default=str
+            _put_text(out, _STR, str(value).encode("utf-8"))
+
+
+def decode_row(buffer, position: int, end: int) -> tuple:
+    """Decodes the row stored in buffer[position:end] (bytes, mmap or memoryview)."""
+    values = []
+    while position < end:
+        tag = buffer[position]
+        position += 1
+
+        if tag == _NONE:
+            values.append(None)
+        elif tag == _TRUE:
+            values.append(True)
+        elif tag == _FALSE:
+            values.append(False)
+        elif tag == _INT:
+            values.append(_I64.unpack_from(buffer, position)[0])
+            position += 8
+        elif tag == _FLOAT:
+            values.append(_F64.unpack_from(buffer, position)[0])
+            position += 8
+        else:
+            length = _U32.unpack_from(buffer, position)[0]
+            position += 4
+            data = bytes(buffer[position:position + length])
+            position += length
+            if tag == _BYTES:
+                values.append(data)
+            else:
+                values.append(_TEXT_DECODERS[tag](data.decode("utf-8")))
+
+    return tuple(values)
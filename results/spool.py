@@ -0,0 +1,208 @@
+from .handle import ResultHandle
+from .rowformat import encode_row, decode_row
+from .chunkstore import MANIFEST, OFFSETS_FILE, ROWS_FILE, ChunkWriter, WriterMarker, spill_root, spill_ttl, \
+    maybe_sweep_expired
+from array import array
+import json
+import logging
+import mmap
+import os
+import shutil
+import socket
+import time
+import uuid
+
+logger = logging.getLogger(f"app.{__name__}")
+
+
+def spool_memory_budget() -> int:
+    """Bytes of encoded rows a writer buffers before spilling them to disk."""
+    return int(os.getenv("RESULT_SPOOL_MEMORY_BYTES", str(8 * 1024 * 1024)))
+
+
+class SpoolWriter:
+    """
+    Streams a result set to a worker-local directory in the row-binary
+    format (see rowformat): rows.bin holds the encoded rows back to back,
+    offsets.bin one uint64 start offset per row plus the end offset.
+
+    Encoded rows are buffered until memory_budget bytes, then appended to
+    the files, so the writer's footprint stays bounded however many rows
+    the driver streams into it.
+    """
+
+    def __init__(self, columns: list[str], records: bool = False, memory_budget: int | None = None,
+                 root: str | None = None, chunk_rows: int | None = None):
+        self.columns = columns
+        self.records = records
+        self.memory_budget = memory_budget or spool_memory_budget()
+        # Rows requested from the driver per round trip
+        self.chunk_rows = chunk_rows or int(os.getenv("RESULT_CHUNK_ROWS", "10000"))
+        self.location = os.path.join(root or spill_root(), uuid.uuid4().hex)
+        self.total_rows = 0
+        self._written = 0
+        self._buffer = bytearray()
+        self._offsets = array("Q")
+
+        maybe_sweep_expired(root)
+        os.makedirs(self.location, exist_ok=True)
+        self._marker = WriterMarker(self.location)
+        self._rows_file = open(os.path.join(self.location, ROWS_FILE), "wb")
+        self._offsets_file = open(os.path.join(self.location, OFFSETS_FILE), "wb")
+
+
+    def write_rows(self, rows):
+        self._marker.touch()
+        for row in rows:
+            self._offsets.append(self._written + len(self._buffer))
+            encode_row(row, self._buffer)
+            self.total_rows += 1
+
+            if len(self._buffer) + self._offsets.itemsize * len(self._offsets) >= self.memory_budget:
+                self._flush()
+
+
+    def _flush(self):
+        self._rows_file.write(self._buffer)
+        self._offsets.tofile(self._offsets_file)
+        self._written += len(self._buffer)
+        self._buffer = bytearray()
+        self._offsets = array("Q")
+
+
+    def close(self) -> ResultHandle:
+        """Flushes buffered rows, writes the end offset and manifest, returns the handle."""
+        self._offsets.append(self._written + len(self._buffer))
+        self._flush()
+        self._rows_file.close()
+        self._offsets_file.close()
+
+        now = time.time()
+        manifest = {
+            "format": "spool",
+            "columns": self.columns,
+            "total_rows": self.total_rows,
+            "records": self.records,
+            "created_at": now,
+            "expires_at": now + spill_ttl(),
+        }
+        with open(os.path.join(self.location, MANIFEST), "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        self._marker.remove()
+
+        logger.info("Spooled %d rows (%d bytes) to %s", self.total_rows, self._written, self.location)
+        return ResultHandle(
+            kind="spool",
+            columns=self.columns,
+            total_rows=self.total_rows,
+            location=self.location,
+            host=socket.gethostname(),
+            records=self.records,
+        )
+
+
+    def abort(self):
+        for f in (self._rows_file, self._offsets_file):
+            f.close()
+        shutil.rmtree(self.location, ignore_errors=True)
+
+
+def _map(path: str) -> mmap.mmap | None:
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return None
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class SpoolReader:
+    """
+    Memory-mapped reader for a SpoolWriter directory.
+
+    Rows are located through the offsets index, so any row range is one
+    slice of the mapped file: range_view() hands out the encoded bytes
+    without copying, read_range() decodes just the requested rows. Pages
+    come from the OS page cache instead of the worker's heap.
+
+    Views must be released before close() (or leaving the with block).
+    """
+
+    def __init__(self, location: str):
+        manifest_path = os.path.join(location, MANIFEST)
+        if not os.path.exists(manifest_path):
+            raise FileNotFoundError(
+                f"Spooled result not found at {location} (expired, or spilled on another host)"
+            )
+
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+
+        self.location = location
+        self.columns = manifest["columns"]
+        self.total_rows = manifest["total_rows"]
+        self.records = manifest.get("records", False)
+
+        self._rows_map = _map(os.path.join(location, ROWS_FILE))
+        self._offsets_map = _map(os.path.join(location, OFFSETS_FILE))
+        self._rows = memoryview(self._rows_map) if self._rows_map is not None else memoryview(b"")
+        self._offsets = memoryview(self._offsets_map).cast("Q")
+
+
+    def __len__(self) -> int:
+        return self.total_rows
+
+
+    def _bounds(self, start: int, stop: int) -> tuple[int, int]:
+        start = max(0, min(start, self.total_rows))
+        stop = max(start, min(stop, self.total_rows))
+        return start, stop
+
+
+    def range_view(self, start: int, stop: int) -> memoryview:
+        """Encoded bytes of rows [start, stop) as a zero-copy view of the mapped file."""
+        start, stop = self._bounds(start, stop)
+        return self._rows[self._offsets[start]:self._offsets[stop]]
+
+
+    def offsets_view(self, start: int, stop: int) -> memoryview:
+        """Row offsets for [start, stop], relative to the start of rows.bin."""
+        start, stop = self._bounds(start, stop)
+        return self._offsets[start:stop + 1]
+
+
+    def read_range(self, start: int, stop: int) -> list[tuple]:
+        start, stop = self._bounds(start, stop)
+        offsets = self._offsets
+        return [decode_row(self._rows, offsets[i], offsets[i + 1]) for i in range(start, stop)]
+
+
+    def close(self):
+        self._offsets.release()
+        self._rows.release()
+        for mapped in (self._offsets_map, self._rows_map):
+            if mapped is not None:
+                mapped.close()
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_result_writer(columns: list[str], records: bool = False):
+    """
+    Writer connectors stream overflow rows into (write_rows / close / abort).
+    RESULT_SPILL_FORMAT picks the format: "chunks" (default) compresses
+    JSON-lines chunks with the transport codec, so spills stay small on disk;
+    "spool" writes uncompressed row-binary files that keep value types and
+    page through mmap without decoding whole chunks, at several times the
+    disk footprint.
+
+    Only SQL Server spills through here. Snowflake keeps MAX_ROW_SIZE rows
+    inline and leaves the rest in its result cache, paged from its result batches.
+    """
+    if os.getenv("RESULT_SPILL_FORMAT", "chunks").strip().lower() == "spool":
+        return SpoolWriter(columns, records=records)
+    return ChunkWriter(columns)
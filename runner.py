@@ -1,12 +1,50 @@
 from tasks import run_job
+from celery_app import DEFAULT_QUEUE, HEAVY_QUEUE
+from scheduling import CostAwareScheduler, FairShareDispatcher
+from ingest import JobFileReader, feed_dispatcher
+from tracing import tracer
 from dotenv import load_dotenv
 import logging
+import os
+import sys
 
 load_dotenv()
 
 logger = logging.getLogger("app")
 
+def dispatch_file(path: str, scheduler: CostAwareScheduler, dispatcher: FairShareDispatcher) -> int:
+    """
+    Streams a JSONL job file into the dispatcher. Handles aren't kept,
+    so millions of jobs don't pile up in this process.
+    """
+    reader = JobFileReader(path, batch_size=int(os.getenv("INGEST_BATCH_SIZE", "1000")))
+    sent = feed_dispatcher(
+        reader.batches(),
+        dispatcher,
+        scheduler=scheduler,
+        max_pending=int(os.getenv("INGEST_MAX_PENDING", "10000")),
+        on_sent=lambda handle: logger.debug("Dispatched task %s", handle.id),
+    )
+    logger.info("Dispatched %d job(s) from %s: %s", sent, path, reader.stats)
+    return sent
+
+
+def send(job: dict, queue: str | None):
+    # The task header carries this span's context (see tasks._inject_trace_context)
+    with tracer.start_span("dispatch", {
+        "job.name": job.get("job_name"), "db.system": job.get("connection_type"), "celery.queue": queue,
+    }, kind="producer") as span:
+        handle = run_job.apply_async(args=[job], queue=queue)
+        span.set_attribute("celery.task_id", handle.id)
+        return handle
+
+
 def main():
+    with tracer.start_span("runner.main"):
+        _main()
+
+
+def _main():
 
     jobs = [
         {
@@ -17,11 +55,25 @@ def main():
         }
     ]
 
-    results = []
+    # Shortest expected jobs first; predicted-heavy jobs go to their own queue
+    scheduler = CostAwareScheduler.from_env(DEFAULT_QUEUE, HEAVY_QUEUE)
+
+    # Per-owner virtual queues in front of the broker so one owner's
+    # bulk submission can't starve everyone else
+    dispatcher = FairShareDispatcher(
+        send=send
+    )
+
+    # JSONL job file: python runner.py jobs.jsonl (or JOBS_FILE=...)
+    jobs_file = sys.argv[1] if len(sys.argv) > 1 else os.getenv("JOBS_FILE")
+    if jobs_file:
+        dispatch_file(jobs_file, scheduler, dispatcher)
+        return
+
+    for job, queue in scheduler.plan(jobs):
+        dispatcher.submit(job, queue=queue)
 
-    for job in jobs:
-        async_result = run_job.delay(job)
-        results.append(async_result)
+    results = dispatcher.run_until_empty()
 
     logger.info("Jobs dispatched")
 
@@ -0,0 +1,4 @@
+from .costaware import CostAwareScheduler
+from .fairshare import FairSharePolicy, FairShareDispatcher
+
+__all__ = ['CostAwareScheduler', 'FairSharePolicy', 'FairShareDispatcher']
\ No newline at end of file
@@ -0,0 +1,261 @@
+from collections import deque
+from pydantic import BaseModel
+from typing import Callable, Dict
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(f"app.{__name__}")
+
+# Owner used for jobs submitted without created_by
+ANONYMOUS_OWNER = "anonymous"
+
+
+def _parse_owner_map(value: str | None) -> dict:
+    """Parses 'alice=4,backfill=1' into {'alice': '4', 'backfill': '1'}."""
+    if not value:
+        return {}
+    pairs = (item.split("=", 1) for item in value.split(",") if "=" in item)
+    return {owner.strip(): amount.strip() for owner, amount in pairs}
+
+
+class FairSharePolicy(BaseModel):
+    # Relative share of dispatch slots per owner
+    weights: Dict[str, float] = {}
+    default_weight: float = 1.0
+    # Per-owner cap on jobs sitting in the broker / running
+    max_in_flight: Dict[str, int] = {}
+    default_max_in_flight: int = 16
+    # Total jobs released to the broker at once; keeping this near worker
+    # concurrency is what keeps the backlog here, where it can be shared fairly
+    max_total_in_flight: int = 32
+    # Deficit added per round, multiplied by the owner's weight
+    quantum: float = 1.0
+
+    @classmethod
+    def from_env(cls):
+        """
+        FAIR_SHARE_WEIGHTS="alice=4,backfill=1"
+        FAIR_SHARE_MAX_IN_FLIGHT="backfill=8"
+        FAIR_SHARE_DEFAULT_MAX_IN_FLIGHT, FAIR_SHARE_MAX_TOTAL_IN_FLIGHT
+        """
+        values = {
+            "weights": _parse_owner_map(os.getenv("FAIR_SHARE_WEIGHTS")),
+            "max_in_flight": _parse_owner_map(os.getenv("FAIR_SHARE_MAX_IN_FLIGHT")),
+            "default_max_in_flight": os.getenv("FAIR_SHARE_DEFAULT_MAX_IN_FLIGHT"),
+            "max_total_in_flight": os.getenv("FAIR_SHARE_MAX_TOTAL_IN_FLIGHT"),
+        }
+        return cls(**{k: v for k, v in values.items() if v is not None})
+
+    def weight_for(self, owner: str) -> float:
+        return self.weights.get(owner, self.default_weight)
+
+    def max_in_flight_for(self, owner: str) -> int:
+        return self.max_in_flight.get(owner, self.default_max_in_flight)
+
+
+class _Reservation:
+    """In-flight slot held for a job between picking it and sending it."""
+
+    @staticmethod
+    def ready() -> bool:
+        return False
+
+
+class FairShareDispatcher:
+    """
+    Fair-share layer in front of the Celery broker.
+
+    Jobs are held in one virtual queue per owner (Job.created_by) and released
+    with deficit round robin: every round each owner earns quantum * weight
+    credit and spends one credit per dispatched job. Per-owner and total
+    in-flight caps keep the broker queue short, so a newly submitted
+    interactive job waits behind at most one round instead of behind
+    another owner's entire backfill.
+
+    `send(job_payload, queue)` hands a job to the broker and must return a
+    handle with `ready()` (a Celery AsyncResult).
+    """
+
+    def __init__(self, send: Callable, policy: FairSharePolicy | None = None, poll_interval: float = 0.5):
+        self.send = send
+        self.policy = policy or FairSharePolicy.from_env()
+        self.poll_interval = poll_interval
+
+        self._lock = threading.Lock()
+        self._queues: Dict[str, deque] = {}
+        self._deficit: Dict[str, float] = {}
+        self._in_flight: Dict[str, list] = {}
+        # Owners with pending work, in round-robin order
+        self._active: deque = deque()
+        # Earliest time the next _reap() polls the in-flight handles
+        self._next_reap = 0.0
+
+
+    def submit(self, job_payload: dict, queue: str | None = None):
+        owner = job_payload.get("created_by") or ANONYMOUS_OWNER
+
+        with self._lock:
+            if owner not in self._queues or not self._queues[owner]:
+                self._queues.setdefault(owner, deque())
+                self._deficit[owner] = 0.0
+                self._active.append(owner)
+            self._queues[owner].append((job_payload, queue))
+
+
+    @property
+    def pending(self) -> int:
+        with self._lock:
+            return sum(len(q) for q in self._queues.values())
+
+
+    @property
+    def in_flight(self) -> int:
+        with self._lock:
+            return sum(len(handles) for handles in self._in_flight.values())
+
+
+    def _reap(self):
+        """
+        Drops finished jobs from the in-flight accounting. ready() may ask
+        the result backend, so it's called outside the lock, and at most
+        once per poll_interval however often dispatch() runs.
+        """
+        now = time.monotonic()
+        if now < self._next_reap:
+            return
+        self._next_reap = now + self.poll_interval
+
+        with self._lock:
+            handles = [h for owned in self._in_flight.values() for h in owned]
+
+        finished = {id(h) for h in handles if h.ready()}
+        if not finished:
+            return
+
+        with self._lock:
+            for owner, owned in self._in_flight.items():
+                self._in_flight[owner] = [h for h in owned if id(h) not in finished]
+
+
+    def _pick(self) -> list:
+        """
+        Runs deficit round robin rounds under the lock until the caps are
+        reached or no owner can release more, and returns the jobs released
+        as (owner, job_payload, queue, reservation); each reservation holds
+        the job's in-flight slot until it is sent.
+        """
+        picked = []
+
+        with self._lock:
+            total = sum(len(handles) for handles in self._in_flight.values())
+
+            while total < self.policy.max_total_in_flight and self._can_release():
+                for owner in list(self._active):
+                    if total >= self.policy.max_total_in_flight:
+                        break
+
+                    queue = self._queues[owner]
+                    handles = self._in_flight.setdefault(owner, [])
+                    cap = self.policy.max_in_flight_for(owner)
+
+                    # Capped owners don't bank credit while they wait
+                    if len(handles) >= cap:
+                        continue
+
+                    self._deficit[owner] += self.policy.quantum * self.policy.weight_for(owner)
+
+                    while queue and self._deficit[owner] >= 1 and len(handles) < cap \
+                            and total < self.policy.max_total_in_flight:
+                        job_payload, target_queue = queue.popleft()
+                        reservation = _Reservation()
+                        handles.append(reservation)
+                        picked.append((owner, job_payload, target_queue, reservation))
+                        self._deficit[owner] -= 1
+                        total += 1
+
+                    if not queue:
+                        self._active.remove(owner)
+                        self._deficit[owner] = 0.0
+
+                # Rotate so the next round starts with a different owner
+                if self._active:
+                    self._active.rotate(-1)
+
+        return picked
+
+
+    def _can_release(self) -> bool:
+        """Whether any owner with pending jobs is below its cap (call under the lock)."""
+        return any(
+            len(self._in_flight.get(owner, ())) < self.policy.max_in_flight_for(owner)
+            and self.policy.quantum * self.policy.weight_for(owner) > 0
+            for owner in self._active
+        )
+
+
+    def _settle(self, owner: str, reservation, handle=None):
+        """Swaps a reservation for the broker handle, or frees it."""
+        with self._lock:
+            handles = self._in_flight[owner]
+            index = next(i for i, h in enumerate(handles) if h is reservation)
+            if handle is None:
+                del handles[index]
+            else:
+                handles[index] = handle
+
+
+    def _requeue(self, unsent: list):
+        """Puts jobs that weren't sent back at the head of their owners' queues."""
+        with self._lock:
+            for owner, job_payload, target_queue, _ in reversed(unsent):
+                queue = self._queues[owner]
+                if not queue and owner not in self._active:
+                    self._active.appendleft(owner)
+                queue.appendleft((job_payload, target_queue))
+
+
+    def dispatch(self) -> list:
+        """
+        Releases jobs by deficit round robin until the in-flight caps are
+        reached or the queues are empty.
+        Returns the handles of the jobs sent to the broker.
+
+        The rounds are decided under the lock; the broker calls happen outside
+        it, so submit() and the pending / in_flight counters never wait on
+        the broker.
+        """
+        self._reap()
+        picked = self._pick()
+        sent = []
+
+        for i, (owner, job_payload, target_queue, reservation) in enumerate(picked):
+            try:
+                handle = self.send(job_payload, target_queue)
+            except Exception:
+                # Free the slots of this and the remaining jobs and keep them queued
+                for item in picked[i:]:
+                    self._settle(item[0], item[3])
+                self._requeue(picked[i:])
+                raise
+            self._settle(owner, reservation, handle)
+            sent.append(handle)
+
+        if sent:
+            logger.debug("Fair-share dispatch sent %d job(s), %d pending", len(sent), self.pending)
+        return sent
+
+
+    def run_until_empty(self) -> list:
+        """
+        Dispatches rounds until every virtual queue is drained.
+        Returns all handles in dispatch order.
+        """
+        dispatched = []
+        while self.pending:
+            sent = self.dispatch()
+            dispatched.extend(sent)
+            if not sent:
+                time.sleep(self.poll_interval)
+        return dispatched
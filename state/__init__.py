@@ -0,0 +1,3 @@
+from .watermarkstore import WatermarkStore, WatermarkConflict, watermark_store
+
+__all__ = ['WatermarkStore', 'WatermarkConflict', 'watermark_store']
\ No newline at end of file
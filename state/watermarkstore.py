@@ -0,0 +1,125 @@
+from datetime import date, datetime, time as dtime
+from decimal import Decimal
+import json
+import logging
+import os
+import sqlite3
+import threading
+
+logger = logging.getLogger(f"app.{__name__}")
+
+
+# Watermark values round-trip through SQLite as (type tag, text)
+_DECODERS = {
+    "int": int,
+    "float": float,
+    "decimal": Decimal,
+    "str": str,
+    "datetime": datetime.fromisoformat,
+    "date": date.fromisoformat,
+    "time": dtime.fromisoformat,
+}
+
+
+def _encode(value) -> str:
+    # datetime before date: datetime is a date subclass
+    for tag, kind in (("datetime", datetime), ("date", date), ("time", dtime), ("decimal", Decimal),
+                      ("int", int), ("float", float), ("str", str)):
+        if isinstance(value, kind) and not isinstance(value, bool):
+            text = value.isoformat() if hasattr(value, "isoformat") else str(value)
+            return json.dumps({"type": tag, "value": text})
+    raise TypeError(f"Unsupported watermark type: {type(value).__name__}")
+
+
+def _decode(raw: str):
+    entry = json.loads(raw)
+    return _DECODERS[entry["type"]](entry["value"])
+
+
+class WatermarkConflict(RuntimeError):
+    """Raised when the stored watermark moved since it was read (concurrent run)."""
+
+
+class WatermarkStore:
+    """
+    Local SQLite store of the last committed high-water mark per incremental job.
+    Commits are compare-and-set, so two overlapping runs of the same job
+    can't move the mark backwards or skip a delta.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS watermarks (
+        job_key TEXT PRIMARY KEY,
+        value TEXT NOT NULL,
+        updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+    );
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+
+
+    @classmethod
+    def from_env(cls):
+        path = os.getenv(
+            "WATERMARK_STATE_PATH",
+            os.path.join(os.path.expanduser("~"), ".lazy-patch", "watermarks.sqlite3"),
+        )
+        return cls(path)
+
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(self.SCHEMA)
+            self._local.conn = conn
+        return conn
+
+
+    def get(self, job_key: str):
+        row = self._conn().execute(
+            "SELECT value FROM watermarks WHERE job_key = ?", (job_key,)
+        ).fetchone()
+        return _decode(row[0]) if row else None
+
+
+    def commit(self, job_key: str, expected, new_value):
+        """
+        Atomically moves the watermark from expected to new_value.
+        Raises WatermarkConflict if another run committed in between.
+        """
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT value FROM watermarks WHERE job_key = ?", (job_key,)).fetchone()
+            current = _decode(row[0]) if row else None
+
+            if current != expected:
+                raise WatermarkConflict(
+                    f"Watermark for {job_key} moved from {expected!r} to {current!r} during the run"
+                )
+
+            conn.execute(
+                """
+                INSERT INTO watermarks (job_key, value, updated_at) VALUES (?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT(job_key) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at
+                """,
+                (job_key, _encode(new_value)),
+            )
+
+        logger.info("Committed watermark for %s: %r", job_key, new_value)
+
+
+    def reset(self, job_key: str):
+        """Forgets the watermark so the next run re-reads everything."""
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM watermarks WHERE job_key = ?", (job_key,))
+
+
+# Process-wide store; the SQLite file is opened lazily on first use
+watermark_store = WatermarkStore.from_env()
@@ -0,0 +1,6 @@
+from .signature import JobSignature
+from .runtimestore import RuntimeStats, RuntimeStatsStore, RedisRuntimeStatsStore, get_runtime_stats, \
+    configure_runtime_stats
+
+__all__ = ['JobSignature', 'RuntimeStats', 'RuntimeStatsStore', 'RedisRuntimeStatsStore', 'get_runtime_stats',
+           'configure_runtime_stats']
\ No newline at end of file
@@ -0,0 +1,243 @@
+from pydantic import BaseModel
+from .signature import JobSignature
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(f"app.{__name__}")
+
+
+class RuntimeStats(BaseModel):
+    runs: int
+    # Exponentially weighted averages, newest runs weigh the most
+    runtime: float
+    rows: float
+    bytes: float
+    last_runtime: float
+    updated_at: float
+
+
+class RuntimeStatsStore:
+    """
+    Local SQLite store of per-job-signature runtime statistics.
+
+    Every run is appended to job_runs; job_stats keeps an EWMA summary per
+    signature that the scheduler reads. Failed runs are only kept in
+    job_runs: a job failing fast would otherwise look cheap. WAL mode lets
+    several worker processes on the same host share one file, but not
+    several hosts: a Celery deployment uses RedisRuntimeStatsStore.
+    """
+
+    # Weight of the newest run in the EWMA summary
+    SMOOTHING = 0.3
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS job_runs (
+        signature TEXT NOT NULL,
+        started_at REAL NOT NULL,
+        runtime REAL NOT NULL,
+        rows INTEGER NOT NULL,
+        bytes INTEGER NOT NULL,
+        status TEXT
+    );
+    CREATE TABLE IF NOT EXISTS job_stats (
+        signature TEXT PRIMARY KEY,
+        runs INTEGER NOT NULL,
+        runtime REAL NOT NULL,
+        rows REAL NOT NULL,
+        bytes REAL NOT NULL,
+        last_runtime REAL NOT NULL,
+        updated_at REAL NOT NULL
+    );
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+
+
+    @classmethod
+    def from_env(cls):
+        path = os.getenv(
+            "RUNTIME_STATS_PATH",
+            os.path.join(os.path.expanduser("~"), ".lazy-patch", "runtime_stats.sqlite3"),
+        )
+        return cls(path)
+
+
+    def _conn(self) -> sqlite3.Connection:
+        # One connection per thread; sqlite3 connections aren't shareable across threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(self.SCHEMA)
+            self._local.conn = conn
+        return conn
+
+
+    def record(self, signature: JobSignature, runtime: float, rows: int = 0, nbytes: int = 0, status: str | None = None):
+        """Appends one run and, unless it failed, folds it into the signature's summary."""
+        now = time.time()
+        a = self.SMOOTHING
+
+        try:
+            conn = self._conn()
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                conn.execute(
+                    "INSERT INTO job_runs VALUES (?, ?, ?, ?, ?, ?)",
+                    (signature.key, now - runtime, runtime, rows, nbytes, status),
+                )
+                if status == "fail":
+                    return
+                conn.execute(
+                    """
+                    INSERT INTO job_stats VALUES (?, 1, ?, ?, ?, ?, ?)
+                    ON CONFLICT(signature) DO UPDATE SET
+                        runs = runs + 1,
+                        runtime = ? * excluded.runtime + (1 - ?) * runtime,
+                        rows = ? * excluded.rows + (1 - ?) * rows,
+                        bytes = ? * excluded.bytes + (1 - ?) * bytes,
+                        last_runtime = excluded.last_runtime,
+                        updated_at = excluded.updated_at
+                    """,
+                    (signature.key, runtime, rows, nbytes, runtime, now, a, a, a, a, a, a),
+                )
+        except sqlite3.Error:
+            # Statistics are advisory; never fail a job because of them
+            logger.warning("Failed to record runtime stats for %s", signature.key, exc_info=True)
+
+
+    def get(self, signature: JobSignature) -> RuntimeStats | None:
+        try:
+            row = self._conn().execute(
+                "SELECT runs, runtime, rows, bytes, last_runtime, updated_at FROM job_stats WHERE signature = ?",
+                (signature.key,),
+            ).fetchone()
+        except sqlite3.Error:
+            logger.warning("Failed to read runtime stats for %s", signature.key, exc_info=True)
+            return None
+
+        if row is None:
+            return None
+
+        runs, runtime, rows, nbytes, last_runtime, updated_at = row
+        return RuntimeStats(
+            runs=runs, runtime=runtime, rows=rows, bytes=nbytes,
+            last_runtime=last_runtime, updated_at=updated_at,
+        )
+
+
+    def expected_runtime(self, signature: JobSignature, default: float | None = None) -> float | None:
+        stats = self.get(signature)
+        return stats.runtime if stats else default
+
+
+# EWMA update of a signature's summary (KEYS[1]) plus a capped list of its
+# recent runs (KEYS[2]). Failed runs only go to the list.
+# ARGV: runtime, rows, bytes, now, smoothing, status, run json, history, ttl_ms
+RECORD_RUN_LUA = """
+if ARGV[6] ~= 'fail' then
+    local a = tonumber(ARGV[5])
+    local state = redis.call('HMGET', KEYS[1], 'runs', 'runtime', 'rows', 'bytes')
+    local runs = tonumber(state[1])
+    local runtime, rows, bytes = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+    if runs then
+        runtime = a * runtime + (1 - a) * tonumber(state[2])
+        rows = a * rows + (1 - a) * tonumber(state[3])
+        bytes = a * bytes + (1 - a) * tonumber(state[4])
+    end
+    redis.call('HSET', KEYS[1], 'runs', (runs or 0) + 1, 'runtime', tostring(runtime),
+        'rows', tostring(rows), 'bytes', tostring(bytes), 'last_runtime', ARGV[1], 'updated_at', ARGV[4])
+    redis.call('PEXPIRE', KEYS[1], ARGV[9])
+end
+redis.call('LPUSH', KEYS[2], ARGV[7])
+redis.call('LTRIM', KEYS[2], 0, tonumber(ARGV[8]) - 1)
+redis.call('PEXPIRE', KEYS[2], ARGV[9])
+return 1
+"""
+
+
+class RedisRuntimeStatsStore:
+    """
+    RuntimeStatsStore kept in Redis, so the runtimes workers record are the
+    ones the runner's CostAwareScheduler reads, whichever hosts they run on.
+    Same summary as the SQLite store (failed runs excluded); only the last
+    `history` runs per signature are kept, and signatures not run for `ttl`
+    seconds expire.
+    """
+
+    SMOOTHING = RuntimeStatsStore.SMOOTHING
+
+    def __init__(self, redis_client, key_prefix: str = "lazypatch:stats", history: int = 100,
+                 ttl: int = 30 * 24 * 3600):
+        self.redis = redis_client
+        self.key_prefix = key_prefix
+        self.history = history
+        self.ttl = ttl
+        self._record_run = redis_client.register_script(RECORD_RUN_LUA)
+
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs):
+        import redis
+
+        return cls(redis.Redis.from_url(url), **kwargs)
+
+
+    def record(self, signature: JobSignature, runtime: float, rows: int = 0, nbytes: int = 0, status: str | None = None):
+        now = time.time()
+        run = json.dumps({"started_at": now - runtime, "runtime": runtime, "rows": rows, "bytes": nbytes,
+                          "status": status})
+        try:
+            self._record_run(
+                keys=[f"{self.key_prefix}:summary:{signature.key}", f"{self.key_prefix}:runs:{signature.key}"],
+                args=[runtime, rows, nbytes, now, self.SMOOTHING, status or "", run, self.history, self.ttl * 1000],
+            )
+        except Exception:
+            logger.warning("Failed to record runtime stats for %s", signature.key, exc_info=True)
+
+
+    def get(self, signature: JobSignature) -> RuntimeStats | None:
+        try:
+            values = self.redis.hmget(
+                f"{self.key_prefix}:summary:{signature.key}",
+                "runs", "runtime", "rows", "bytes", "last_runtime", "updated_at",
+            )
+        except Exception:
+            logger.warning("Failed to read runtime stats for %s", signature.key, exc_info=True)
+            return None
+
+        if values[0] is None:
+            return None
+
+        runs, runtime, rows, nbytes, last_runtime, updated_at = values
+        return RuntimeStats(
+            runs=int(runs), runtime=float(runtime), rows=float(rows), bytes=float(nbytes),
+            last_runtime=float(last_runtime), updated_at=float(updated_at),
+        )
+
+
+    def expected_runtime(self, signature: JobSignature, default: float | None = None) -> float | None:
+        stats = self.get(signature)
+        return stats.runtime if stats else default
+
+
+# Process-wide store, local SQLite by default (opened lazily on first use).
+# celery_app switches workers and the runner to the shared Redis store.
+_runtime_stats: RuntimeStatsStore | RedisRuntimeStatsStore = RuntimeStatsStore.from_env()
+
+
+def get_runtime_stats() -> RuntimeStatsStore | RedisRuntimeStatsStore:
+    return _runtime_stats
+
+
+def configure_runtime_stats(store: RuntimeStatsStore | RedisRuntimeStatsStore):
+    """Replaces the process-wide runtime statistics store."""
+    global _runtime_stats
+    _runtime_stats = store
@@ -0,0 +1,28 @@
+from pydantic import BaseModel
+import hashlib
+
+
+class JobSignature(BaseModel):
+    """Identifies 'the same job' across runs for runtime statistics."""
+    job_name: str
+    connection_type: str
+    script_hash: str
+
+    @classmethod
+    def from_values(cls, job_name: str, connection_type: str, execution_script: str):
+        script_hash = hashlib.sha256(execution_script.encode("utf-8")).hexdigest()
+        return cls(job_name=job_name, connection_type=connection_type, script_hash=script_hash)
+
+    @classmethod
+    def from_job(cls, job):
+        return cls.from_values(job.job_name, job.job_connection.connection_type, job.execution_script)
+
+    @classmethod
+    def from_payload(cls, job_payload: dict):
+        return cls.from_values(
+            job_payload["job_name"], job_payload["connection_type"], job_payload["execution_script"]
+        )
+
+    @property
+    def key(self) -> str:
+        return f"{self.connection_type}:{self.job_name}:{self.script_hash[:16]}"
@@ -1,8 +1,22 @@
-from celery_app import celery_app
+from celery_app import celery_app, RATE_LIMIT_REDIS_URL, host_queue
+from celery.exceptions import SoftTimeLimitExceeded
+from celery.signals import task_revoked, worker_process_init, worker_process_shutdown, worker_shutting_down, \
+    before_task_publish, celeryd_after_setup
 from jobs.job import Job
-from connection import Connection
 from connection_config import SqlServerConfig
+from utils import active_queries
+from ratelimit import DistributedRateLimiter, RateLimitPolicy, DistributedAdaptiveLimiter, AdaptivePolicy
+from logconfig import configure_logger
+from results import PageCursor, ResultPager, spill_shared, sweep_expired
+from transport import compression_stats
+from warmup import warm_up, cool_down
+from tracing import tracer
+from concurrent.futures import ThreadPoolExecutor
+import contextvars
 import logging
+import os
+import socket
+import time
 from dotenv import load_dotenv
 import debugpy
 
@@ -10,6 +24,20 @@ load_dotenv()
 
 logger = logging.getLogger("app")
 
+# Blocking driver calls run on this pool so the task's main thread stays
+# responsive to the soft time limit / revoke signal (SIGUSR1) and can
+# cancel the query server side while the driver is still waiting on it.
+# A pool process runs one task at a time; the spare threads cover driver
+# calls still unwinding after a cancel (DRIVER_POOL_SIZE).
+_driver_pool = ThreadPoolExecutor(
+    max_workers=int(os.getenv("DRIVER_POOL_SIZE", "4")), thread_name_prefix="driver"
+)
+
+# Shared across all worker processes through Redis; the client connects lazily
+rate_limiter = DistributedRateLimiter.from_url(RATE_LIMIT_REDIS_URL)
+# Latency / error driven in-flight limit per target, also shared through Redis
+adaptive_limiter = DistributedAdaptiveLimiter(rate_limiter)
+
 @celery_app.task(bind=True)
 def run_job(self, job_payload: dict):
     """
@@ -20,24 +48,138 @@ def run_job(self, job_payload: dict):
     # print("Waiting for debugger attach...")
     # debugpy.wait_for_client()  # pauses execution until debugger attaches
 
-    try:
-        job_connection = Connection.create(job_payload=job_payload)
+    # Continue the trace started by whoever published the task (traceparent header)
+    with tracer.start_span("run_job", {
+        "celery.task_id": self.request.id,
+        "celery.queue": (self.request.delivery_info or {}).get("routing_key"),
+        "job.name": job_payload.get("job_name"),
+        "db.system": job_payload.get("connection_type"),
+    }, parent=tracer.extract(self.request), kind="consumer") as span:
+        try:
+            # Recreate Job object
+            job = Job.from_payload(job_payload, task_id=self.request.id)
+            job_connection = job.job_connection
+
+            # Wait for a fleet-wide token / slot for the target before dialing out
+            target = job_connection.target_key()
+            policy = RateLimitPolicy.from_env(job_connection.connection_type)
+            adaptive_policy = AdaptivePolicy.from_env(job_connection.connection_type)
+
+            waiting = time.monotonic()
+            with rate_limiter.limit(target, policy), \
+                    adaptive_limiter.limit(
+                        target, adaptive_policy, lease_ttl=policy.lease_ttl,
+                        expected=job.expected_runtime() if adaptive_policy.enabled else None,
+                    ) as sample:
+                span.set_attribute("limiter.wait_ms", round((time.monotonic() - waiting) * 1000, 3))
+
+                future = _driver_pool.submit(contextvars.copy_context().run, job.run)
+                try:
+                    result = future.result()
+                except SoftTimeLimitExceeded:
+                    # Soft time limit or revoke(signal="SIGUSR1"): stop the work on the server
+                    active_queries.cancel(job.task_id)
+                    raise
+
+                # Failed executions (timeouts, connection errors) make the limiter back off
+                sample.failed = job_connection.last_status == "fail"
+
+            logger.info("Job finished: %s", job.job_name)
+            return result
+
+        except Exception as exc:
+            logger.exception("Job failed: %s", job_payload['job_name'])
+            # Immediately raise exception, no retries.
+            raise exc
+
+
+@celery_app.task(name="fetch_result_page")
+def fetch_result_page(cursor: str, page_size: int | None = None):
+    """
+    Returns one page of a completed job's result.
+    Start from ResultPager().start(result_handle) (or split() for parallel
+    ranges) and pass each page's next_cursor back until it is None.
+    Send it through request_result_page() so it reaches the right host.
+    """
+    return ResultPager().fetch_page(cursor, page_size).model_dump(mode="json")
+
+
+def request_result_page(cursor: str, page_size: int | None = None):
+    """
+    Queues fetch_result_page for a cursor. Results spilled to a worker's
+    local disk are routed to that host's queue; Snowflake results and
+    shared spill storage (RESULT_SPILL_SHARED) go to the default queue.
+    """
+    handle = PageCursor.decode(cursor).handle
+    options = {}
+    if handle.host_local and not spill_shared():
+        options["queue"] = host_queue(handle.host)
+    return fetch_result_page.apply_async((cursor, page_size), **options)
+
+
+def cancel_job(task_id: str):
+    """
+    Revoke a running job and cancel its query on the server.
+    SIGUSR1 raises SoftTimeLimitExceeded in the worker child, which
+    triggers the same cancellation path as the soft time limit.
+    """
+    celery_app.control.revoke(task_id, terminate=True, signal="SIGUSR1")
+
+
+@celeryd_after_setup.connect
+def _consume_host_queue(sender, instance, **kwargs):
+    # Pages of results spilled to this host's disk are routed here
+    instance.app.amqp.queues.select_add(host_queue(socket.gethostname()))
+
+
+@before_task_publish.connect
+def _inject_trace_context(headers=None, **kwargs):
+    # Runs in the publishing process (runner); the worker continues the trace
+    tracer.inject(headers)
+
+
+@task_revoked.connect
+def _cancel_revoked_queries(request=None, **kwargs):
+    # Effective for thread / solo pools where the query runs in this process
+    if request is not None:
+        active_queries.cancel(request.id)
+
+
+@worker_process_init.connect
+def _init_logging(**kwargs):
+    # Each pool process gets its own background log writer
+    configure_logger("app")
+
+
+@worker_process_init.connect
+def _sweep_spilled_results(**kwargs):
+    # Spilled results past RESULT_SPILL_TTL_SECONDS, including those of killed workers
+    sweep_expired()
+
+
+@worker_process_init.connect
+def _warm_up_process(**kwargs):
+    # Drivers, configs and pooled sessions are ready before the first task (WARMUP_TARGETS)
+    warm_up()
+
+
+@worker_shutting_down.connect
+@worker_process_shutdown.connect
+def _cancel_queries_on_shutdown(**kwargs):
+    active_queries.cancel_all()
+
+
+@worker_process_shutdown.connect
+def _close_pooled_connections(**kwargs):
+    cool_down()
 
-        # Recreate Job object
-        job = Job(
-            task_id=self.request.id,
-            job_name=job_payload["job_name"],
-            job_connection=job_connection,
-            execution_script=job_payload["execution_script"],
-            created_by=job_payload["created_by"],
-        )
 
-        result = job.run()
+@worker_process_shutdown.connect
+def _flush_spans(**kwargs):
+    # Pool processes exit without running atexit handlers
+    tracer.shutdown()
 
-        logger.info(f"Job finished: {job.job_name}")
-        return result
 
-    except Exception as exc:
-        logger.exception(f"Job failed: {job_payload['job_name']}")
-        # Immediately raise exception, no retries.
-        raise exc
+@worker_process_shutdown.connect
+def _log_compression_stats(**kwargs):
+    logger.info("Transport compression stats: %s", compression_stats.snapshot())
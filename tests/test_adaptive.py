@@ -0,0 +1,50 @@
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+pytest.importorskip("lupa")
+
+from ratelimit import AdaptivePolicy, DistributedAdaptiveLimiter, DistributedRateLimiter
+from ratelimit.adaptive import AdaptiveState, Sample
+
+
+@pytest.fixture
+def limiter():
+    return DistributedRateLimiter(fakeredis.FakeRedis())
+
+
+def test_adaptive_limit_keeps_job_error_when_release_fails(limiter):
+    adaptive = DistributedAdaptiveLimiter(limiter)
+    policy = AdaptivePolicy(enabled=True)
+
+    def broken_zrem(*args):
+        raise ConnectionError("redis went away")
+
+    adaptive.redis.zrem = broken_zrem
+    with pytest.raises(KeyError):
+        with adaptive.limit("snowflake:wh", policy, expected=1.0):
+            raise KeyError("job failed")
+
+
+def test_adaptive_state_uses_relative_latency():
+    policy = AdaptivePolicy(enabled=True, initial_limit=4)
+    state = AdaptiveState.initial(policy)
+
+    # A 1s lookup and a 30 minute export, each on schedule, are both healthy
+    for elapsed, expected in [(1.0, 1.0), (1800.0, 1800.0)] * 5:
+        state.observe(Sample(expected).relative_latency(elapsed), False, True, policy)
+    assert state.limit > 4
+
+    limit = state.limit
+    state.observe(Sample(1.0).relative_latency(10.0), False, True, policy)
+    assert state.limit < limit
+
+
+def test_adaptive_state_without_estimate_ignores_latency():
+    policy = AdaptivePolicy(enabled=True, initial_limit=4)
+    state = AdaptiveState.initial(policy)
+
+    state.observe(Sample().relative_latency(3600.0), False, True, policy)
+    assert state.latency is None and state.limit > 4
+
+    state.observe(None, True, True, policy)
+    assert state.limit < 4.5
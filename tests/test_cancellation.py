@@ -0,0 +1,60 @@
+import pytest
+
+from utils import ActiveQueryRegistry, current_task_id
+
+
+@pytest.fixture
+def registry():
+    return ActiveQueryRegistry()
+
+
+def test_cancel_runs_the_task_queries(registry):
+    cancelled = []
+    with registry.track(lambda: cancelled.append("a"), task_id="t1"), \
+            registry.track(lambda: cancelled.append("b"), task_id="t1"), \
+            registry.track(lambda: cancelled.append("other"), task_id="t2"):
+        assert registry.cancel("t1") == 2
+
+    assert sorted(cancelled) == ["a", "b"]
+
+
+def test_finished_queries_are_not_cancelled(registry):
+    cancelled = []
+    with registry.track(lambda: cancelled.append("done"), task_id="t1"):
+        pass
+
+    assert registry.cancel("t1") == 0
+    assert cancelled == []
+
+
+def test_queries_register_under_the_current_task(registry):
+    cancelled = []
+    token = current_task_id.set("task-42")
+    try:
+        with registry.track(lambda: cancelled.append("q")):
+            assert registry.cancel("task-42") == 1
+    finally:
+        current_task_id.reset(token)
+
+    assert cancelled == ["q"]
+
+
+def test_failing_cancel_does_not_stop_the_others(registry):
+    cancelled = []
+
+    def broken():
+        raise ConnectionError("server went away")
+
+    with registry.track(broken, task_id="t1"), registry.track(lambda: cancelled.append("ok"), task_id="t1"):
+        assert registry.cancel("t1") == 1
+
+    assert cancelled == ["ok"]
+
+
+def test_cancel_all_covers_every_task(registry):
+    cancelled = []
+    with registry.track(lambda: cancelled.append("t1"), task_id="t1"), \
+            registry.track(lambda: cancelled.append("none")):
+        assert registry.cancel_all() == 2
+
+    assert sorted(cancelled) == ["none", "t1"]
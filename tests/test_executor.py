@@ -0,0 +1,55 @@
+import datetime
+import json
+from decimal import Decimal
+
+import pytest
+
+from executor import ProcessOffloader
+from models import ResponseModel, render_response
+from transport import CompressionSettings, decompress_payload
+
+
+class Connection:
+    """Stands in for a Connection: serialize() only needs the row shape and the status."""
+
+    def __init__(self, records=False):
+        self.ROWS_AS_RECORDS = records
+        self.last_status = "pass"
+
+
+def response():
+    rows = [(i, f"row {i}", Decimal("1.50"), datetime.datetime(2024, 1, 1, 12, i), None) for i in range(50)]
+    return ResponseModel(status="pass", success_text="done", error_text="",
+                         data=[{"columns": ["id", "name", "amount", "at", "note"], "rows": rows}])
+
+
+@pytest.fixture(scope="module")
+def offloader():
+    with ProcessOffloader(max_workers=1) as offloader:
+        yield offloader
+
+
+@pytest.mark.parametrize("records", [False, True])
+def test_pool_output_matches_the_thread_path(offloader, records):
+    expected = render_response(response(), records)
+
+    assert offloader.serialize(Connection(records), response()) == expected
+
+
+def test_compressed_output_round_trips():
+    with ProcessOffloader(max_workers=1, compression=CompressionSettings(codec="zlib", threshold=0)) as offloader:
+        payload = offloader.serialize(Connection(), response())
+
+    assert isinstance(payload, bytes)
+    assert decompress_payload(payload).decode("utf-8") == render_response(response(), False)
+
+
+def test_render_failure_is_a_fail_response(offloader):
+    connection = Connection()
+    broken = ResponseModel.model_construct(status="pass", success_text="", error_text="",
+                                           data=[{"columns": ["x"], "rows": [(object(),)]}])
+
+    result = json.loads(offloader.serialize(connection, broken))
+
+    assert result["status"] == "fail" and result["error_text"]
+    assert connection.last_status == "fail"
@@ -0,0 +1,166 @@
+from collections import Counter
+
+import pytest
+
+from scheduling import FairShareDispatcher, FairSharePolicy
+
+
+class Handle:
+    def __init__(self, job):
+        self.job = job
+        self.done = False
+        self.polls = 0
+
+    def ready(self):
+        self.polls += 1
+        return self.done
+
+
+class Broker:
+    def __init__(self):
+        self.handles = []
+
+    def send(self, job, queue):
+        handle = Handle(job)
+        self.handles.append(handle)
+        return handle
+
+
+def make(policy, poll_interval=60.0):
+    broker = Broker()
+    return FairShareDispatcher(broker.send, policy=policy, poll_interval=poll_interval), broker
+
+
+def jobs(owner, count):
+    return [{"job_name": f"{owner}-{i}", "created_by": owner} for i in range(count)]
+
+
+def owners(handles):
+    return [handle.job["created_by"] for handle in handles]
+
+
+def test_single_owner_backlog_fills_its_cap_in_one_dispatch():
+    dispatcher, _ = make(FairSharePolicy(default_max_in_flight=10, max_total_in_flight=32))
+    for job in jobs("alice", 50):
+        dispatcher.submit(job)
+
+    sent = dispatcher.dispatch()
+    assert len(sent) == 10
+    assert [h.job["job_name"] for h in sent] == [f"alice-{i}" for i in range(10)]
+    assert dispatcher.pending == 40 and dispatcher.in_flight == 10
+
+
+def test_total_cap_is_shared_round_robin():
+    dispatcher, _ = make(FairSharePolicy(default_max_in_flight=10, max_total_in_flight=6))
+    for job in jobs("alice", 20) + jobs("bob", 20):
+        dispatcher.submit(job)
+
+    sent = dispatcher.dispatch()
+    assert Counter(owners(sent)) == {"alice": 3, "bob": 3}
+    # Every round releases one job per owner
+    assert sorted(owners(sent[:2])) == ["alice", "bob"]
+
+
+def test_late_owner_is_not_stuck_behind_a_backfill():
+    dispatcher, broker = make(FairSharePolicy(default_max_in_flight=100, max_total_in_flight=4), poll_interval=0)
+    for job in jobs("backfill", 100):
+        dispatcher.submit(job)
+    assert owners(dispatcher.dispatch()) == ["backfill"] * 4
+
+    dispatcher.submit({"job_name": "report", "created_by": "analyst"})
+
+    # Waits behind at most one round, not behind the other 96 jobs
+    released = []
+    for handle in broker.handles[:2]:
+        handle.done = True
+        released += owners(dispatcher.dispatch())
+    assert "analyst" in released
+
+
+def test_weights_split_the_slots():
+    policy = FairSharePolicy(weights={"alice": 3}, default_max_in_flight=100, max_total_in_flight=40)
+    dispatcher, _ = make(policy)
+    for job in jobs("alice", 100) + jobs("bob", 100):
+        dispatcher.submit(job)
+
+    counts = Counter(owners(dispatcher.dispatch()))
+    assert counts == {"alice": 30, "bob": 10}
+
+
+def test_fractional_weights_still_fill_the_slots():
+    dispatcher, _ = make(FairSharePolicy(default_weight=0.25, default_max_in_flight=8, max_total_in_flight=32))
+    for job in jobs("alice", 20):
+        dispatcher.submit(job)
+
+    assert len(dispatcher.dispatch()) == 8
+
+
+def test_per_owner_caps():
+    policy = FairSharePolicy(max_in_flight={"backfill": 2}, default_max_in_flight=5, max_total_in_flight=32)
+    dispatcher, _ = make(policy)
+    for job in jobs("backfill", 10) + jobs("alice", 10):
+        dispatcher.submit(job)
+
+    counts = Counter(owners(dispatcher.dispatch()))
+    assert counts == {"backfill": 2, "alice": 5}
+    assert dispatcher.dispatch() == []
+
+
+def test_finished_jobs_free_their_slots():
+    dispatcher, broker = make(FairSharePolicy(default_max_in_flight=2, max_total_in_flight=32), poll_interval=0)
+    for job in jobs("alice", 3):
+        dispatcher.submit(job)
+    assert len(dispatcher.dispatch()) == 2
+
+    broker.handles[0].done = True
+    sent = dispatcher.dispatch()
+    assert [h.job["job_name"] for h in sent] == ["alice-2"]
+
+
+def test_in_flight_handles_are_polled_once_per_interval():
+    dispatcher, broker = make(FairSharePolicy(default_max_in_flight=4, max_total_in_flight=32), poll_interval=60)
+    for job in jobs("alice", 10):
+        dispatcher.submit(job)
+
+    dispatcher.dispatch()
+    for _ in range(20):
+        dispatcher.dispatch()
+
+    assert all(handle.polls <= 1 for handle in broker.handles)
+
+
+def test_failed_send_keeps_the_jobs_queued():
+    calls = []
+
+    def send(job, queue):
+        calls.append(job["job_name"])
+        if len(calls) == 2:
+            raise ConnectionError("broker down")
+        return Handle(job)
+
+    dispatcher = FairShareDispatcher(send, policy=FairSharePolicy(max_total_in_flight=3))
+    for job in jobs("alice", 3):
+        dispatcher.submit(job)
+
+    with pytest.raises(ConnectionError):
+        dispatcher.dispatch()
+    assert dispatcher.in_flight == 1 and dispatcher.pending == 2
+
+    sent = dispatcher.dispatch()
+    assert [h.job["job_name"] for h in sent] == ["alice-1", "alice-2"]
+
+
+def test_run_until_empty_drains_every_queue():
+    dispatcher, broker = make(FairSharePolicy(default_max_in_flight=3, max_total_in_flight=4), poll_interval=0.01)
+    for job in jobs("alice", 5) + jobs("bob", 5):
+        dispatcher.submit(job)
+
+    original_send = dispatcher.send
+
+    def send_and_finish(job, queue):
+        handle = original_send(job, queue)
+        handle.done = True
+        return handle
+
+    dispatcher.send = send_and_finish
+    assert len(dispatcher.run_until_empty()) == 10
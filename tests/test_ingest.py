@@ -0,0 +1,135 @@
+import json
+import threading
+import time
+
+import pytest
+
+# ingest builds Jobs, and the connection package imports the database drivers
+pytest.importorskip("pyodbc", exc_type=ImportError)
+
+from ingest import JobFileReader, feed_dispatcher, feed_inprocess
+from scheduling import FairShareDispatcher, FairSharePolicy
+
+
+def job(name, script="echo hi", connection_type="shell", **extra):
+    return {"job_name": name, "connection_type": connection_type, "execution_script": script,
+            "created_by": "alice", **extra}
+
+
+def write_jobs(path, *lines):
+    path.write_text("\n".join(line if isinstance(line, str) else json.dumps(line) for line in lines) + "\n")
+    return str(path)
+
+
+def test_batches_keep_file_order_and_size(tmp_path):
+    path = write_jobs(tmp_path / "jobs.jsonl", *[job(f"job-{i}") for i in range(7)])
+    reader = JobFileReader(path, batch_size=3)
+
+    batches = list(reader.batches())
+
+    assert [len(batch) for batch in batches] == [3, 3, 1]
+    assert [payload["job_name"] for batch in batches for payload in batch] == [f"job-{i}" for i in range(7)]
+    assert reader.stats.lines == reader.stats.valid == 7
+
+
+def test_connector_keys_are_kept_and_blank_lines_skipped(tmp_path):
+    path = write_jobs(tmp_path / "jobs.jsonl", job("a", query_timeout=30, max_output_bytes=10), "", "   ")
+
+    assert list(JobFileReader(path)) == [job("a", query_timeout=30, max_output_bytes=10)]
+
+
+def test_duplicates_are_dropped(tmp_path):
+    path = write_jobs(tmp_path / "jobs.jsonl",
+                      job("a"), job("a"), job("a", script="echo other"), job("b"), job("a"))
+    reader = JobFileReader(path, batch_size=2)
+
+    names = [(payload["job_name"], payload["execution_script"]) for payload in reader]
+
+    assert names == [("a", "echo hi"), ("a", "echo other"), ("b", "echo hi")]
+    assert reader.stats.duplicates == 2 and reader.stats.valid == 3
+
+
+def test_dedupe_can_be_turned_off(tmp_path):
+    path = write_jobs(tmp_path / "jobs.jsonl", job("a"), job("a"))
+    assert len(list(JobFileReader(path, dedupe=False))) == 2
+
+
+def test_dedupe_memory_is_bounded(tmp_path):
+    path = write_jobs(tmp_path / "jobs.jsonl", job("a"), job("b"), job("c"), job("c"), job("a"))
+    reader = JobFileReader(path, max_tracked=2)
+
+    names = [payload["job_name"] for payload in reader]
+
+    # "c" is still tracked; "a" was forgotten once b and c came in
+    assert names == ["a", "b", "c", "a"]
+    assert len(reader._seen) == len(reader._seen_order) == 2
+
+
+def test_dedupe_bound_comes_from_the_environment(monkeypatch, tmp_path):
+    monkeypatch.setenv("INGEST_DEDUPE_MAX_JOBS", "5")
+    assert JobFileReader(str(tmp_path / "jobs.jsonl")).max_tracked == 5
+
+
+def test_malformed_lines_are_reported_and_skipped(tmp_path):
+    path = write_jobs(
+        tmp_path / "jobs.jsonl",
+        job("good-1"),
+        "{not json",
+        job("no-script", script=""),
+        job("aws", connection_type="lambda"),
+        '{"job_name": "x"}, {"job_name": "y"}',
+        job("good-2"),
+    )
+    malformed = []
+    reader = JobFileReader(path, on_malformed=malformed.append)
+
+    assert [payload["job_name"] for payload in reader] == ["good-1", "good-2"]
+    assert [line.line_number for line in malformed] == [2, 3, 4, 5]
+    assert "connection_type" in malformed[2].error
+    assert malformed[0].preview == "{not json"
+    assert reader.stats.malformed == 4 and reader.stats.valid == 2
+
+
+def test_feed_inprocess_bounds_the_jobs_in_flight(tmp_path):
+    path = write_jobs(tmp_path / "jobs.jsonl", *[job(f"job-{i}") for i in range(12)])
+    lock = threading.Lock()
+    running, peak, results = 0, 0, []
+
+    def run(built):
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.02)
+        with lock:
+            running -= 1
+        return built.job_name
+
+    count = feed_inprocess(JobFileReader(path), run=run, max_in_flight=3,
+                           on_result=lambda payload, future: results.append(future.result()))
+
+    assert count == 12
+    assert sorted(results) == sorted(f"job-{i}" for i in range(12))
+    assert peak <= 3
+
+
+def test_feed_dispatcher_sends_every_job_and_bounds_the_backlog(tmp_path):
+    path = write_jobs(tmp_path / "jobs.jsonl", *[job(f"job-{i}") for i in range(25)])
+    backlog = []
+
+    class Handle:
+        def ready(self):
+            return True
+
+    def send(payload, queue):
+        backlog.append(dispatcher.pending)
+        return Handle()
+
+    dispatcher = FairShareDispatcher(send, policy=FairSharePolicy(default_max_in_flight=4, max_total_in_flight=4),
+                                     poll_interval=0)
+
+    sent = feed_dispatcher(JobFileReader(path, batch_size=5).batches(), dispatcher, max_pending=6)
+
+    assert sent == 25 and dispatcher.pending == 0
+    # A batch is only read while fewer than max_pending jobs wait
+    assert max(backlog) < 6 + 5
@@ -0,0 +1,83 @@
+import datetime
+import pickle
+from decimal import Decimal
+
+import pytest
+
+from models import LiveResult, ResponseModel, render_response
+
+
+def response(data):
+    return ResponseModel(status="pass", success_text="done", error_text="", data=data)
+
+
+TABULAR = [
+    {"columns": ["id", "amount", "at"],
+     "rows": [(1, Decimal("1.50"), datetime.date(2024, 1, 1)), (2, Decimal("2.00"), None)],
+     "rowcount": 2},
+    {"columns": ["x"], "rows": []},
+]
+
+
+@pytest.mark.parametrize("data", [TABULAR, [], None, {"exit_code": 0, "stdout": "hi"}],
+                         ids=["result-sets", "empty-list", "none", "shell"])
+@pytest.mark.parametrize("as_records", [False, True])
+def test_to_json_matches_the_thread_path(data, as_records):
+    live = LiveResult(response(data), as_records)
+
+    assert live.to_json() == render_response(response(data), as_records)
+
+
+@pytest.mark.parametrize("data", [TABULAR, []], ids=["result-sets", "empty-list"])
+def test_pickling_round_trips_through_json(data):
+    live = LiveResult(response(data), as_records=True)
+    restored = pickle.loads(pickle.dumps(live))
+
+    assert restored.to_json() == live.to_json()
+    assert len(restored.result_sets) == len(live.result_sets)
+    assert restored.status == "pass"
+
+
+def test_rows_stay_as_fetched_until_needed():
+    live = LiveResult(response(TABULAR))
+    first = live.result_sets[0]
+
+    assert first.rows is TABULAR[0]["rows"]
+    assert list(first.records())[1] == {"id": 2, "amount": Decimal("2.00"), "at": None}
+    assert first.extra == {"rowcount": 2}
+    assert live.row_count == 2
+
+
+def test_numeric_columns_are_packed_and_cached():
+    rows = [(i, i / 2, str(i)) for i in range(5)]
+    result_set = LiveResult(response([{"columns": ["i", "f", "s"], "rows": rows}])).result_sets[0]
+
+    ints = result_set.column("i")
+    assert isinstance(ints, memoryview) and ints.format == "q" and ints.tolist() == list(range(5))
+    assert result_set.column("f").format == "d"
+    assert result_set.column("s") == tuple(str(i) for i in range(5))
+    assert result_set.column("i") is ints
+
+
+def test_mixed_or_oversized_columns_stay_tuples():
+    rows = [(1, 2 ** 70), (None, 1)]
+    result_set = LiveResult(response([{"columns": ["a", "b"], "rows": rows}])).result_sets[0]
+
+    assert result_set.column("a") == (1, None)
+    assert result_set.column("b") == (2 ** 70, 1)
+
+
+def test_executor_mode_selects_the_serializer(monkeypatch):
+    pytest.importorskip("pyodbc", exc_type=ImportError)
+    import app
+    from app import _serializer_for_mode
+
+    # The app logger doesn't propagate (logconfig queues its records)
+    warnings = []
+    monkeypatch.setattr(app.logger, "warning", lambda msg, *args: warnings.append(msg % args))
+
+    assert _serializer_for_mode("threads") == (None, None)
+    assert _serializer_for_mode("live") == (LiveResult.serializer, None)
+
+    assert _serializer_for_mode("proccesses") == (None, None)
+    assert warnings == ["Unknown EXECUTOR_MODE 'proccesses', using threads"]
@@ -0,0 +1,159 @@
+from contextlib import contextmanager
+
+import pytest
+
+from results import ChunkWriter, PageCursor, ResultHandle, ResultPager, SpoolWriter
+
+COLUMNS = ["id", "name"]
+ROWS = [(i, f"row {i}") for i in range(23)]
+
+
+@pytest.fixture(params=["spool", "chunks"])
+def handle(request, tmp_path):
+    if request.param == "spool":
+        writer = SpoolWriter(COLUMNS, memory_budget=256, root=str(tmp_path))
+    else:
+        writer = ChunkWriter(COLUMNS, chunk_rows=5, root=str(tmp_path))
+    writer.write_rows(ROWS)
+    return writer.close()
+
+
+def as_tuples(rows):
+    return [tuple(row.values()) if isinstance(row, dict) else tuple(row) for row in rows]
+
+
+def read_all(pager, token, page_size):
+    pages = []
+    while token is not None:
+        page = pager.fetch_page(token, page_size)
+        pages.append(page)
+        token = page.next_cursor
+    return pages
+
+
+def test_pages_cover_the_result_and_end_with_no_cursor(handle):
+    pager = ResultPager()
+    pages = read_all(pager, pager.start(handle), page_size=5)
+
+    assert [page.offset for page in pages] == [0, 5, 10, 15, 20]
+    assert [len(page.rows) for page in pages] == [5, 5, 5, 5, 3]
+    assert pages[-1].next_cursor is None
+    assert as_tuples(row for page in pages for row in page.rows) == ROWS
+    assert all(page.total_rows == 23 and page.columns == COLUMNS for page in pages)
+
+
+def test_exact_multiple_of_the_page_size_has_no_empty_last_page(handle):
+    pager = ResultPager()
+    token = PageCursor(handle=handle, end=20).encode()
+    pages = read_all(pager, token, page_size=10)
+
+    assert [len(page.rows) for page in pages] == [10, 10]
+    assert pages[-1].next_cursor is None
+
+
+def test_cursor_resumes_from_a_token(handle):
+    pager = ResultPager()
+    first = pager.fetch_page(pager.start(handle), 7)
+    again = pager.fetch_page(first.next_cursor, 7)
+    resumed = pager.fetch_page(first.next_cursor, 7)
+
+    assert as_tuples(again.rows) == as_tuples(resumed.rows) == ROWS[7:14]
+
+
+@pytest.mark.parametrize("parts", [1, 3, 4, 23, 50])
+def test_split_ranges_are_disjoint_and_complete(handle, parts):
+    pager = ResultPager()
+    rows = []
+    for token in pager.split(handle, parts):
+        rows += as_tuples(row for page in read_all(pager, token, page_size=4) for row in page.rows)
+
+    assert rows == ROWS
+
+
+def test_ranges_past_the_end_are_clamped(handle):
+    pager = ResultPager()
+    assert as_tuples(pager.read_range(handle, 20, 100)) == ROWS[20:]
+    assert pager.read_range(handle, 30, 40) == []
+
+
+def test_spooled_records_page_as_records(tmp_path):
+    writer = SpoolWriter(COLUMNS, records=True, root=str(tmp_path))
+    writer.write_rows(ROWS[:3])
+    page = ResultPager().fetch_page(ResultPager().start(writer.close()), 2)
+
+    assert page.rows == [{"id": 0, "name": "row 0"}, {"id": 1, "name": "row 1"}]
+
+
+def test_empty_result_has_one_empty_page(tmp_path):
+    handle = SpoolWriter(COLUMNS, root=str(tmp_path)).close()
+    pages = read_all(ResultPager(), ResultPager().start(handle), page_size=10)
+
+    assert len(pages) == 1 and pages[0].rows == [] and pages[0].next_cursor is None
+
+
+def test_snowflake_pages_come_from_result_batches(monkeypatch):
+    pytest.importorskip("pyodbc", exc_type=ImportError)
+    from connection import SnowflakeConnection
+    from connection_config import SnowflakeConfig
+
+    monkeypatch.setattr(SnowflakeConfig, "from_env", classmethod(lambda cls: cls.model_construct()))
+    downloads = []
+
+    class Batch:
+        def __init__(self, index, rows):
+            self.index = index
+            self.rows = rows
+            self.rowcount = len(rows)
+
+        def __iter__(self):
+            downloads.append(self.index)
+            return iter(self.rows)
+
+    rows = [(i,) for i in range(25)]
+    batches = [Batch(0, rows[:4]), Batch(1, rows[4:14]), Batch(2, rows[14:25])]
+    queries = []
+
+    class Cursor:
+        def get_results_from_sfqid(self, query_id):
+            queries.append(query_id)
+
+        def get_result_batches(self):
+            return batches
+
+        def execute(self, *args):
+            raise AssertionError("pages must not re-run or sort the query")
+
+        def close(self):
+            pass
+
+    class Session:
+        def cursor(self):
+            return Cursor()
+
+    @contextmanager
+    def pooled_connection(self):
+        yield Session()
+
+    monkeypatch.setattr(SnowflakeConnection, "pooled_connection", pooled_connection)
+
+    handle = ResultHandle(kind="snowflake_query", columns=["ID"], total_rows=25, query_id="01b2")
+    pager = ResultPager()
+
+    first = pager.fetch_page(pager.start(handle), 6)
+    assert first.rows == rows[:6] and downloads == [0, 1]
+    cursor = PageCursor.decode(first.next_cursor)
+    assert (cursor.offset, cursor.batch, cursor.batch_offset) == (6, 1, 2)
+
+    downloads.clear()
+    second = pager.fetch_page(first.next_cursor, 6)
+    assert second.rows == rows[6:12] and downloads == [1]
+
+    rest = read_all(pager, second.next_cursor, 6)
+    assert [row for page in [first, second] + rest for row in page.rows] == rows
+    assert rest[-1].next_cursor is None
+    assert set(queries) == {"01b2"}
+
+    # Split ranges locate their start from the batch row counts
+    downloads.clear()
+    assert pager.read_range(handle, 15, 18) == rows[15:18]
+    assert downloads == [2]
@@ -0,0 +1,218 @@
+import os
+
+import pytest
+
+# The connection package imports the database drivers
+pytest.importorskip("pyodbc", exc_type=ImportError)
+
+import connection.pool as pool_module
+import connection.snowflakeconnection as snowflake_module
+import connection.sqlconnection as sql_module
+from connection import ConnectionPool, PoolSettings, SnowflakeConnection, SqlConnection
+from connection_config import SnowflakeConfig, SqlServerConfig
+
+
+class Cursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def execute(self, sql, *args):
+        self.conn.queries.append(sql)
+        if self.conn.broken:
+            raise RuntimeError("permission denied")
+        return self
+
+    def fetchone(self):
+        return self.conn.settings
+
+    def fetchall(self):
+        return [(name, value, "", "SESSION") for name, value in self.conn.parameters.items()]
+
+    def close(self):
+        pass
+
+
+class Conn:
+    """Driver connection stand-in: session settings a script may change, and the queries run."""
+
+    def __init__(self, broken=False):
+        self.settings = ("read committed", "us_english")
+        self.parameters = {"STATEMENT_TIMEOUT_IN_SECONDS": "0", "TIMEZONE": "UTC"}
+        self.role, self.warehouse, self.database, self.schema = "LOADER", "WH", "DB", "PUBLIC"
+        self.broken = broken
+        self.queries = []
+        self.closed = False
+
+    def cursor(self):
+        return Cursor(self)
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    def install(size):
+        pool = ConnectionPool(PoolSettings(size=size))
+        monkeypatch.setattr(pool_module, "_pool", pool)
+        monkeypatch.setattr(pool_module, "_pool_pid", os.getpid())
+        return pool
+    monkeypatch.setattr(sql_module, "_session_defaults", {})
+    monkeypatch.setattr(snowflake_module, "_session_defaults", {})
+    return install
+
+
+class Driver(list):
+    """connect() stand-in recording the connections it opened."""
+    broken = False
+
+    def connect(self, *args, **kwargs):
+        self.append(Conn(broken=self.broken))
+        return self[-1]
+
+
+@pytest.fixture
+def opened(monkeypatch):
+    driver = Driver()
+    monkeypatch.setattr(sql_module.pyodbc, "connect", driver.connect, raising=False)
+    monkeypatch.setattr(snowflake_module.connector, "connect", driver.connect)
+    return driver
+
+
+def sql():
+    return SqlConnection(connection_config=SqlServerConfig(server="db1", database="sales", user="u", password="p"))
+
+
+def snowflake():
+    return SnowflakeConnection(connection_config=SnowflakeConfig(
+        user="u", password="p", account="acme", warehouse="wh", database="db", schema="public", role="loader"))
+
+
+def test_pool_reuses_and_discards():
+    pool = ConnectionPool(PoolSettings(size=1))
+    conns = []
+
+    def factory():
+        conns.append(Conn())
+        return conns[-1]
+
+    with pool.connection("k", factory) as first:
+        pass
+    with pool.connection("k", factory) as second:
+        assert second is first
+
+    with pytest.raises(ValueError):
+        with pool.connection("k", factory):
+            raise ValueError("job failed")
+    assert first.closed and pool.idle_count("k") == 0
+
+    def refuse(conn):
+        raise RuntimeError("dirty")
+
+    with pool.connection("k", factory, reset=refuse) as third:
+        pass
+    assert third.closed and pool.idle_count("k") == 0
+
+
+def test_disabled_pool_closes_every_connection():
+    pool = ConnectionPool(PoolSettings(size=0))
+    with pool.connection("k", Conn) as conn:
+        pass
+    assert conn.closed and pool.idle_count() == 0
+
+
+def test_sql_fingerprint_only_runs_with_pooling(pool, opened):
+    pool(0)
+    with sql().pooled_connection(script="SELECT 1") as conn:
+        pass
+
+    assert conn.queries == [] and conn.closed
+    assert sql_module._session_defaults == {}
+
+
+def test_sql_connection_goes_back_only_with_unchanged_settings(pool, opened):
+    pool(2)
+    connection = sql()
+
+    with connection.pooled_connection(script="SELECT 1") as conn:
+        pass
+    assert not conn.closed and pool_module._pool.idle_count() == 1
+
+    with connection.pooled_connection(script="SET LANGUAGE Deutsch") as again:
+        again.settings = ("read committed", "Deutsch")
+    assert again is conn and conn.closed and pool_module._pool.idle_count() == 0
+
+
+@pytest.mark.parametrize("script", [
+    "CREATE TABLE #staging (id int)",
+    "EXECUTE AS USER = 'etl'",
+    "SET IDENTITY_INSERT dbo.t ON",
+    "EXEC sp_set_session_context 'tenant', 3",
+])
+def test_sql_scripts_leaving_hidden_state_are_discarded(pool, opened, script):
+    pool(2)
+    with sql().pooled_connection(script=script) as conn:
+        pass
+    assert conn.closed and pool_module._pool.idle_count() == 0
+
+
+def test_sql_failed_fingerprint_runs_the_job_without_pooling(pool, opened):
+    pool(2)
+    opened.broken = True
+
+    with sql().pooled_connection(script="SELECT 1") as conn:
+        conn.broken = False
+    assert conn.closed and pool_module._pool.idle_count() == 0
+    assert sql_module._session_defaults == {}
+
+
+def test_snowflake_session_goes_back_only_with_unchanged_parameters(pool, opened):
+    pool(2)
+    connection = snowflake()
+
+    with connection.pooled_connection(script="SELECT 1") as conn:
+        pass
+    assert not conn.closed and pool_module._pool.idle_count() == 1
+
+    with connection.pooled_connection(script="CALL set_timeout()") as again:
+        again.parameters["STATEMENT_TIMEOUT_IN_SECONDS"] = "5"
+    assert again is conn and conn.closed and pool_module._pool.idle_count() == 0
+
+
+def test_snowflake_switched_role_is_discarded(pool, opened):
+    pool(2)
+    with snowflake().pooled_connection(script="CALL admin_proc()") as conn:
+        conn.role = "SYSADMIN"
+    assert conn.closed
+
+
+@pytest.mark.parametrize("script", [
+    "ALTER SESSION SET STATEMENT_TIMEOUT_IN_SECONDS = 5",
+    "SET cutoff = '2024-01-01'; SELECT $cutoff",
+    "-- load\nUSE ROLE sysadmin",
+    "SELECT 1; USE SCHEMA staging",
+    "CREATE TEMPORARY TABLE t AS SELECT 1",
+    "create temp stage s",
+])
+def test_snowflake_scripts_leaving_session_state_are_discarded(pool, opened, script):
+    pool(2)
+    with snowflake().pooled_connection(script=script) as conn:
+        pass
+    assert conn.closed
+
+
+def test_snowflake_update_set_is_not_a_session_change(pool, opened):
+    pool(2)
+    with snowflake().pooled_connection(script="UPDATE t\nSET x = 1\nWHERE id = 2") as conn:
+        pass
+    assert not conn.closed
+
+
+def test_snowflake_parameters_only_read_with_pooling(pool, opened):
+    pool(0)
+    with snowflake().pooled_connection(script="SELECT 1") as conn:
+        pass
+    assert conn.queries == [] and conn.closed
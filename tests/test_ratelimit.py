@@ -0,0 +1,84 @@
+import time
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+pytest.importorskip("lupa")
+
+from ratelimit import DistributedRateLimiter, RateLimitPolicy
+
+
+@pytest.fixture
+def limiter():
+    return DistributedRateLimiter(fakeredis.FakeRedis())
+
+
+def take_token(limiter, key, rate, burst):
+    allowed, wait_ms = limiter._token_bucket(keys=[key], args=[rate, burst])
+    return int(allowed), int(wait_ms)
+
+
+def test_token_bucket_allows_burst_then_waits(limiter):
+    for _ in range(3):
+        assert take_token(limiter, "bucket:a", rate=1, burst=3) == (1, 0)
+
+    allowed, wait_ms = take_token(limiter, "bucket:a", rate=1, burst=3)
+    assert allowed == 0
+    assert 0 < wait_ms <= 1000
+
+
+def test_token_bucket_refills_at_rate(limiter):
+    assert take_token(limiter, "bucket:b", rate=100, burst=1)[0] == 1
+    assert take_token(limiter, "bucket:b", rate=100, burst=1)[0] == 0
+
+    time.sleep(0.03)
+    assert take_token(limiter, "bucket:b", rate=100, burst=1)[0] == 1
+
+
+def test_token_buckets_are_per_target(limiter):
+    assert take_token(limiter, "bucket:c", rate=1, burst=1)[0] == 1
+    assert take_token(limiter, "bucket:d", rate=1, burst=1)[0] == 1
+
+
+def test_lease_limit_and_release(limiter):
+    first, in_flight = limiter.try_acquire_slot("slots:a", limit=2, lease_ttl=60)
+    assert first and in_flight == 1
+    second, in_flight = limiter.try_acquire_slot("slots:a", limit=2, lease_ttl=60)
+    assert second and in_flight == 2
+
+    lease, in_flight = limiter.try_acquire_slot("slots:a", limit=2, lease_ttl=60)
+    assert lease is None and in_flight == 2
+
+    limiter.redis.zrem("slots:a", first)
+    lease, in_flight = limiter.try_acquire_slot("slots:a", limit=2, lease_ttl=60)
+    assert lease and in_flight == 2
+
+
+def test_expired_leases_are_reclaimed(limiter):
+    granted, _ = limiter._concurrency_acquire(keys=["slots:b"], args=[1, 20, "crashed-worker"])
+    assert int(granted) == 1
+    assert limiter.try_acquire_slot("slots:b", limit=1, lease_ttl=60)[0] is None
+
+    time.sleep(0.05)
+    lease, in_flight = limiter.try_acquire_slot("slots:b", limit=1, lease_ttl=60)
+    assert lease and in_flight == 1
+
+
+def test_limit_releases_slot_on_error(limiter):
+    policy = RateLimitPolicy(max_concurrency=1, max_wait=0.2)
+
+    with pytest.raises(RuntimeError):
+        with limiter.limit("sql_server:db1", policy):
+            raise RuntimeError("job failed")
+
+    with limiter.limit("sql_server:db1", policy):
+        assert limiter.redis.zcard(f"{limiter.key_prefix}:slots:sql_server:db1") == 1
+
+
+def test_limit_times_out_when_slots_are_taken(limiter):
+    policy = RateLimitPolicy(max_concurrency=1, max_wait=0.1)
+
+    with limiter.limit("sql_server:db2", policy):
+        with pytest.raises(TimeoutError):
+            with limiter.limit("sql_server:db2", policy):
+                pass
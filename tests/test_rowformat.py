@@ -0,0 +1,75 @@
+from datetime import date, datetime, time, timezone
+from decimal import Decimal
+from uuid import UUID
+
+import pytest
+
+from results import SpoolReader, SpoolWriter
+from results.rowformat import decode_row, encode_row
+
+ROWS = [
+    (1, -2, 0, 2 ** 63 - 1, -2 ** 63),
+    (2 ** 80, -2 ** 70, 1.5, float("inf"), -0.0),
+    (None, True, False, "", "héllo wörld"),
+    (b"\x00\x01", bytearray(b"ab"), Decimal("12345.6789"), Decimal("-0.001"), "x" * 1000),
+    (datetime(2024, 1, 2, 3, 4, 5, 6), datetime(2024, 1, 2, tzinfo=timezone.utc), date(2024, 2, 29),
+     time(23, 59, 59, 999999), None),
+    (),
+]
+
+
+def round_trip(row):
+    buffer = bytearray()
+    encode_row(row, buffer)
+    return decode_row(bytes(buffer), 0, len(buffer))
+
+
+@pytest.mark.parametrize("row", ROWS)
+def test_round_trip_keeps_values_and_types(row):
+    decoded = round_trip(row)
+    expected = tuple(bytes(v) if isinstance(v, bytearray) else v for v in row)
+    assert decoded == expected
+    assert [type(v) for v in decoded] == [type(v) for v in expected]
+
+
+def test_bools_stay_bools():
+    assert round_trip((True, False, 1, 0)) == (True, False, 1, 0)
+    assert [type(v) for v in round_trip((True, 1))] == [bool, int]
+
+
+def test_unknown_types_are_kept_as_text():
+    value = UUID("12345678-1234-5678-1234-567812345678")
+    assert round_trip((value,)) == (str(value),)
+
+
+def test_rows_decode_from_an_offset():
+    buffer = bytearray()
+    encode_row((1, "a"), buffer)
+    middle = len(buffer)
+    encode_row((2, "b"), buffer)
+    assert decode_row(memoryview(buffer), middle, len(buffer)) == (2, "b")
+
+
+def test_spool_round_trip_across_flushes(tmp_path):
+    rows = [(i, f"row {i}", i / 3, None if i % 5 else Decimal(i)) for i in range(2000)]
+    writer = SpoolWriter(["id", "name", "ratio", "amount"], memory_budget=4096, root=str(tmp_path))
+    writer.write_rows(rows[:1500])
+    writer.write_rows(rows[1500:])
+    handle = writer.close()
+
+    assert handle.kind == "spool" and handle.total_rows == 2000
+    with SpoolReader(handle.location) as reader:
+        assert len(reader) == 2000
+        assert reader.read_range(0, 2000) == rows
+        assert reader.read_range(1234, 1240) == rows[1234:1240]
+        assert reader.read_range(1995, 5000) == rows[1995:]
+        view = reader.range_view(10, 20)
+        assert len(view) == reader.offsets_view(10, 20)[-1] - reader.offsets_view(10, 20)[0]
+        view.release()
+
+
+def test_empty_spool(tmp_path):
+    writer = SpoolWriter(["id"], root=str(tmp_path))
+    handle = writer.close()
+    with SpoolReader(handle.location) as reader:
+        assert reader.read_range(0, 10) == []
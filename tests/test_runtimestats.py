@@ -0,0 +1,98 @@
+import json
+
+import pytest
+
+from scheduling import CostAwareScheduler
+from stats import JobSignature, RedisRuntimeStatsStore, RuntimeStatsStore
+
+
+def signature(name="job"):
+    return JobSignature.from_values(name, "sql_server", f"select * from {name}")
+
+
+@pytest.fixture(params=["sqlite", "redis"])
+def store(request, tmp_path):
+    if request.param == "sqlite":
+        return RuntimeStatsStore(str(tmp_path / "stats.sqlite3"))
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+    return RedisRuntimeStatsStore(fakeredis.FakeRedis(), history=3)
+
+
+def test_first_run_sets_the_summary(store):
+    store.record(signature(), runtime=12.0, rows=100, nbytes=2048, status="pass")
+
+    stats = store.get(signature())
+    assert stats.runs == 1
+    assert stats.runtime == 12.0 and stats.rows == 100 and stats.bytes == 2048
+
+
+def test_summary_is_an_ewma(store):
+    store.record(signature(), runtime=10.0, status="pass")
+    store.record(signature(), runtime=20.0, status="pass")
+
+    stats = store.get(signature())
+    assert stats.runs == 2
+    assert stats.runtime == pytest.approx(0.3 * 20 + 0.7 * 10)
+    assert stats.last_runtime == 20.0
+
+
+def test_failed_runs_do_not_make_a_job_look_cheap(store):
+    store.record(signature(), runtime=600.0, status="pass")
+    store.record(signature(), runtime=0.1, status="fail")
+
+    assert store.expected_runtime(signature()) == 600.0
+    assert store.get(signature()).runs == 1
+
+
+def test_only_failures_leave_no_estimate(store):
+    store.record(signature(), runtime=0.1, status="fail")
+    assert store.expected_runtime(signature(), default=60.0) == 60.0
+
+
+def test_redis_store_keeps_recent_runs_including_failures():
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+    store = RedisRuntimeStatsStore(fakeredis.FakeRedis(), history=3)
+
+    for runtime, status in [(1.0, "pass"), (2.0, "fail"), (3.0, "pass"), (4.0, "pass")]:
+        store.record(signature(), runtime=runtime, status=status)
+
+    runs = [json.loads(raw) for raw in store.redis.lrange(f"{store.key_prefix}:runs:{signature().key}", 0, -1)]
+    assert [(run["runtime"], run["status"]) for run in runs] == [(4.0, "pass"), (3.0, "pass"), (2.0, "fail")]
+
+
+def test_redis_store_errors_are_not_raised():
+    class Broken:
+        def register_script(self, script):
+            def run(**kwargs):
+                raise ConnectionError("redis went away")
+            return run
+
+        def hmget(self, *args):
+            raise ConnectionError("redis went away")
+
+    store = RedisRuntimeStatsStore(Broken())
+    store.record(signature(), runtime=1.0, status="pass")
+    assert store.expected_runtime(signature(), default=5.0) == 5.0
+
+
+def payload(name):
+    return {"job_name": name, "connection_type": "sql_server", "execution_script": f"select * from {name}",
+            "created_by": "me"}
+
+
+def test_scheduler_orders_and_routes_by_expected_runtime(store):
+    store.record(signature("slow"), runtime=900.0, status="pass")
+    store.record(signature("medium"), runtime=30.0, status="pass")
+    store.record(signature("fast"), runtime=1.0, status="pass")
+    store.record(signature("huge"), runtime=5000.0, status="pass")
+    scheduler = CostAwareScheduler(store, heavy_threshold=300.0, default_runtime=60.0)
+
+    jobs = [payload(name) for name in ("slow", "new", "fast", "huge", "medium")]
+    plan = [(job["job_name"], queue) for job, queue in scheduler.plan(jobs)]
+
+    assert plan == [
+        ("fast", "default"), ("medium", "default"), ("new", "default"),
+        ("huge", "heavy"), ("slow", "heavy"),
+    ]
@@ -0,0 +1,132 @@
+import os
+import threading
+import time
+
+import pytest
+
+# The connection package imports the database drivers
+pytest.importorskip("pyodbc", exc_type=ImportError)
+
+from connection import ShellConnection
+from connection.subprocesspool import SubprocessPool
+from connection_config import ShellConfig
+from utils import active_queries, current_task_id
+
+
+def shell(**config):
+    return ShellConnection(connection_config=ShellConfig(kill_grace_seconds=1, **config))
+
+
+def alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    # A killed child may linger as a zombie until reaped
+    with open(f"/proc/{pid}/stat") as f:
+        return f.read().split()[2] != "Z"
+
+
+def test_exit_code_zero_passes():
+    response = shell().fetch("echo hello; echo oops >&2")
+
+    assert response.status == "pass"
+    assert response.data["exit_code"] == 0
+    assert response.data["stdout"] == "hello\n" and response.data["stderr"] == "oops\n"
+
+
+def test_non_zero_exit_code_fails_with_stderr():
+    response = shell().fetch("echo broken >&2; exit 3")
+
+    assert response.status == "fail"
+    assert response.data["exit_code"] == 3
+    assert "exited with code 3" in response.error_text and "broken" in response.error_text
+
+
+def test_timeout_kills_the_process_group(tmp_path):
+    pid_file = tmp_path / "child.pid"
+    connection = shell()
+    connection.query_timeout = 1
+
+    started = time.monotonic()
+    response = connection.fetch(f"sleep 30 & echo $! > {pid_file}; wait")
+
+    assert time.monotonic() - started < 10
+    assert response.status == "fail" and response.data["timed_out"]
+    assert "timed out after 1s" in response.error_text
+    assert not alive(int(pid_file.read_text()))
+
+
+def test_cancel_kills_the_process_group(tmp_path):
+    pid_file = tmp_path / "child.pid"
+    result = {}
+
+    def run():
+        token = current_task_id.set("shell-task")
+        try:
+            result["response"] = shell().fetch(f"sleep 30 & echo $! > {pid_file}; wait")
+        finally:
+            current_task_id.reset(token)
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    deadline = time.monotonic() + 5
+    while not (pid_file.exists() and pid_file.read_text().strip()) and time.monotonic() < deadline:
+        time.sleep(0.05)
+
+    assert active_queries.cancel("shell-task") == 1
+    thread.join(10)
+
+    response = result["response"]
+    assert response.status == "fail" and response.data["cancelled"]
+    assert not alive(int(pid_file.read_text()))
+
+
+def test_cancel_before_spawn_never_runs_the_command(tmp_path):
+    marker = tmp_path / "ran"
+    pool = SubprocessPool(1)
+    cancelled = threading.Event()
+    cancelled.set()
+
+    result = pool.run(["/bin/sh", "-c", f"touch {marker}"], timeout=5, max_output_bytes=1024, chunk_size=1024,
+                      kill_grace_seconds=1, cancelled=cancelled)
+
+    assert result.cancelled and result.exit_code is None
+    assert not marker.exists()
+
+
+def test_output_is_capped():
+    response = shell(max_output_bytes=10).fetch("printf '%0100d' 0")
+
+    assert response.status == "pass"
+    assert response.data["stdout"] == "0" * 10 and response.data["stdout_truncated"]
+
+
+def test_bound_parameters_are_rejected():
+    response = shell().fetch("echo hi", params=(1,))
+    assert response.status == "fail"
+
+
+def test_pool_limits_and_resizes_concurrency():
+    pool = SubprocessPool(1)
+    timings = []
+
+    def run():
+        started = time.monotonic()
+        pool.run(["/bin/sh", "-c", "sleep 0.3"], timeout=5, max_output_bytes=1024, chunk_size=1024,
+                 kill_grace_seconds=1)
+        timings.append((started, time.monotonic()))
+
+    def elapsed(count):
+        timings.clear()
+        threads = [threading.Thread(target=run) for _ in range(count)]
+        started = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return time.monotonic() - started
+
+    assert elapsed(2) >= 0.6
+    pool.resize(2)
+    assert elapsed(2) < 0.55
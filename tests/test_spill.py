@@ -0,0 +1,90 @@
+import json
+import os
+import time
+import uuid
+
+import pytest
+
+from results import ChunkWriter, SpoolWriter, open_result_writer, sweep_expired
+
+COLUMNS = ["id", "name"]
+ROWS = [(i, f"row {i}") for i in range(50)]
+
+
+@pytest.fixture(autouse=True)
+def spill_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("RESULT_SPILL_DIR", str(tmp_path))
+    monkeypatch.setenv("RESULT_SPILL_TTL_SECONDS", "60")
+    monkeypatch.delenv("RESULT_SPILL_FORMAT", raising=False)
+    return tmp_path
+
+
+def later():
+    return time.time() + 3600
+
+
+def test_default_spill_format_is_compressed_chunks(spill_dir):
+    writer = open_result_writer(COLUMNS, records=True)
+    assert isinstance(writer, ChunkWriter)
+
+    writer.write_rows(ROWS * 100)
+    handle = writer.close()
+    assert handle.kind == "chunks"
+    raw = sum(len(json.dumps(dict(zip(COLUMNS, row)))) + 1 for row in ROWS * 100)
+    chunks = [name for name in os.listdir(handle.location) if name.startswith("chunk-")]
+    assert sum(os.path.getsize(os.path.join(handle.location, name)) for name in chunks) < raw / 4
+
+
+def test_spool_is_opt_in(monkeypatch):
+    monkeypatch.setenv("RESULT_SPILL_FORMAT", "spool")
+    writer = open_result_writer(COLUMNS, records=True)
+    try:
+        assert isinstance(writer, SpoolWriter) and writer.records
+    finally:
+        writer.abort()
+
+
+@pytest.mark.parametrize("writer_class", [ChunkWriter, SpoolWriter])
+def test_expired_results_are_swept(spill_dir, writer_class):
+    writer = writer_class(COLUMNS, root=str(spill_dir))
+    writer.write_rows(ROWS)
+    handle = writer.close()
+
+    assert sweep_expired(str(spill_dir)) == 0
+    assert sweep_expired(str(spill_dir), now=later()) == 1
+    assert not os.path.exists(handle.location)
+
+
+def test_crashed_writers_are_swept_once_their_marker_is_stale(spill_dir):
+    writer = ChunkWriter(COLUMNS, root=str(spill_dir))
+    writer.write_rows(ROWS)
+
+    assert sweep_expired(str(spill_dir)) == 0
+    assert sweep_expired(str(spill_dir), now=later()) == 1
+    assert not os.path.exists(writer.location)
+
+
+@pytest.mark.parametrize("name, files", [
+    ("reports", ["manifest.json"]),
+    (uuid.uuid4().hex.upper(), ["writing"]),
+    (uuid.uuid4().hex, []),
+    (uuid.uuid4().hex, ["notes.txt"]),
+    (uuid.uuid4().hex, ["chunk-1.csv"]),
+])
+def test_directories_not_created_by_a_writer_are_left_alone(spill_dir, name, files):
+    directory = spill_dir / name
+    directory.mkdir()
+    for file in files:
+        (directory / file).write_text("{}")
+
+    assert sweep_expired(str(spill_dir), now=later()) == 0
+    assert directory.exists()
+
+
+def test_symlinked_directories_are_not_followed(spill_dir, tmp_path_factory):
+    target = tmp_path_factory.mktemp("elsewhere")
+    (target / "rows.bin").write_bytes(b"keep me")
+    (spill_dir / uuid.uuid4().hex).symlink_to(target, target_is_directory=True)
+
+    assert sweep_expired(str(spill_dir), now=later()) == 0
+    assert (target / "rows.bin").exists()
@@ -0,0 +1,163 @@
+import contextvars
+import json
+import threading
+
+import pytest
+
+from tracing import BatchSpanProcessor, FileSpanExporter, OtlpHttpExporter, SpanContext, Tracer, TracingSettings
+from tracing import get_current_span
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+SPAN_ID = "00f067aa0ba902b7"
+
+
+class Recorder:
+    """Processor stand-in keeping finished spans in memory."""
+
+    def __init__(self):
+        self.spans = []
+
+    def on_end(self, span):
+        self.spans.append(span)
+
+    def shutdown(self):
+        pass
+
+
+def tracer(sample_rate=1.0):
+    return Tracer(TracingSettings(exporter="file", sample_rate=sample_rate), processor=Recorder())
+
+
+@pytest.mark.parametrize("value, sampled", [
+    (f"00-{TRACE_ID}-{SPAN_ID}-01", True),
+    (f"00-{TRACE_ID}-{SPAN_ID}-00", False),
+    (f"  00-{TRACE_ID.upper()}-{SPAN_ID}-03 ", True),
+])
+def test_valid_traceparent_is_parsed(value, sampled):
+    context = SpanContext.from_traceparent(value)
+    assert (context.trace_id, context.span_id, context.sampled) == (TRACE_ID, SPAN_ID, sampled)
+
+
+@pytest.mark.parametrize("value", [
+    None, "", "garbage",
+    f"01-{TRACE_ID}-{SPAN_ID}-01",
+    f"00-{TRACE_ID[:-1]}-{SPAN_ID}-01",
+    f"00-{TRACE_ID}-{SPAN_ID}z-01",
+    f"00-{TRACE_ID}-{SPAN_ID}-1",
+    f"00-{TRACE_ID}-{SPAN_ID}-01-extra",
+])
+def test_malformed_traceparent_is_ignored(value):
+    assert SpanContext.from_traceparent(value) is None
+
+
+def test_inject_extract_round_trip():
+    sender, receiver = tracer(), tracer()
+
+    with sender.start_span("send_task", kind="producer") as span:
+        headers = sender.inject({})
+
+    context = receiver.extract(headers)
+    assert context == span.context
+
+    # Celery exposes custom message headers either on the request or under "headers"
+    assert receiver.extract({"headers": headers}) == span.context
+
+    with receiver.start_span("run_job", parent=context, kind="consumer") as child:
+        pass
+    assert child.context.trace_id == span.context.trace_id
+    assert child.parent_id == span.context.span_id
+
+
+def test_extract_without_a_header_starts_a_new_trace():
+    assert Tracer.extract(None) is None
+    assert Tracer.extract({}) is None
+    assert Tracer.extract({"traceparent": "nonsense"}) is None
+
+
+def test_spans_nest_through_the_context_and_threads():
+    t = tracer()
+    with t.start_span("job") as job:
+        with t.start_span("fetch") as fetch:
+            assert get_current_span() is fetch
+
+        result = {}
+        context = contextvars.copy_context()
+
+        def driver():
+            with t.start_span("driver") as span:
+                result["span"] = span
+
+        thread = threading.Thread(target=context.run, args=(driver,))
+        thread.start()
+        thread.join()
+
+    assert fetch.parent_id == job.context.span_id
+    assert result["span"].parent_id == job.context.span_id
+    assert {span.context.trace_id for span in t.processor.spans} == {job.context.trace_id}
+    assert [span.name for span in t.processor.spans] == ["fetch", "driver", "job"]
+
+
+def test_unsampled_traces_propagate_but_record_nothing():
+    t = tracer(sample_rate=0.0)
+    with t.start_span("job", attributes={"job.name": "x"}) as job:
+        job.set_attribute("rows", 5)
+        with t.start_span("fetch") as fetch:
+            headers = t.inject({})
+
+    assert not job.context.sampled and not fetch.context.sampled
+    assert job.attributes == {} and t.processor.spans == []
+    assert headers["traceparent"].endswith("-00")
+
+
+def test_exceptions_are_recorded_and_re_raised():
+    t = tracer()
+    with pytest.raises(ValueError):
+        with t.start_span("job"):
+            raise ValueError("bad row")
+
+    span = t.processor.spans[0]
+    assert span.status == "error" and span.status_message == "bad row"
+    assert span.events[0]["attributes"]["exception.type"] == "ValueError"
+    assert span.end_ns is not None
+
+
+def test_disabled_tracer_is_a_noop():
+    t = Tracer(TracingSettings(exporter="none"))
+    assert not t.enabled
+
+    with t.start_span("job") as span:
+        span.set_attribute("rows", 5)
+        assert t.inject({}) == {}
+
+    assert span.attributes == {} and not span.recording
+
+
+def test_file_exporter_writes_spans_through_the_batch_processor(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    processor = BatchSpanProcessor(FileSpanExporter(str(path), "svc"), schedule_delay=0.05)
+    t = Tracer(TracingSettings(exporter="file"), processor=processor)
+
+    with t.start_span("job", attributes={"job.name": "daily"}):
+        pass
+    t.shutdown()
+
+    [line] = path.read_text().splitlines()
+    record = json.loads(line)
+    assert record["service"] == "svc" and record["name"] == "job"
+    assert record["attributes"] == {"job.name": "daily"}
+
+
+def test_otlp_payload_shape():
+    t = tracer()
+    with t.start_span("job", attributes={"rows": 3, "ok": True, "ids": ["a"]}):
+        with t.start_span("fetch", kind="client"):
+            pass
+
+    payload = OtlpHttpExporter("http://collector", "svc").to_payload(t.processor.spans)
+    fetch, job = payload["resourceSpans"][0]["scopeSpans"][0]["spans"]
+
+    assert fetch["parentSpanId"] == job["spanId"] and "parentSpanId" not in job
+    assert fetch["kind"] == 3
+    assert {a["key"]: a["value"] for a in job["attributes"]} == {
+        "rows": {"intValue": "3"}, "ok": {"boolValue": True}, "ids": {"arrayValue": {"values": [{"stringValue": "a"}]}},
+    }
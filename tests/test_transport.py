@@ -0,0 +1,69 @@
+import importlib
+
+import pytest
+
+pytest.importorskip("kombu")
+
+from kombu.serialization import dumps, loads, prepare_accept_content
+
+from transport import (
+    SERIALIZER_NAME, CompressionSettings, compress_payload, decompress_payload, register_compressed_json,
+)
+from transport.compression import MAGIC
+
+PAYLOAD = {"status": "pass", "data": [{"columns": ["a", "b"], "rows": [[i, "x" * 20] for i in range(200)]}]}
+
+
+@pytest.fixture(autouse=True)
+def restore_serializer():
+    yield
+    register_compressed_json()
+
+
+def encode_with(settings: CompressionSettings):
+    register_compressed_json(settings)
+    return dumps(PAYLOAD, serializer=SERIALIZER_NAME)
+
+
+def decode_with(settings: CompressionSettings, message):
+    register_compressed_json(settings)
+    content_type, encoding, body = message
+    return loads(body, content_type, encoding, accept=prepare_accept_content(["json", SERIALIZER_NAME]))
+
+
+@pytest.mark.parametrize("sender, receiver", [
+    (CompressionSettings(codec="zlib", threshold=0), CompressionSettings(codec=None)),
+    (CompressionSettings(codec=None), CompressionSettings(codec="zlib", threshold=0)),
+    (CompressionSettings(codec="lzma", threshold=0), CompressionSettings(codec="bz2", threshold=10 ** 9)),
+    (CompressionSettings(codec="zlib", threshold=10 ** 9), CompressionSettings(codec="zlib", threshold=0)),
+])
+def test_round_trip_across_compression_settings(sender, receiver):
+    assert decode_with(receiver, encode_with(sender)) == PAYLOAD
+
+
+def test_large_payloads_are_framed_small_ones_are_plain_json():
+    settings = CompressionSettings(codec="zlib", threshold=1024)
+
+    assert compress_payload(b'{"a": 1}', settings) == b'{"a": 1}'
+    framed = compress_payload(b'{"a": "' + b"x" * 4096 + b'"}', settings)
+    assert framed.startswith(MAGIC) and len(framed) < 4096
+    assert decompress_payload(framed) == b'{"a": "' + b"x" * 4096 + b'"}'
+
+
+def test_unknown_codec_falls_back_to_zlib():
+    data = b"y" * 4096
+    framed = compress_payload(data, CompressionSettings(codec="nope", threshold=0))
+    assert decompress_payload(framed) == data
+
+
+@pytest.mark.parametrize("codec", ["zlib", "none"])
+def test_celery_always_accepts_the_compressed_serializer(monkeypatch, codec):
+    pytest.importorskip("celery")
+    monkeypatch.setenv("TRANSPORT_COMPRESSION", codec)
+
+    import celery_app
+    celery_app = importlib.reload(celery_app)
+
+    assert SERIALIZER_NAME in celery_app.celery_app.conf.accept_content
+    assert SERIALIZER_NAME in celery_app.celery_app.conf.result_accept_content
+    assert celery_app.SERIALIZER == (SERIALIZER_NAME if codec == "zlib" else "json")
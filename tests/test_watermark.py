@@ -0,0 +1,201 @@
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+from state import WatermarkConflict, WatermarkStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return WatermarkStore(str(tmp_path / "watermarks.sqlite3"))
+
+
+@pytest.fixture
+def HighWaterMark():
+    # connection imports the database drivers
+    pytest.importorskip("pyodbc", exc_type=ImportError)
+    from connection.connection import HighWaterMark
+    return HighWaterMark
+
+
+def test_high_water_mark_is_the_top_value(HighWaterMark):
+    mark = HighWaterMark("ID")
+    mark.observe(["id", "name"], [(1, "a"), (None, "b"), (3, "c"), (2, "d")])
+    assert mark.value() == 3
+
+
+def test_high_water_mark_covers_streamed_rows(HighWaterMark):
+    mark = HighWaterMark("id")
+    mark.observe(["id"], [(1,), (2,)])
+    # Rows a connector spilled past the inline ones
+    mark.observe(["id"], [(7,), (5,)])
+    assert mark.value() == 7
+
+
+def test_truncated_result_stops_below_a_tied_top(HighWaterMark):
+    mark = HighWaterMark("id")
+    mark.observe(["id"], [(1,), (2,), (3,), (3,)])
+    mark.truncated = True
+    # More rows with id 3 may have been cut off, so 3 is read again next run
+    assert mark.value() == 2
+
+
+def test_truncated_result_where_every_row_ties_has_no_mark(HighWaterMark):
+    mark = HighWaterMark("id")
+    mark.observe(["id"], [(5,), (5,), (5,)])
+    mark.truncated = True
+    assert mark.value() is None
+
+
+def test_records_are_matched_by_column_name(HighWaterMark):
+    mark = HighWaterMark("updated_at")
+    mark.observe(["ID", "UPDATED_AT"], [
+        {"ID": 1, "UPDATED_AT": datetime(2024, 1, 2)},
+        {"ID": 2, "UPDATED_AT": datetime(2024, 3, 1)},
+    ])
+    assert mark.value() == datetime(2024, 3, 1)
+
+
+@pytest.mark.parametrize("value", [42, 1.5, Decimal("10.25"), "k-0009", datetime(2024, 5, 6, 7, 8, 9)])
+def test_store_round_trips_watermark_types(store, value):
+    store.commit("job", None, value)
+    assert store.get("job") == value
+
+
+def test_store_commit_is_compare_and_set(store):
+    store.commit("job", None, 10)
+    store.commit("job", 10, 20)
+
+    with pytest.raises(WatermarkConflict):
+        store.commit("job", 10, 30)
+    assert store.get("job") == 20
+
+
+def test_store_reset(store):
+    store.commit("job", None, 10)
+    store.reset("job")
+    assert store.get("job") is None
+
+
+@pytest.fixture
+def connections():
+    pytest.importorskip("pyodbc", exc_type=ImportError)
+    from connection import SnowflakeConnection, SqlConnection
+    from connection_config import SnowflakeConfig, SqlServerConfig
+
+    sql = SqlConnection(connection_config=SqlServerConfig(
+        server="db", database="sales", user="app", password="secret", port=1433, driver="ODBC Driver 18",
+        trusted_connection=False,
+    ))
+    snowflake = SnowflakeConnection(connection_config=SnowflakeConfig(
+        user="app", password="secret", account="acme", warehouse="wh", database="sales", schema_name="public",
+        role="loader",
+    ))
+    return sql, snowflake
+
+
+@pytest.mark.parametrize("script", [
+    "SELECT id, amount FROM orders",
+    "select o.id, o.amount total, c.name AS customer from orders o join customers c on c.id = o.customer_id",
+    "SELECT TOP 1000 id, updated_at FROM orders ORDER BY updated_at",
+    "SELECT id, [order date], label = 'a;b' FROM orders;  -- ORDER BY in a comment; fine",
+    "SELECT * FROM orders WHERE note = 'order by x'",
+    "SELECT id, (SELECT MAX(x) FROM t ORDER BY x OFFSET 0 ROWS) AS latest FROM orders",
+])
+def test_sql_server_accepts_wrappable_scripts(connections, script):
+    sql, _ = connections
+    sql.check_incremental(script, "id")
+
+
+@pytest.mark.parametrize("script, reason", [
+    ("WITH recent AS (SELECT * FROM orders) SELECT * FROM recent", "CTE"),
+    ("SELECT id FROM orders ORDER BY id", "ORDER BY"),
+    ("SELECT id, COUNT(*) FROM orders GROUP BY id", "name"),
+    ("SELECT o.id, c.id FROM orders o JOIN customers c ON c.id = o.customer_id", "distinct"),
+    ("SELECT id AS x, [X] FROM orders", "distinct"),
+    ("DELETE FROM orders", "SELECT"),
+    ("SELECT id FROM orders; SELECT id FROM refunds", "single statement"),
+    ("SELECT id INTO #copy FROM orders", "INTO"),
+])
+def test_sql_server_rejects_scripts_it_cant_wrap(connections, script, reason):
+    sql, _ = connections
+    with pytest.raises(ValueError, match=reason):
+        sql.check_incremental(script, "id")
+
+
+def test_sql_server_needs_the_spill_for_incremental_jobs(connections, monkeypatch):
+    sql, _ = connections
+    monkeypatch.setenv("RESULT_SPILL_ENABLED", "false")
+    with pytest.raises(ValueError, match="RESULT_SPILL_ENABLED"):
+        sql.check_incremental("SELECT id FROM orders", "id")
+
+
+def test_snowflake_allows_ctes_and_unnamed_columns(connections):
+    _, snowflake = connections
+    snowflake.check_incremental("WITH recent AS (SELECT * FROM orders) SELECT id, COUNT(*) FROM recent GROUP BY id", "id")
+    with pytest.raises(ValueError, match="distinct"):
+        snowflake.check_incremental("SELECT id, id FROM orders", "id")
+
+
+def test_jobs_with_unwrappable_scripts_are_rejected(connections):
+    from jobs.job import Job
+
+    sql, _ = connections
+    with pytest.raises(ValueError, match="CTE"):
+        Job(job_name="orders", job_connection=sql, created_by="me", watermark_column="id",
+            execution_script="WITH x AS (SELECT 1 AS id) SELECT id FROM x")
+
+    Job(job_name="orders", job_connection=sql, created_by="me", execution_script="WITH x AS (SELECT 1 AS id) SELECT id FROM x")
+
+
+def test_snowflake_mark_covers_rows_left_for_paging(connections, monkeypatch):
+    from contextlib import contextmanager
+    from connection import SnowflakeConnection
+
+    _, snowflake = connections
+    executed = []
+
+    class Cursor:
+        description = [("ID",), ("NAME",)]
+        rowcount = 5000
+        sfqid = "01b2-query"
+
+        def __init__(self, rows=None):
+            self.rows = rows
+
+        def fetchmany(self, size):
+            return [(i, f"row {i}") for i in range(size)]
+
+        def execute(self, sql, params=None):
+            executed.append((sql, params))
+            return self
+
+        def fetchone(self):
+            return (4999,)
+
+        def close(self):
+            pass
+
+    class Session:
+        session_id = 1
+
+        def execute_string(self, script):
+            return [Cursor()]
+
+        def cursor(self):
+            return Cursor()
+
+    @contextmanager
+    def pooled_connection(self, script=None):
+        yield Session()
+
+    monkeypatch.setattr(SnowflakeConnection, "pooled_connection", pooled_connection)
+
+    response = snowflake.fetch("SELECT * FROM (SELECT id, name FROM t) AS src ORDER BY src.id", watermark_column="id")
+
+    assert response.status == "pass"
+    assert len(response.data[0]["rows"]) == snowflake.MAX_ROW_SIZE
+    assert response.data[0]["result_handle"]["query_id"] == "01b2-query"
+    assert snowflake.last_watermark == 4999
+    assert executed == [('SELECT MAX("ID") FROM TABLE(RESULT_SCAN(%s))', ("01b2-query",))]
@@ -0,0 +1,8 @@
+from .span import Span, SpanContext
+from .exporters import SpanExporter, FileSpanExporter, OtlpHttpExporter, BatchSpanProcessor
+from .tracer import TracingSettings, Tracer, tracer, get_current_span
+
+__all__ = [
+    'Span', 'SpanContext', 'SpanExporter', 'FileSpanExporter', 'OtlpHttpExporter', 'BatchSpanProcessor',
+    'TracingSettings', 'Tracer', 'tracer', 'get_current_span',
+]
@@ -0,0 +1,199 @@
+from .span import Span
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import urllib.request
+
+logger = logging.getLogger(f"app.{__name__}")
+
+
+class SpanExporter:
+    """Receives finished spans in batches, from the processor's thread."""
+
+    def export(self, spans: list[Span]):
+        raise NotImplementedError
+
+    def shutdown(self):
+        pass
+
+
+class FileSpanExporter(SpanExporter):
+    """Appends one JSON object per span to a local file."""
+
+    def __init__(self, path: str, service_name: str):
+        self.path = path
+        self.service_name = service_name
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+
+    def export(self, spans: list[Span]):
+        lines = "".join(
+            json.dumps({"service": self.service_name, **span.to_dict()}, default=str) + "\n" for span in spans
+        )
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(lines)
+
+
+# OTLP enums
+_SPAN_KINDS = {"internal": 1, "server": 2, "client": 3, "producer": 4, "consumer": 5}
+_STATUS_CODES = {"unset": 0, "ok": 1, "error": 2}
+
+
+def _otlp_value(value) -> dict:
+    # bool before int: bool is an int subclass. 64-bit ints are strings in OTLP/JSON.
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    if isinstance(value, (list, tuple)):
+        return {"arrayValue": {"values": [_otlp_value(item) for item in value]}}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: dict) -> list[dict]:
+    return [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items()]
+
+
+class OtlpHttpExporter(SpanExporter):
+    """
+    Posts spans to an OpenTelemetry collector (or anything speaking
+    OTLP/HTTP with JSON encoding) at e.g. http://collector:4318/v1/traces.
+    Failures are logged and the batch is dropped; tracing never fails a job.
+    """
+
+    def __init__(self, endpoint: str, service_name: str, headers: dict | None = None, timeout: float = 5.0):
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self.headers = {"Content-Type": "application/json", **(headers or {})}
+        self.timeout = timeout
+
+
+    def to_payload(self, spans: list[Span]) -> dict:
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": _otlp_attributes({"service.name": self.service_name})},
+                "scopeSpans": [{
+                    "scope": {"name": "lazy-patch"},
+                    "spans": [self._otlp_span(span) for span in spans],
+                }],
+            }]
+        }
+
+
+    @staticmethod
+    def _otlp_span(span: Span) -> dict:
+        entry = {
+            "traceId": span.context.trace_id,
+            "spanId": span.context.span_id,
+            "name": span.name,
+            "kind": _SPAN_KINDS.get(span.kind, 1),
+            "startTimeUnixNano": str(span.start_ns),
+            "endTimeUnixNano": str(span.end_ns),
+            "attributes": _otlp_attributes(span.attributes),
+            "events": [
+                {"timeUnixNano": str(event["time_ns"]), "name": event["name"],
+                 "attributes": _otlp_attributes(event["attributes"])}
+                for event in span.events
+            ],
+            "status": {"code": _STATUS_CODES[span.status], "message": span.status_message},
+        }
+        if span.parent_id:
+            entry["parentSpanId"] = span.parent_id
+        return entry
+
+
+    def export(self, spans: list[Span]):
+        body = json.dumps(self.to_payload(spans), default=str).encode("utf-8")
+        request = urllib.request.Request(self.endpoint, data=body, headers=self.headers, method="POST")
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                response.read()
+        except Exception as e:
+            logger.warning("Dropped %d span(s), OTLP export to %s failed: %s", len(spans), self.endpoint, e)
+
+
+class BatchSpanProcessor:
+    """
+    Queues finished spans and exports them in batches from a background
+    thread, so job threads never wait on file or network I/O. When the
+    queue is full, spans are dropped and counted (like the log pipeline).
+    The thread is started lazily and again after fork.
+    """
+
+    def __init__(self, exporter: SpanExporter, max_queue_size: int = 10000, batch_size: int = 512,
+                 schedule_delay: float = 2.0):
+        self.exporter = exporter
+        self.max_queue_size = max_queue_size
+        self.batch_size = batch_size
+        self.schedule_delay = schedule_delay
+        self.dropped = 0
+        self._queue: queue.Queue | None = None
+        self._thread: threading.Thread | None = None
+        self._pid: int | None = None
+        self._lock = threading.Lock()
+        atexit.register(self.shutdown)
+
+
+    def _ensure_started(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                # Forked child: the parent's thread didn't come along
+                self._queue = queue.Queue(maxsize=self.max_queue_size)
+                self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+                self._thread.start()
+                self._pid = os.getpid()
+
+
+    def on_end(self, span: Span):
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+
+    def _run(self):
+        spans_queue = self._queue
+        stopping = False
+        while not stopping:
+            batch = []
+            try:
+                span = spans_queue.get(timeout=self.schedule_delay)
+                if span is None:
+                    stopping = True
+                else:
+                    batch.append(span)
+                while len(batch) < self.batch_size and not stopping:
+                    span = spans_queue.get_nowait()
+                    if span is None:
+                        stopping = True
+                    else:
+                        batch.append(span)
+            except queue.Empty:
+                pass
+
+            if batch:
+                try:
+                    self.exporter.export(batch)
+                except Exception:
+                    logger.exception("Span export failed")
+
+
+    def shutdown(self):
+        """Flushes queued spans; called at exit."""
+        if self._pid != os.getpid() or self._thread is None:
+            return
+        try:
+            self._queue.put(None, timeout=1)
+        except queue.Full:
+            pass
+        self._thread.join(timeout=5)
+        self._pid = None
+        self.exporter.shutdown()
@@ -0,0 +1,119 @@
+from pydantic import BaseModel, ConfigDict
+import re
+import secrets
+import time
+
+# W3C trace context: version-traceid-spanid-flags
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+
+def new_trace_id() -> str:
+    return secrets.token_hex(16)
+
+
+def new_span_id() -> str:
+    return secrets.token_hex(8)
+
+
+class SpanContext(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
+    trace_id: str
+    span_id: str
+    sampled: bool = True
+
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    @classmethod
+    def from_traceparent(cls, value: str | None):
+        """Parses a traceparent header; returns None if it's missing or malformed."""
+        match = _TRACEPARENT.match((value or "").strip().lower())
+        if not match:
+            return None
+        trace_id, span_id, flags = match.groups()
+        return cls(trace_id=trace_id, span_id=span_id, sampled=bool(int(flags, 16) & 1))
+
+
+class Span:
+    """
+    One timed stage of a job. Plain class rather than a model: spans are
+    created on every hop, so they stay as cheap as possible. Unsampled
+    spans still carry context for propagation but record nothing.
+    """
+
+    __slots__ = ("name", "context", "parent_id", "kind", "start_ns", "end_ns",
+                 "attributes", "events", "status", "status_message")
+
+    def __init__(self, name: str, context: SpanContext, parent_id: str | None = None,
+                 kind: str = "internal", attributes: dict | None = None):
+        self.name = name
+        self.context = context
+        self.parent_id = parent_id
+        self.kind = kind
+        self.start_ns = time.time_ns()
+        self.end_ns: int | None = None
+        self.attributes = dict(attributes or {}) if context.sampled else {}
+        self.events: list[dict] = []
+        # "unset" / "ok" / "error", as in OpenTelemetry
+        self.status = "unset"
+        self.status_message = ""
+
+
+    @property
+    def recording(self) -> bool:
+        return self.context.sampled and self.end_ns is None
+
+
+    def set_attribute(self, key: str, value):
+        if self.recording and value is not None:
+            self.attributes[key] = value
+
+
+    def set_attributes(self, attributes: dict):
+        for key, value in attributes.items():
+            self.set_attribute(key, value)
+
+
+    def set_status(self, status: str, message: str = ""):
+        if self.recording:
+            self.status = status
+            self.status_message = message
+
+
+    def record_exception(self, exc: BaseException):
+        if not self.recording:
+            return
+        self.events.append({
+            "name": "exception",
+            "time_ns": time.time_ns(),
+            "attributes": {"exception.type": type(exc).__name__, "exception.message": str(exc)},
+        })
+        self.set_status("error", str(exc))
+
+
+    def end(self):
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+
+
+    @property
+    def duration_ms(self) -> float | None:
+        return None if self.end_ns is None else (self.end_ns - self.start_ns) / 1e6
+
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.context.trace_id,
+            "span_id": self.context.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": self.duration_ms,
+            "status": self.status,
+            "status_message": self.status_message,
+            "attributes": self.attributes,
+            "events": self.events,
+        }
@@ -0,0 +1,158 @@
+from .span import Span, SpanContext, new_span_id, new_trace_id
+from .exporters import BatchSpanProcessor, FileSpanExporter, OtlpHttpExporter
+from contextlib import contextmanager
+from pydantic import BaseModel
+from typing import Literal
+from utils import current_span
+import logging
+import os
+import random
+
+logger = logging.getLogger(f"app.{__name__}")
+
+TRACEPARENT_HEADER = "traceparent"
+
+
+def _parse_headers(value: str | None) -> dict:
+    """Parses 'authorization=Bearer x,tenant=a' into a header dict."""
+    pairs = (item.split("=", 1) for item in (value or "").split(",") if "=" in item)
+    return {key.strip(): val.strip() for key, val in pairs}
+
+
+class TracingSettings(BaseModel):
+    exporter: Literal["none", "file", "otlp"] = "none"
+    service_name: str = "lazy-patch"
+    # Fraction of new traces that are recorded; children follow their root
+    sample_rate: float = 1.0
+    file_path: str = os.path.join(os.path.expanduser("~"), ".lazy-patch", "traces.jsonl")
+    otlp_endpoint: str = "http://localhost:4318/v1/traces"
+    otlp_headers: dict = {}
+
+    @classmethod
+    def from_env(cls):
+        """
+        TRACING_EXPORTER=none|file|otlp, TRACING_SERVICE_NAME, TRACING_SAMPLE_RATE,
+        TRACING_FILE_PATH, TRACING_OTLP_ENDPOINT, TRACING_OTLP_HEADERS="k=v,..."
+        """
+        values = {
+            "exporter": (os.getenv("TRACING_EXPORTER") or "").strip().lower() or None,
+            "service_name": os.getenv("TRACING_SERVICE_NAME"),
+            "sample_rate": os.getenv("TRACING_SAMPLE_RATE"),
+            "file_path": os.getenv("TRACING_FILE_PATH"),
+            "otlp_endpoint": os.getenv("TRACING_OTLP_ENDPOINT"),
+            "otlp_headers": _parse_headers(os.getenv("TRACING_OTLP_HEADERS")) or None,
+        }
+        return cls(**{k: v for k, v in values.items() if v is not None})
+
+
+class Tracer:
+    """
+    Minimal W3C-trace-context tracer.
+
+    start_span() nests through the current_span context variable, so spans
+    opened on driver threads (via contextvars.copy_context) attach to the
+    task's span. inject() / extract() carry the context across the broker
+    in a `traceparent` task header. With the exporter set to "none",
+    start_span() yields a non-recording span and costs next to nothing.
+    """
+
+    def __init__(self, settings: TracingSettings | None = None, processor: BatchSpanProcessor | None = None):
+        self.settings = settings or TracingSettings.from_env()
+        self.processor = processor or self._build_processor(self.settings)
+
+
+    @classmethod
+    def from_env(cls):
+        return cls(TracingSettings.from_env())
+
+
+    @staticmethod
+    def _build_processor(settings: TracingSettings) -> BatchSpanProcessor | None:
+        if settings.exporter == "file":
+            return BatchSpanProcessor(FileSpanExporter(settings.file_path, settings.service_name))
+        if settings.exporter == "otlp":
+            return BatchSpanProcessor(
+                OtlpHttpExporter(settings.otlp_endpoint, settings.service_name, headers=settings.otlp_headers)
+            )
+        return None
+
+
+    @property
+    def enabled(self) -> bool:
+        return self.processor is not None
+
+
+    @contextmanager
+    def start_span(self, name: str, attributes: dict | None = None, parent: SpanContext | None = None,
+                   kind: str = "internal"):
+        """
+        Opens a child of `parent` (default: the current span), or a new trace.
+        Exceptions escaping the block are recorded on the span and re-raised.
+        """
+        if not self.enabled:
+            yield _NOOP_SPAN
+            return
+
+        if parent is None:
+            enclosing = current_span.get()
+            parent = enclosing.context if enclosing is not None else None
+
+        if parent is not None:
+            context = SpanContext(trace_id=parent.trace_id, span_id=new_span_id(), sampled=parent.sampled)
+        else:
+            sampled = random.random() < self.settings.sample_rate
+            context = SpanContext(trace_id=new_trace_id(), span_id=new_span_id(), sampled=sampled)
+
+        span = Span(name, context, parent.span_id if parent else None, kind, attributes)
+        token = current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.record_exception(e)
+            raise
+        finally:
+            current_span.reset(token)
+            span.end()
+            if context.sampled:
+                self.processor.on_end(span)
+
+
+    def inject(self, carrier: dict | None) -> dict | None:
+        """Adds the current span's traceparent to a header dict."""
+        span = current_span.get()
+        if carrier is not None and span is not None and span is not _NOOP_SPAN:
+            carrier[TRACEPARENT_HEADER] = span.context.traceparent()
+        return carrier
+
+
+    @staticmethod
+    def extract(carrier) -> SpanContext | None:
+        """
+        Reads traceparent from a header dict or a Celery task request
+        (custom message headers show up as request attributes).
+        """
+        if carrier is None:
+            return None
+        value = carrier.get(TRACEPARENT_HEADER)
+        if value is None:
+            headers = carrier.get("headers") or {}
+            value = headers.get(TRACEPARENT_HEADER)
+        return SpanContext.from_traceparent(value)
+
+
+    def shutdown(self):
+        if self.processor is not None:
+            self.processor.shutdown()
+
+
+# Yielded when tracing is off: accepts attributes and drops them
+_NOOP_SPAN = Span("noop", SpanContext(trace_id="0" * 32, span_id="0" * 16, sampled=False))
+
+
+def get_current_span() -> Span:
+    """The span open on this context, or a non-recording one."""
+    return current_span.get() or _NOOP_SPAN
+
+
+# Process-wide tracer configured from the environment
+tracer = Tracer.from_env()
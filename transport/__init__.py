@@ -0,0 +1,11 @@
+from .codecs import Codec, get_codec, available_codecs
+from .compression import (
+    CompressionSettings, CompressionStats, compression_stats, compress_payload, decompress_payload,
+)
+from .serializer import register_compressed_json, SERIALIZER_NAME
+
+__all__ = [
+    'Codec', 'get_codec', 'available_codecs', 'CompressionSettings', 'CompressionStats',
+    'compression_stats', 'compress_payload', 'decompress_payload',
+    'register_compressed_json', 'SERIALIZER_NAME',
+]
\ No newline at end of file
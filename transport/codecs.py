@@ -0,0 +1,63 @@
+from typing import Callable, NamedTuple
+import bz2
+import logging
+import lzma
+import zlib
+
+logger = logging.getLogger(f"app.{__name__}")
+
+
+class Codec(NamedTuple):
+    name: str
+    # One-byte id stored in the frame header
+    tag: bytes
+    compress: Callable[[bytes], bytes]
+    decompress: Callable[[bytes], bytes]
+
+
+_CODECS: dict[str, Codec] = {
+    "zlib": Codec("zlib", b"z", lambda data: zlib.compress(data, 6), zlib.decompress),
+    "lzma": Codec("lzma", b"x", lzma.compress, lzma.decompress),
+    "bz2": Codec("bz2", b"b", bz2.compress, bz2.decompress),
+}
+
+# Faster codecs, used when the optional packages are installed
+try:
+    import zstandard
+
+    _CODECS["zstd"] = Codec(
+        "zstd", b"s",
+        lambda data: zstandard.ZstdCompressor(level=3).compress(data),
+        lambda data: zstandard.ZstdDecompressor().decompress(data),
+    )
+except ImportError:
+    pass
+
+try:
+    import lz4.frame
+
+    _CODECS["lz4"] = Codec("lz4", b"4", lz4.frame.compress, lz4.frame.decompress)
+except ImportError:
+    pass
+
+_BY_TAG = {codec.tag: codec for codec in _CODECS.values()}
+
+
+def get_codec(name: str) -> Codec:
+    """Codec by name; falls back to zlib when an optional codec isn't installed."""
+    codec = _CODECS.get(name.lower())
+    if codec is None:
+        logger.warning("Compression codec %r is not available, falling back to zlib", name)
+        return _CODECS["zlib"]
+    return codec
+
+
+def codec_for_tag(tag: bytes) -> Codec:
+    codec = _BY_TAG.get(tag)
+    if codec is None:
+        raise ValueError(f"Payload compressed with unavailable codec tag {tag!r}")
+    return codec
+
+
+def available_codecs() -> list[str]:
+    return list(_CODECS)
@@ -0,0 +1,109 @@
+from .codecs import Codec, codec_for_tag, get_codec
+from pydantic import BaseModel
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(f"app.{__name__}")
+
+# Frame header: NUL can't start a JSON document, so plain payloads pass through untouched
+MAGIC = b"\x00LPZ"
+
+
+class CompressionSettings(BaseModel):
+    # Codec name, or None to disable compression
+    codec: str | None = "zlib"
+    # Payloads smaller than this stay uncompressed
+    threshold: int = 1024
+
+    @classmethod
+    def from_env(cls):
+        codec = os.getenv("TRANSPORT_COMPRESSION", "zlib").strip().lower()
+        return cls(
+            codec=None if codec in ("", "none", "off") else codec,
+            threshold=int(os.getenv("TRANSPORT_COMPRESSION_THRESHOLD", "1024")),
+        )
+
+
+class CompressionStats:
+    """Process-wide counters for compression ratio and CPU time spent."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.payloads = 0
+        self.compressed = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.compress_seconds = 0.0
+        self.decompress_seconds = 0.0
+
+    def record_compress(self, size_in: int, size_out: int, seconds: float, compressed: bool):
+        with self._lock:
+            self.payloads += 1
+            self.bytes_in += size_in
+            self.bytes_out += size_out
+            if compressed:
+                self.compressed += 1
+                self.compress_seconds += seconds
+
+    def record_decompress(self, seconds: float):
+        with self._lock:
+            self.decompress_seconds += seconds
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "payloads": self.payloads,
+                "compressed": self.compressed,
+                "bytes_in": self.bytes_in,
+                "bytes_out": self.bytes_out,
+                "ratio": (self.bytes_in / self.bytes_out) if self.bytes_out else 1.0,
+                "compress_seconds": self.compress_seconds,
+                "decompress_seconds": self.decompress_seconds,
+            }
+
+
+compression_stats = CompressionStats()
+
+
+def compress_payload(data: bytes, settings: CompressionSettings) -> bytes:
+    """
+    Frames and compresses data when it is at least settings.threshold bytes
+    and compression actually makes it smaller; otherwise returns it unchanged.
+    """
+    if not settings.codec or len(data) < settings.threshold:
+        compression_stats.record_compress(len(data), len(data), 0.0, False)
+        return data
+
+    codec: Codec = get_codec(settings.codec)
+
+    # Thread CPU time, so time spent waiting on other threads isn't counted
+    started = time.thread_time()
+    body = codec.compress(data)
+    seconds = time.thread_time() - started
+
+    if len(body) + len(MAGIC) + 1 >= len(data):
+        compression_stats.record_compress(len(data), len(data), seconds, False)
+        return data
+
+    framed = MAGIC + codec.tag + body
+    compression_stats.record_compress(len(data), len(framed), seconds, True)
+    logger.debug(
+        "Compressed %d -> %d bytes with %s (%.1fx, %.2fms CPU)",
+        len(data), len(framed), codec.name, len(data) / len(framed), seconds * 1000,
+    )
+    return framed
+
+
+def decompress_payload(data: bytes) -> bytes:
+    """Inverse of compress_payload; unframed data is returned as is."""
+    if not data.startswith(MAGIC):
+        return data
+
+    codec = codec_for_tag(data[len(MAGIC):len(MAGIC) + 1])
+
+    started = time.thread_time()
+    raw = codec.decompress(data[len(MAGIC) + 1:])
+    compression_stats.record_decompress(time.thread_time() - started)
+    return raw
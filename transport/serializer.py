@@ -0,0 +1,26 @@
+from .compression import CompressionSettings, compress_payload, decompress_payload
+from kombu.serialization import register
+from kombu.utils.json import dumps, loads
+
+SERIALIZER_NAME = "json+lpz"
+CONTENT_TYPE = "application/x-lazypatch-json"
+
+
+def register_compressed_json(settings: CompressionSettings | None = None) -> str:
+    """
+    Registers a kombu serializer that is JSON below the size threshold and a
+    compressed frame above it. Decoding accepts both, so workers and clients
+    with different thresholds interoperate. Returns the serializer name.
+    """
+    settings = settings or CompressionSettings.from_env()
+
+    def encode(obj) -> bytes:
+        return compress_payload(dumps(obj).encode("utf-8"), settings)
+
+    def decode(data) -> object:
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        return loads(decompress_payload(bytes(data)).decode("utf-8"))
+
+    register(SERIALIZER_NAME, encode, decode, content_type=CONTENT_TYPE, content_encoding="binary")
+    return SERIALIZER_NAME
@@ -1,3 +1,6 @@
 from .decorators import enforce_responsemodel
+from .context import current_task_id, current_job_name, current_span
+from .cancellation import ActiveQueryRegistry, active_queries
 
-__all__ = ['enforce_responsemodel']
\ No newline at end of file
+__all__ = ['enforce_responsemodel', 'current_task_id', 'current_job_name', 'current_span',
+           'ActiveQueryRegistry', 'active_queries']
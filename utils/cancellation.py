@@ -0,0 +1,85 @@
+from contextlib import contextmanager
+from typing import Callable, Dict
+from .context import current_task_id
+import itertools
+import logging
+import threading
+
+logger = logging.getLogger(f"app.{__name__}")
+
+# Bucket used for queries started outside of any task context
+_NO_TASK = "__no_task__"
+
+
+class ActiveQueryRegistry:
+    """
+    Thread-safe registry of in-flight driver queries.
+
+    Connections register a cancel callable for the duration of a query.
+    Revoke, soft time limit and worker shutdown handlers then use the
+    registry to cancel the work on the server side instead of leaving
+    it running on the warehouse / instance.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._handles: Dict[str, Dict[int, Callable[[], None]]] = {}
+        self._ids = itertools.count()
+
+
+    @contextmanager
+    def track(self, cancel: Callable[[], None], task_id: str | None = None):
+        """
+        Register a cancel callable while the wrapped block runs.
+        Defaults to the task id of the current context.
+        """
+        key = task_id or current_task_id.get() or _NO_TASK
+        handle_id = next(self._ids)
+
+        with self._lock:
+            self._handles.setdefault(key, {})[handle_id] = cancel
+
+        try:
+            yield
+        finally:
+            with self._lock:
+                handles = self._handles.get(key)
+                if handles is not None:
+                    handles.pop(handle_id, None)
+                    if not handles:
+                        del self._handles[key]
+
+
+    def cancel(self, task_id: str) -> int:
+        """Cancel every active query registered for a task. Returns the count."""
+        with self._lock:
+            handles = list(self._handles.get(task_id, {}).values())
+
+        return self._run_cancels(task_id, handles)
+
+
+    def cancel_all(self) -> int:
+        """Cancel every active query in this process (used on shutdown)."""
+        with self._lock:
+            snapshot = {key: list(handles.values()) for key, handles in self._handles.items()}
+
+        return sum(self._run_cancels(key, handles) for key, handles in snapshot.items())
+
+
+    @staticmethod
+    def _run_cancels(task_id: str, handles) -> int:
+        cancelled = 0
+        for cancel in handles:
+            try:
+                cancel()
+                cancelled += 1
+            except Exception:
+                logger.warning("Failed to cancel active query for task %s", task_id, exc_info=True)
+
+        if cancelled:
+            logger.info("Cancelled %d active quer(y/ies) for task %s", cancelled, task_id)
+        return cancelled
+
+
+# Process-wide registry shared by all connections
+active_queries = ActiveQueryRegistry()
@@ -0,0 +1,13 @@
+from contextvars import ContextVar
+
+# Id of the Celery task (or in-process job) currently executing on this context.
+# Set by the task / job entry points and read by anything that needs to
+# correlate work back to the job that triggered it.
+current_task_id: ContextVar[str | None] = ContextVar("current_task_id", default=None)
+
+# Name of the job currently executing on this context, for log records
+current_job_name: ContextVar[str | None] = ContextVar("current_job_name", default=None)
+
+# Tracing span currently open on this context (tracing.Span), for log records
+# and for code that adds attributes to the enclosing span
+current_span: ContextVar[object | None] = ContextVar("current_span", default=None)
@@ -0,0 +1,98 @@
+"""
+Worker process warm-up.
+
+Celery recycles pool processes every worker_max_tasks_per_child tasks, and
+each fresh child would otherwise pay driver imports, config parsing, logins
+and (for Snowflake) warehouse resume on its first jobs. warm_up() does that
+work in worker_process_init, before the child takes a task; cool_down()
+closes the pooled sessions on worker_process_shutdown.
+"""
+
+from connection import Connection, get_connection_pool
+from pydantic import BaseModel
+import importlib
+import logging
+import os
+import time
+
+logger = logging.getLogger(f"app.{__name__}")
+
+# Driver modules behind each connection type; some load heavy submodules lazily
+DRIVER_MODULES = {
+    "sql_server": ["pyodbc"],
+    "snowflake": ["snowflake.connector", "snowflake.connector.cursor"],
+    "lambda": ["boto3"],
+    "shell": [],
+}
+
+
+def _parse_list(value: str | None) -> list[str]:
+    return [item.strip() for item in (value or "").split(",") if item.strip()]
+
+
+class WarmupSettings(BaseModel):
+    # Connection types to warm up, e.g. ["sql_server", "snowflake"]
+    targets: list[str] = []
+    # Pooled connections opened per target (capped by CONNECTION_POOL_SIZE)
+    connections: int = 1
+    # ALTER WAREHOUSE ... RESUME IF SUSPENDED for Snowflake targets
+    resume_warehouse: bool = False
+
+    @classmethod
+    def from_env(cls):
+        """
+        WARMUP_TARGETS="sql_server,snowflake", WARMUP_CONNECTIONS,
+        WARMUP_RESUME_WAREHOUSE=true
+        """
+        values = {
+            "targets": _parse_list(os.getenv("WARMUP_TARGETS")),
+            "connections": os.getenv("WARMUP_CONNECTIONS"),
+            "resume_warehouse": os.getenv("WARMUP_RESUME_WAREHOUSE", "").strip().lower() in ['1', 'yes', 'true'],
+        }
+        return cls(**{k: v for k, v in values.items() if v is not None})
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.targets)
+
+
+def warm_up(settings: WarmupSettings | None = None) -> dict:
+    """
+    Imports drivers, builds each target's connection from the environment,
+    opens pooled sessions and optionally resumes the warehouse.
+    A target that fails is logged and skipped: the worker must still start.
+    Returns the number of connections opened per target.
+    """
+    settings = settings or WarmupSettings.from_env()
+    if not settings.enabled:
+        return {}
+
+    started = time.monotonic()
+    pool = get_connection_pool()
+    if not pool.enabled:
+        logger.info("CONNECTION_POOL_SIZE is 0: warming up imports and configs only")
+
+    opened = {}
+    for connection_type in settings.targets:
+        try:
+            for module in DRIVER_MODULES.get(connection_type, []):
+                importlib.import_module(module)
+
+            # Same path as run_job, so configs are validated before the first task
+            connection = Connection.create({"connection_type": connection_type})
+
+            opened[connection_type] = connection.warm_up(settings.connections) if pool.enabled else 0
+
+            if settings.resume_warehouse and hasattr(connection, "resume_warehouse"):
+                connection.resume_warehouse()
+
+        except Exception as e:
+            logger.warning("Warm-up of %s failed: %s", connection_type, e)
+
+    logger.info("Worker warm-up finished in %.2fs: %s", time.monotonic() - started, opened)
+    return opened
+
+
+def cool_down():
+    """Closes the pooled sessions of this process."""
+    get_connection_pool().close_all()